@@ -5,9 +5,9 @@ Helper functions for MCP (Model Context Protocol) implementation
 import json
 from typing import Dict, Any, List
 from app.api.models import ServerRequest, ClientRequest
-from app.services.cyperf_service import CyperfService
-
-cyperf_service = CyperfService()
+from app.services.shared import async_service
+from app.services.stats_budget import STATS_TOOL_PROPERTIES, compact_stats
+from app.services.stats_query import StatsQuery
 
 
 def _get_mcp_tools() -> List[Dict[str, Any]]:
@@ -56,44 +56,48 @@ def _get_mcp_tools() -> List[Dict[str, Any]]:
         },
         {
             "name": "get_server_stats",
-            "description": "Get statistics from a running Cyperf server",
+            "description": "Get statistics from a Cyperf server: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
             "inputSchema": {
                 "type": "object",
                 "properties": {
-                    "test_id": {"type": "string", "description": "Test ID of the server"}
+                    "test_id": {"type": "string", "description": "Test ID of the server"},
+                    **STATS_TOOL_PROPERTIES
                 },
                 "required": ["test_id"]
             }
         },
         {
             "name": "get_client_stats",
-            "description": "Get statistics from a running Cyperf client",
+            "description": "Get statistics from a Cyperf client: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
             "inputSchema": {
-                "type": "object", 
+                "type": "object",
                 "properties": {
-                    "test_id": {"type": "string", "description": "Test ID of the client"}
+                    "test_id": {"type": "string", "description": "Test ID of the client"},
+                    **STATS_TOOL_PROPERTIES
                 },
                 "required": ["test_id"]
             }
         },
         {
             "name": "get_server_stats_image",
-            "description": "Get server statistics as a visual table image",
+            "description": "Get server statistics as a visual table image or time-series chart",
             "inputSchema": {
                 "type": "object",
                 "properties": {
-                    "test_id": {"type": "string", "description": "Test ID of the server"}
+                    "test_id": {"type": "string", "description": "Test ID of the server"},
+                    "mode": {"type": "string", "enum": ["table", "chart"], "description": "table (latest rows) or chart (throughput over time)"}
                 },
                 "required": ["test_id"]
             }
         },
         {
             "name": "get_client_stats_image",
-            "description": "Get client statistics as a visual table image",
+            "description": "Get client statistics as a visual table image or time-series chart",
             "inputSchema": {
                 "type": "object",
                 "properties": {
-                    "test_id": {"type": "string", "description": "Test ID of the client"}
+                    "test_id": {"type": "string", "description": "Test ID of the client"},
+                    "mode": {"type": "string", "enum": ["table", "chart"], "description": "table (latest rows) or chart (throughput over time)"}
                 },
                 "required": ["test_id"]
             }
@@ -175,7 +179,7 @@ async def _mcp_start_server(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     
     # Call the service directly
     test_id = str(__import__('uuid').uuid4())
-    result = cyperf_service.start_server(test_id, server_ip, payload["params"])
+    result = await async_service.start_server(test_id, server_ip, payload["params"])
     
     return [{
         "type": "text",
@@ -206,7 +210,7 @@ async def _mcp_start_client(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
         "interval": arguments.get("interval")
     }
     
-    result = cyperf_service.start_client(test_id, server_ip, client_ip, params)
+    result = await async_service.start_client(test_id, server_ip, client_ip, params)
     
     return [{
         "type": "text",
@@ -222,23 +226,26 @@ async def _mcp_start_client(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
 
 async def _mcp_get_server_stats(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get server statistics via MCP"""
-    test_id = arguments["test_id"]
-    stats = cyperf_service.get_server_stats(test_id)
-    
-    return [{
-        "type": "text",
-        "text": f"Server Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
-    }]
+    return await _mcp_get_stats("server", arguments)
 
 
 async def _mcp_get_client_stats(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get client statistics via MCP"""
+    return await _mcp_get_stats("client", arguments)
+
+
+async def _mcp_get_stats(role: str, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Return the stats of one role in the requested compact mode, within max_bytes"""
     test_id = arguments["test_id"]
-    stats = cyperf_service.get_client_stats(test_id)
-    
+    get_stats = async_service.get_server_stats if role == "server" else async_service.get_client_stats
+
+    async def fetch_columns(query: Dict[str, Any]) -> Dict[str, Any]:
+        return await get_stats(test_id, None, "columnar", StatsQuery.from_params(**query))
+
+    text = await compact_stats(role, arguments, lambda: async_service.live_summary(test_id), fetch_columns)
     return [{
         "type": "text",
-        "text": f"Client Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
+        "text": text
     }]
 
 
@@ -247,12 +254,9 @@ async def _mcp_get_server_stats_image(arguments: Dict[str, Any]) -> List[Dict[st
     import base64
     
     test_id = arguments["test_id"]
-    stats = cyperf_service.get_server_stats(test_id)
-    img_bytes = cyperf_service.stats_to_image(stats)
+    _, image_data = await async_service.get_stats_image(test_id, "server", arguments.get("mode", "table"))
     
-    # Read the image bytes and encode as base64
-    img_bytes.seek(0)
-    image_data = img_bytes.read()
+    # Encode the (possibly cached) PNG as base64
     image_b64 = base64.b64encode(image_data).decode('utf-8')
     
     return [{
@@ -267,12 +271,9 @@ async def _mcp_get_client_stats_image(arguments: Dict[str, Any]) -> List[Dict[st
     import base64
     
     test_id = arguments["test_id"]
-    stats = cyperf_service.get_client_stats(test_id)
-    img_bytes = cyperf_service.stats_to_image(stats)
+    _, image_data = await async_service.get_stats_image(test_id, "client", arguments.get("mode", "table"))
     
-    # Read the image bytes and encode as base64
-    img_bytes.seek(0)
-    image_data = img_bytes.read()
+    # Encode the (possibly cached) PNG as base64
     image_b64 = base64.b64encode(image_data).decode('utf-8')
     
     return [{
@@ -285,7 +286,7 @@ async def _mcp_get_client_stats_image(arguments: Dict[str, Any]) -> List[Dict[st
 async def _mcp_get_server_logs(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get server logs via MCP"""
     test_id = arguments["test_id"]
-    logs = cyperf_service.read_server_logs(test_id)
+    logs = await async_service.read_server_logs(test_id)
     
     return [{
         "type": "text",
@@ -296,7 +297,7 @@ async def _mcp_get_server_logs(arguments: Dict[str, Any]) -> List[Dict[str, Any]
 async def _mcp_get_client_logs(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Get client logs via MCP"""
     test_id = arguments["test_id"]
-    logs = cyperf_service.read_client_logs(test_id)
+    logs = await async_service.read_client_logs(test_id)
     
     return [{
         "type": "text",
@@ -307,7 +308,7 @@ async def _mcp_get_client_logs(arguments: Dict[str, Any]) -> List[Dict[str, Any]
 async def _mcp_stop_server(arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Stop server via MCP"""
     server_ip = arguments["server_ip"]
-    result = cyperf_service.stop_server(server_ip)
+    result = await async_service.stop_server(server_ip)
     
     return [{
         "type": "text",
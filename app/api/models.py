@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Dict
+from typing import Optional, Dict, List, Any
 
 class ServerParams(BaseModel):
     cps: Optional[bool] = False
@@ -37,9 +37,37 @@ class ClientRequest(BaseModel):
 class StopServerRequest(BaseModel):
     server_ip: str
 
+class StatsBatchItem(BaseModel):
+    test_id: str
+    role: str = Field(default="client", description="server or client")
+    since: Optional[str] = Field(default=None, description="Row count already received, or a Timestamp value")
+    tail: Optional[int] = Field(default=None, description="Return at most this many of the newest rows")
+
+class StatsBatchRequest(BaseModel):
+    items: List[StatsBatchItem]
+    format: str = Field(default="rows", description="rows or columnar")
+
 class TestResponse(BaseModel):
     test_id: str
     status: str
     message: str
     server_pid: Optional[int] = None
     client_pid: Optional[int] = None
+
+class GroupServer(BaseModel):
+    server_ip: str
+    params: ServerParams = Field(default_factory=ServerParams)
+
+class GroupClient(BaseModel):
+    client_ip: str
+    server_ip: str = Field(description="IP of the group server this client connects to")
+    params: ClientParams = Field(default_factory=ClientParams)
+
+class TestGroupRequest(BaseModel):
+    servers: List[GroupServer]
+    clients: List[GroupClient]
+
+class TestGroupResponse(BaseModel):
+    group_id: str
+    status: str
+    members: List[Dict[str, Any]]
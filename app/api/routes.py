@@ -1,18 +1,34 @@
-from fastapi import APIRouter, HTTPException, Request
-from app.api.models import ServerRequest, ClientRequest, TestResponse, StopServerRequest
-from app.services.cyperf_service import CyperfService
+from fastapi import APIRouter, HTTPException, Request, Query
+from app.api.models import (
+    ServerRequest, ClientRequest, TestResponse, StopServerRequest,
+    TestGroupRequest, TestGroupResponse, StatsBatchRequest,
+)
+from app.services.shared import cyperf_service, async_service
+from app.services.test_groups import TestGroupManager
+from app.services.stats_query import StatsQuery
+from app.services.log_query import LogQuery, json_log_stream
+from app.services.stats_model import parse_timestamp
+from app.services.registry_store import persisted
+import math
 import uuid
-from fastapi.responses import StreamingResponse
+from typing import Optional
+import asyncio
+import json
+from fastapi.responses import StreamingResponse, Response
 from app.api.mcp_helpers import _get_mcp_tools, _handle_mcp_tool_call
 
 router = APIRouter()
-cyperf_service = CyperfService()
+test_groups = TestGroupManager(async_service)
+
+def _public_records(records: list) -> list:
+    """Project test records onto the fields safe to return (the persisted ones, never the launch command)"""
+    return [persisted(record) for record in records]
 
 @router.post("/start_server", tags=["Cyperf CE Server"], response_model=TestResponse)
 async def start_server(request: ServerRequest):
     test_id = str(uuid.uuid4())
     try:
-        result = cyperf_service.start_server(test_id, request.server_ip, request.params.dict())
+        result = await async_service.start_server(test_id, request.server_ip, request.params.dict())
         return TestResponse(
             test_id=test_id,
             server_pid=result["server_pid"],
@@ -25,7 +41,7 @@ async def start_server(request: ServerRequest):
 @router.post("/start_client", tags=["Cyperf CE Client"],response_model=TestResponse)
 async def start_client(request: ClientRequest):
     try:
-        result = cyperf_service.start_client(
+        result = await async_service.start_client(
             request.test_id,
             request.server_ip,
             request.client_ip,
@@ -40,22 +56,123 @@ async def start_client(request: ClientRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _stats_query(fields, bucket, agg, start, end, max_points, tail=None) -> Optional[StatsQuery]:
+    """Build a StatsQuery from request parameters, rejecting malformed ones with 400"""
+    try:
+        return StatsQuery.from_params(fields, bucket, agg, start, end, max_points, tail)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 @router.get("/server/stats/{test_id}", tags=["Cyperf CE Server"])
-async def get_server_stats(test_id: str):
+async def get_server_stats(test_id: str, since: Optional[str] = None,
+                           stats_format: str = Query("rows", alias="format"),
+                           fields: Optional[str] = None, bucket: Optional[str] = None,
+                           agg: str = "mean", start: Optional[str] = None, end: Optional[str] = None,
+                           max_points: Optional[int] = None, tail: Optional[int] = None):
+    """
+    Get server CSV stats rows
+
+    Pass `since` as the number of rows already received (or a Timestamp value)
+    to get only the rows added after it. `format=columnar` returns
+    `{"start", "count", "columns": {name: [values]}}` instead of row dicts.
+    `fields`, `start`/`end`, `tail`, `bucket`/`agg` and `max_points` project,
+    window and downsample the rows on the server.
+    """
+    if stats_format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be rows or columnar")
+    query = _stats_query(fields, bucket, agg, start, end, max_points, tail)
     try:
-        stats = cyperf_service.get_server_stats(test_id)
+        stats = await async_service.get_server_stats(test_id, since, stats_format, query)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/client/stats/{test_id}", tags=["Cyperf CE Client"])
-async def get_client_stats(test_id: str):
+async def get_client_stats(test_id: str, since: Optional[str] = None,
+                           stats_format: str = Query("rows", alias="format"),
+                           fields: Optional[str] = None, bucket: Optional[str] = None,
+                           agg: str = "mean", start: Optional[str] = None, end: Optional[str] = None,
+                           max_points: Optional[int] = None, tail: Optional[int] = None):
+    """
+    Get client CSV stats rows
+
+    Pass `since` as the number of rows already received (or a Timestamp value)
+    to get only the rows added after it. `format=columnar` returns
+    `{"start", "count", "columns": {name: [values]}}` instead of row dicts.
+    `fields`, `start`/`end`, `tail`, `bucket`/`agg` and `max_points` project,
+    window and downsample the rows on the server.
+    """
+    if stats_format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be rows or columnar")
+    query = _stats_query(fields, bucket, agg, start, end, max_points, tail)
     try:
-        stats = cyperf_service.get_client_stats(test_id)
+        stats = await async_service.get_client_stats(test_id, since, stats_format, query)
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
+@router.post("/stats/batch", tags=["Stats"])
+async def get_stats_batch(request: StatsBatchRequest):
+    """
+    Get the stats of many tests in one call
+
+    Items are grouped by agent so each agent is contacted once per batch, over
+    one pooled connection, and agents are read in parallel. Results come back
+    in request order as `{"test_id", "role", "stats"}`, or with `error` in
+    place of `stats` for items that could not be read.
+    """
+    if request.format not in ("rows", "columnar"):
+        raise HTTPException(status_code=400, detail="format must be rows or columnar")
+    if any(item.role not in ("server", "client") for item in request.items):
+        raise HTTPException(status_code=400, detail="role must be server or client")
+    if any(item.tail is not None and item.tail < 1 for item in request.items):
+        raise HTTPException(status_code=400, detail="tail must be positive")
+    try:
+        results = await async_service.batch_stats([item.dict() for item in request.items], request.format)
+        return {"results": results}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/stats/stream/{test_id}", tags=["Stats"])
+async def stream_stats(test_id: str, request: Request):
+    """
+    Stream server and client CSV rows as Server-Sent Events
+
+    One remote `tail -F` per agent is shared by all subscribers of a test.
+    Each event is named after its role (`server` or `client`) and carries the
+    row as JSON; an `error` event is sent if a remote tail fails. An `end`
+    event closes the stream once the test's cyperf processes have exited or
+    the test was stopped.
+    """
+    subscription = cyperf_service.stats_stream.subscribe(
+        test_id, cyperf_service.stats_sources(test_id)
+    )
+
+    async def event_source():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(subscription.queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                if "end" in event:
+                    yield "event: end\ndata: {}\n\n"
+                    break
+                if "error" in event:
+                    yield f"event: error\ndata: {json.dumps(event)}\n\n"
+                else:
+                    yield f"event: {event['role']}\ndata: {json.dumps(event['row'])}\n\n"
+        finally:
+            cyperf_service.stats_stream.unsubscribe(subscription)
+
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 @router.post("/stop_server", tags=["Cyperf CE Server"])
 async def stop_server(request: StopServerRequest):
     """
@@ -68,62 +185,239 @@ async def stop_server(request: StopServerRequest):
         Dictionary with cleanup results and server_ip
     """
     try:
-        result = cyperf_service.stop_server(request.server_ip)
+        result = await async_service.stop_server(request.server_ip)
         return result
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/tests", tags=["Cyperf CE Tests"])
+async def list_tests(host: Optional[str] = None, status: Optional[str] = None):
+    """
+    List started tests, optionally only those with a server or client on
+    `host` and/or in `status` (SERVER_RUNNING, RUNNING, STOPPED, ...)
+    """
+    return _public_records(cyperf_service.active_tests.find(host=host, status=status))
+
+@router.post("/stop_test/{test_id}", tags=["Cyperf CE Tests"])
+async def stop_test(test_id: str, timeout: Optional[float] = None):
+    """
+    Stop only the server and client processes started for this test
+
+    Sends SIGINT so cyperf writes its final CSV row, then SIGKILL if a process
+    is still running after `timeout` seconds. Other tests on the same agents
+    are left running.
+    """
+    if test_id not in cyperf_service.active_tests:
+        raise HTTPException(status_code=404, detail=f"Unknown test_id: {test_id}")
+    try:
+        return await async_service.stop_test(test_id, timeout)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tests/search", tags=["Cyperf CE Tests"])
+async def search_tests(host: Optional[str] = None, status: Optional[str] = None,
+                       since: Optional[str] = None, until: Optional[str] = None, limit: int = 100):
+    """
+    Find past and running tests by agent, status and start time (epoch or
+    ISO-8601 `since`/`until`), newest first, with their archived summaries
+    """
+    bounds = []
+    for label, value in (("since", since), ("until", until)):
+        parsed = parse_timestamp(value) if value else None
+        if parsed is not None and math.isnan(parsed):
+            raise HTTPException(status_code=400, detail=f"Invalid {label} timestamp: {value}")
+        bounds.append(parsed)
+    records = cyperf_service.active_tests.find(host=host, status=status, since=bounds[0], until=bounds[1], limit=limit)
+    return _public_records(records)
+
+@router.get("/tests/compare", tags=["Cyperf CE Tests"])
+async def compare_tests(ids: str, metric: Optional[str] = None, role: str = "client"):
+    """
+    Compare archived tests: each test's stored summary (count, sum, min, max,
+    mean and p50/p90/p95/p99) of every ALLOWED_KEYS metric, or only `metric`,
+    plus the number of rows summarized. With `metric`, `mean_change_pct` is
+    relative to the first id; tests that are not archived are listed in `missing`.
+    """
+    if metric is not None and metric not in cyperf_service.METRIC_KEYS:
+        raise HTTPException(status_code=400, detail=f"metric must be one of {', '.join(cyperf_service.METRIC_KEYS)}")
+    if role not in ("server", "client"):
+        raise HTTPException(status_code=400, detail="role must be server or client")
+    test_ids = [test_id.strip() for test_id in ids.split(",") if test_id.strip()]
+    try:
+        return await async_service.compare_tests(test_ids, metric, role)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/tests/{test_id}/summary", tags=["Cyperf CE Tests"])
+async def get_test_summary(test_id: str):
+    """
+    Running aggregates of every ALLOWED_KEYS metric per role ({"rows", "metrics"}):
+    count, sum, min, max, mean and p50/p90/p95/p99 (streaming t-digest
+    estimates), updated as new rows are read. Archived tests return their
+    stored final summary.
+    """
+    try:
+        return await async_service.live_summary(test_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/tests/{test_id}/archive", tags=["Cyperf CE Tests"])
+async def archive_test(test_id: str):
+    """
+    Copy a finished test's CSVs and logs into the local archive
+
+    Tests are archived automatically when they are stopped or their client
+    exits on its own; use this to retry a failed archive. Running tests are
+    rejected with 409. Afterwards stats, logs and images for the test
+    are served from the controller without SSH.
+    """
+    test = cyperf_service.active_tests.get(test_id)
+    if test is None:
+        raise HTTPException(status_code=404, detail=f"Unknown test_id: {test_id}")
+    if test.get("status") in cyperf_service.ACTIVE_STATUSES:
+        raise HTTPException(status_code=409, detail=f"Test {test_id} is still {test['status']}; stop it first")
+    try:
+        return {"test_id": test_id, "archived": await async_service.harvest(test_id)}
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/test_groups", tags=["Cyperf CE Tests"], response_model=TestGroupResponse)
+async def start_test_group(request: TestGroupRequest):
+    """
+    Start a group of servers and clients across agents
+
+    All servers are launched concurrently, then all clients. Each member gets
+    its own test_id (`{group_id}-s{n}` / `{group_id}-c{n}`) usable with the
+    per-test endpoints.
+    """
+    if not request.servers or not request.clients:
+        raise HTTPException(status_code=400, detail="A test group needs at least one server and one client")
+    try:
+        group = await test_groups.start_group(
+            [{"server_ip": s.server_ip, "params": s.params.dict()} for s in request.servers],
+            [{"client_ip": c.client_ip, "server_ip": c.server_ip, "params": c.params.dict()} for c in request.clients],
+        )
+        return TestGroupResponse(**group)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/test_groups/{group_id}", tags=["Cyperf CE Tests"], response_model=TestGroupResponse)
+async def get_test_group(group_id: str):
+    try:
+        return TestGroupResponse(**test_groups.get_group(group_id))
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown group_id: {group_id}")
+
+@router.get("/test_groups/{group_id}/stats", tags=["Cyperf CE Tests"])
+async def get_test_group_stats(group_id: str, role: str = "client", align: str = "index"):
+    """
+    Aggregated stats across group members
+
+    Metrics are summed per interval (latency is averaged). `align=index` pairs
+    the n-th row of each member; `align=timestamp` groups equal Timestamps.
+    """
+    if role not in ("client", "server") or align not in ("index", "timestamp"):
+        raise HTTPException(status_code=400, detail="role must be client|server and align index|timestamp")
+    try:
+        return await test_groups.aggregated_stats(group_id, role, align)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown group_id: {group_id}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/test_groups/{group_id}/stop", tags=["Cyperf CE Tests"])
+async def stop_test_group(group_id: str, timeout: Optional[float] = None):
+    try:
+        return await test_groups.stop_group(group_id, timeout)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Unknown group_id: {group_id}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+def _image_response(request: Request, etag: str, image: bytes) -> Response:
+    """PNG response with an ETag, or 304 when the client already has this image"""
+    headers = {"ETag": f'"{etag}"', "Cache-Control": "no-cache"}
+    if_none_match = request.headers.get("if-none-match", "")
+    if etag in [tag.strip().strip('"').removeprefix("W/").strip('"') for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=image, media_type="image/png", headers=headers)
+
 @router.get("/server/stats_image/{test_id}", tags=["Cyperf CE Server"])
-async def get_server_stats_image(test_id: str):
+async def get_server_stats_image(test_id: str, request: Request, mode: str = "table",
+                                 page: Optional[int] = None):
+    """
+    Render server stats as a PNG: `mode=table` shows one page of rows (the
+    latest by default, or `page`), `mode=chart` plots throughput and
+    connection rate over time. Supports ETag / If-None-Match.
+    """
+    if mode not in ("table", "chart"):
+        raise HTTPException(status_code=400, detail="mode must be table or chart")
     try:
-        stats = cyperf_service.get_server_stats(test_id)
-        img_bytes = cyperf_service.stats_to_image(stats)
-        return StreamingResponse(img_bytes, media_type="image/png")
+        etag, image = await async_service.get_stats_image(test_id, "server", mode, page)
+        return _image_response(request, etag, image)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/client/stats_image/{test_id}", tags=["Cyperf CE Client"])
-async def get_client_stats_image(test_id: str):
+async def get_client_stats_image(test_id: str, request: Request, mode: str = "table",
+                                 page: Optional[int] = None):
+    """
+    Render client stats as a PNG: `mode=table` shows one page of rows (the
+    latest by default, or `page`), `mode=chart` plots throughput and
+    connection rate over time. Supports ETag / If-None-Match.
+    """
+    if mode not in ("table", "chart"):
+        raise HTTPException(status_code=400, detail="mode must be table or chart")
+    try:
+        etag, image = await async_service.get_stats_image(test_id, "client", mode, page)
+        return _image_response(request, etag, image)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _log_response(test_id: str, role: str, log_format: str, offset, limit, tail, level, grep):
+    """Stream the selected log lines as JSON ({..., "content"}) or plain text"""
+    if log_format not in ("json", "text"):
+        raise HTTPException(status_code=400, detail="format must be json or text")
+    try:
+        query = LogQuery.from_params(offset, limit, tail, level, grep)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     try:
-        stats = cyperf_service.get_client_stats(test_id)
-        img_bytes = cyperf_service.stats_to_image(stats)
-        return StreamingResponse(img_bytes, media_type="image/png")
+        chunks = await async_service.open_log(test_id, role, query)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    if log_format == "text":
+        return StreamingResponse(chunks, media_type="text/plain; charset=utf-8")
+    fields = {"test_id": test_id, "log_type": role, "log_file": f"{test_id}_{role}.log"}
+    return StreamingResponse(json_log_stream(fields, chunks), media_type="application/json")
 
 @router.get("/server/logs/{test_id}", tags=["Cyperf CE Server"])
-async def get_server_logs(test_id: str):
+async def get_server_logs(test_id: str, offset: Optional[int] = None, limit: Optional[int] = None,
+                          tail: Optional[int] = None, level: Optional[str] = None,
+                          grep: Optional[str] = None, log_format: str = Query("json", alias="format")):
     """
     Get server log file contents for debugging
     Returns the contents of {test_id}_server.log file
+
+    `level` (e.g. `error,warning`) and `grep` (extended regex) filter lines on
+    the agent; `tail` or `offset`/`limit` then page through the matching
+    lines. The response is streamed; `format=text` returns the raw lines.
     """
-    try:
-        logs = cyperf_service.read_server_logs(test_id)
-        return {
-            "test_id": test_id,
-            "log_type": "server",
-            "log_file": f"{test_id}_server.log",
-            "content": logs
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _log_response(test_id, "server", log_format, offset, limit, tail, level, grep)
 
 @router.get("/client/logs/{test_id}", tags=["Cyperf CE Client"])
-async def get_client_logs(test_id: str):
+async def get_client_logs(test_id: str, offset: Optional[int] = None, limit: Optional[int] = None,
+                          tail: Optional[int] = None, level: Optional[str] = None,
+                          grep: Optional[str] = None, log_format: str = Query("json", alias="format")):
     """
     Get client log file contents for debugging
     Returns the contents of {test_id}_client.log file
+
+    `level` (e.g. `error,warning`) and `grep` (extended regex) filter lines on
+    the agent; `tail` or `offset`/`limit` then page through the matching
+    lines. The response is streamed; `format=text` returns the raw lines.
     """
-    try:
-        logs = cyperf_service.read_client_logs(test_id)
-        return {
-            "test_id": test_id,
-            "log_type": "client", 
-            "log_file": f"{test_id}_client.log",
-            "content": logs
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+    return await _log_response(test_id, "client", log_format, offset, limit, tail, level, grep)
 
 
 # MCP HTTP Endpoint for Streamable HTTP
@@ -8,7 +8,40 @@ class Settings(BaseSettings):
     SSH_KEY_PATH: str
     SSH_PASSWORD: Optional[str] = None
 
+    # Seconds to wait for a launched cyperf to record its PID and start listening
+    CYPERF_START_TIMEOUT: float = 10.0
+    # Seconds to wait after SIGINT before a stopping cyperf is killed
+    CYPERF_STOP_TIMEOUT: float = 5.0
+    # Seconds between checks whether a client past its `time` has exited (it is then archived)
+    CYPERF_FINISH_POLL_INTERVAL: float = 5.0
+
+    # SSH connection pool
+    SSH_KEEPALIVE_INTERVAL: int = 30
+    SSH_POOL_IDLE_TIMEOUT: int = 300
+    SSH_POOL_MAX_SESSIONS: int = 8
+    SSH_POOL_MAX_CONNECTIONS: int = 64
+    SSH_POOL_MAX_DEDICATED: int = 8
+
+    # Worker threads running blocking service calls, and the per-agent cap
+    SERVICE_MAX_WORKERS: int = 32
+    SERVICE_PER_HOST_CONCURRENCY: int = 4
+
+    # Stats image rendering (worker processes, seconds per render, rows per table page)
+    STATS_RENDER_WORKERS: int = 2
+    STATS_RENDER_TIMEOUT: float = 10.0
+    STATS_IMAGE_TABLE_ROWS: int = 40
+    # Memory budget of the rendered stats image cache
+    STATS_IMAGE_CACHE_BYTES: int = 64 * 1024 * 1024
+
+    # SQLite file persisting started tests across restarts (empty: memory only)
+    REGISTRY_DB_PATH: str = ""
+
+    # Local directory finished tests' stats and logs are archived to (empty: disabled)
+    STATS_ARCHIVE_DIR: str = ""
+
     class Config:
         env_file = ".env"
+        # .env is shared with docker compose, which defines variables of its own
+        extra = "ignore"
 
 settings = Settings()
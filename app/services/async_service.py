@@ -0,0 +1,135 @@
+"""
+Async facade over CyperfService.
+
+CyperfService is synchronous (paramiko, SFTP, sleeps, rendering). Calling it
+directly from `async def` handlers blocks the event loop, so one slow agent
+stalls every other request. AsyncCyperfService runs each call on a bounded
+thread pool and caps concurrent calls per agent, so requests for different
+hosts proceed in parallel and an unreachable host can only tie up its own
+slots.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from app.services.cyperf_service import CyperfService
+from app.services.log_query import LogQuery
+from app.services.stats_query import StatsQuery
+
+
+class AsyncCyperfService:
+    """Runs CyperfService calls off the event loop with per-host limits"""
+
+    def __init__(self, service: CyperfService, max_workers: int = 32, per_host_limit: int = 4):
+        """
+        Args:
+            service: The synchronous service to wrap
+            max_workers: Size of the shared worker thread pool
+            per_host_limit: Maximum concurrent calls against a single agent
+        """
+        self.service = service
+        self.per_host_limit = per_host_limit
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cyperf")
+        self._host_limits: Dict[str, asyncio.Semaphore] = {}
+
+    def _host_limit(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_limits:
+            self._host_limits[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_limits[host]
+
+    async def run(self, host: Union[None, str, Iterable[str]], fn: Callable, *args, **kwargs) -> Any:
+        """
+        Run fn(*args, **kwargs) on the worker pool
+
+        Args:
+            host: Agent the call talks to, the agents of a call that talks to
+                  several (a slot is taken on each), or None for host-independent work
+        """
+        loop = asyncio.get_running_loop()
+        call = functools.partial(fn, *args, **kwargs)
+        hosts = [] if host is None else [host] if isinstance(host, str) else sorted(set(host))
+        async with AsyncExitStack() as slots:
+            # Always acquired in sorted order, so two multi-host calls cannot deadlock
+            for name in hosts:
+                await slots.enter_async_context(self._host_limit(name))
+            return await loop.run_in_executor(self._executor, call)
+
+    def _test_hosts(self, test_id: str) -> list:
+        """Agents of the server and client of a test"""
+        return [self.service.host_for(test_id, role) for role in ("server", "client")]
+
+    def shutdown(self):
+        """Drop queued calls, then shut the wrapped service down (calls already running are not waited for)"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self.service.shutdown()
+
+    async def start_server(self, test_id: str, server_ip: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.run(server_ip, self.service.start_server, test_id, server_ip, params)
+
+    async def start_client(self, test_id: str, server_ip: str, client_ip: str,
+                           params: Dict[str, Any]) -> Dict[str, Any]:
+        return await self.run(client_ip, self.service.start_client, test_id, server_ip, client_ip, params)
+
+    async def stop_server(self, server_ip: str) -> Dict[str, Any]:
+        return await self.run(server_ip, self.service.stop_server, server_ip)
+
+    async def stop_test(self, test_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        return await self.run(self._test_hosts(test_id), self.service.stop_test, test_id, timeout)
+
+    async def harvest(self, test_id: str) -> Dict[str, list]:
+        return await self.run(self._test_hosts(test_id), self.service.harvest, test_id)
+
+    async def live_summary(self, test_id: str) -> Dict[str, Any]:
+        return await self.run(self._test_hosts(test_id), self.service.live_summary, test_id)
+
+    async def compare_tests(self, test_ids: list, metric: Optional[str] = None, role: str = "client"):
+        return await self.run(None, self.service.compare_tests, test_ids, metric, role)
+
+    async def get_server_stats(self, test_id: str, since: Optional[str] = None, format: str = "rows",
+                               query: Optional[StatsQuery] = None):
+        host = self.service.host_for(test_id, "server")
+        return await self.run(host, self.service.get_server_stats, test_id, since, format, query)
+
+    async def get_client_stats(self, test_id: str, since: Optional[str] = None, format: str = "rows",
+                               query: Optional[StatsQuery] = None):
+        host = self.service.host_for(test_id, "client")
+        return await self.run(host, self.service.get_client_stats, test_id, since, format, query)
+
+    async def batch_stats(self, items: list, format: str = "rows") -> list:
+        """Read many (test_id, role, since, tail) items with one call per agent, all agents in parallel"""
+        by_host: Dict[str, list] = {}
+        for index, item in enumerate(items):
+            by_host.setdefault(self.service.host_for(item["test_id"], item["role"]), []).append(index)
+
+        results: list = [None] * len(items)
+
+        async def read_host(host: str, indices: list):
+            group = await self.run(host, self.service.batch_stats, host, [items[i] for i in indices], format)
+            for index, result in zip(indices, group):
+                results[index] = result
+
+        await asyncio.gather(*(read_host(host, indices) for host, indices in by_host.items()))
+        return results
+
+    async def read_server_logs(self, test_id: str) -> str:
+        host = self.service.host_for(test_id, "server")
+        return await self.run(host, self.service.read_server_logs, test_id)
+
+    async def read_client_logs(self, test_id: str) -> str:
+        host = self.service.host_for(test_id, "client")
+        return await self.run(host, self.service.read_client_logs, test_id)
+
+    async def open_log(self, test_id: str, role: str, query: Optional[LogQuery] = None) -> Iterator[bytes]:
+        host = self.service.host_for(test_id, role)
+        return await self.run(host, self.service.open_log, test_id, role, query)
+
+    async def get_stats_image(self, test_id: str, role: str, mode: str = "table",
+                              page: Optional[int] = None) -> Tuple[str, bytes]:
+        host = self.service.host_for(test_id, role)
+        return await self.run(host, self.service.get_stats_image, test_id, role, mode, page)
+
+    async def stats_to_image(self, stats: list, mode: str = "table", page: Optional[int] = None):
+        return await self.run(None, self.service.stats_to_image, stats, mode, page)
@@ -1,25 +1,148 @@
 import paramiko
-from typing import Dict, Any
+from contextlib import ExitStack
+from typing import Dict, Any, Iterator, Optional, Tuple
 from app.core.config import settings
 import re
-import csv
-import pandas as pd
-import matplotlib.pyplot as plt
 from io import BytesIO
+import threading
+import shlex
+import tarfile
 import time
+from app.services.ssh_pool import SSHConnectionPool
+from app.services.stats_reader import IncrementalCSVReader
+from app.services.stats_model import StatsTable, table_from_csv
+from app.services.stats_query import StatsQuery, run_query, columns_to_rows
+from app.services.stats_stream import StatsStreamHub
+from app.services.stats_render import StatsImageRenderer
+from app.services.image_cache import ImageCache, image_key
+from app.services.test_registry import TestRegistry
+from app.services.registry_store import RegistryStore
+from app.services.stats_archive import StatsArchive
+from app.services.running_stats import RunningSummary
+from app.services.log_query import LOG_CHUNK_SIZE, LogQuery, chunk_lines
 
 class CyperfService:
     def __init__(self):
-        self.active_tests: Dict[str, Dict[str, Any]] = {}
+        self.active_tests = TestRegistry(
+            RegistryStore(settings.REGISTRY_DB_PATH) if settings.REGISTRY_DB_PATH else None
+        )
+        # Parsed key material and the auth strategy that last worked per host
+        self._private_key = None
+        self._auth_strategy_cache: Dict[str, str] = {}
+        self._auth_lock = threading.Lock()
+        # Timers checking whether running clients have exited on their own
+        self._finish_timers: Dict[str, threading.Timer] = {}
+        self._finish_lock = threading.Lock()
+        self.stats_reader = IncrementalCSVReader(self.METRIC_KEYS)
+        self.stats_stream = StatsStreamHub(self._ssh_dedicated)
+        self.image_renderer = StatsImageRenderer(
+            workers=settings.STATS_RENDER_WORKERS,
+            timeout=settings.STATS_RENDER_TIMEOUT,
+            table_rows=settings.STATS_IMAGE_TABLE_ROWS,
+        )
+        self.image_cache = ImageCache(settings.STATS_IMAGE_CACHE_BYTES)
+        self.stats_archive = StatsArchive(settings.STATS_ARCHIVE_DIR) if settings.STATS_ARCHIVE_DIR else None
+        self.ssh_pool = SSHConnectionPool(
+            self._connect_ssh,
+            keepalive_interval=settings.SSH_KEEPALIVE_INTERVAL,
+            idle_timeout=settings.SSH_POOL_IDLE_TIMEOUT,
+            max_sessions=settings.SSH_POOL_MAX_SESSIONS,
+            max_connections=settings.SSH_POOL_MAX_CONNECTIONS,
+            max_dedicated=settings.SSH_POOL_MAX_DEDICATED,
+        )
+        if not settings.SSH_PASSWORD:
+            # Load the key at startup; failures are reported again on connect
+            try:
+                self._get_private_key()
+            except Exception as e:
+                print(f"Warning: SSH key not loaded at startup: {e}")
 
     def _escape_shell_arg(self, arg: str) -> str:
         """Escape special characters in shell arguments"""
         # Replace single quotes with '\'' pattern for safe shell execution
         return arg.replace("'", "'\"'\"'")
 
-    def _connect_ssh(self, hostname: str):
+    # Seconds between remote checks while waiting for cyperf to start
+    START_POLL_INTERVAL = 0.05
+    # cyperf's run time when the client is started without `time`
+    DEFAULT_TEST_TIME = 10
+    # Statuses of a test whose processes may still be running
+    ACTIVE_STATUSES = ("STARTING", "SERVER_RUNNING", "RUNNING")
+
+    # Key-based authentication strategies, tried in this order for unknown hosts
+    AUTH_STRATEGIES = ["look_for_keys", "key_filename", "pkey"]
+
+    def _load_private_key(self):
+        """Validate the configured key file and parse it once"""
         import os
-        
+        from io import StringIO
+
+        # Strip any quotes from the key path (common configuration error)
+        key_path = settings.SSH_KEY_PATH.strip().strip('"').strip("'")
+
+        # Validate the key path
+        if not os.path.exists(key_path):
+            raise FileNotFoundError(
+                f"SSH key file not found: {key_path} (original: {settings.SSH_KEY_PATH})"
+            )
+        if os.path.isdir(key_path):
+            raise IsADirectoryError(
+                f"SSH_KEY_PATH points to a directory, not a file: {key_path}. "
+                f"This usually happens when Docker volume mount fails. "
+                f"Check your .env file: SSH_KEY_HOST_PATH should point to the actual key file."
+            )
+
+        # Check file permissions
+        stat_info = os.stat(key_path)
+        perms = oct(stat_info.st_mode)[-3:]
+        print(f"Key file permissions: {perms}")
+
+        # Fix permissions if they're not secure enough
+        if perms != '600' and perms != '400':
+            try:
+                os.chmod(key_path, 0o600)
+                print(f"Changed key file permissions to 600")
+            except Exception as chmod_error:
+                print(f"Warning: Could not change permissions: {chmod_error}")
+
+        with open(key_path, 'r') as f:
+            key_content = f.read()
+        first_line = key_content.split('\n')[0].strip()
+        print(f"Loaded SSH key {key_path} ({first_line})")
+
+        # Parse the key once so connections can reuse the PKey object
+        pkey = None
+        for key_class in (paramiko.RSAKey, paramiko.Ed25519Key, paramiko.ECDSAKey):
+            try:
+                pkey = key_class.from_private_key(StringIO(key_content))
+                break
+            except Exception:
+                continue
+        if pkey is None:
+            print("Warning: Could not parse SSH key, only key_filename strategies will be used")
+
+        return key_path, pkey
+
+    def _get_private_key(self):
+        """Return (key_path, pkey), loading the key file on first use"""
+        with self._auth_lock:
+            if self._private_key is None:
+                self._private_key = self._load_private_key()
+            return self._private_key
+
+    def _auth_kwargs(self, strategy: str, key_path: str, pkey) -> Dict[str, Any]:
+        """Build paramiko connect() arguments for a key-based strategy"""
+        if strategy == "look_for_keys":
+            return {"key_filename": key_path, "look_for_keys": True, "allow_agent": True}
+        if strategy == "key_filename":
+            return {"key_filename": key_path, "look_for_keys": False, "allow_agent": False}
+        if strategy == "pkey":
+            if pkey is None:
+                raise paramiko.SSHException("SSH key could not be parsed")
+            return {"pkey": pkey, "look_for_keys": False, "allow_agent": False}
+        raise ValueError(f"Unknown SSH auth strategy: {strategy}")
+
+    def _connect_ssh(self, hostname: str):
         ssh = paramiko.SSHClient()
         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
         
@@ -33,113 +156,40 @@ class CyperfService:
                     timeout=10
                 )
             else:
-                # Strip any quotes from the key path (common configuration error)
-                key_path = settings.SSH_KEY_PATH.strip().strip('"').strip("'")
-                
-                print(f"Connecting to {hostname} with key: {key_path}")
-                
-                # Validate the key path
-                if not os.path.exists(key_path):
-                    raise FileNotFoundError(
-                        f"SSH key file not found: {key_path} (original: {settings.SSH_KEY_PATH})"
-                    )
-                if os.path.isdir(key_path):
-                    raise IsADirectoryError(
-                        f"SSH_KEY_PATH points to a directory, not a file: {key_path}. "
-                        f"This usually happens when Docker volume mount fails. "
-                        f"Check your .env file: SSH_KEY_HOST_PATH should point to the actual key file."
-                    )
+                key_path, pkey = self._get_private_key()
                 
-                # Check file permissions
-                stat_info = os.stat(key_path)
-                perms = oct(stat_info.st_mode)[-3:]
-                print(f"Key file permissions: {perms}")
+                # Go straight to the strategy that worked last time for this host
+                cached = self._auth_strategy_cache.get(hostname)
+                strategies = list(self.AUTH_STRATEGIES)
+                if cached:
+                    strategies.remove(cached)
+                    strategies.insert(0, cached)
                 
-                # Fix permissions if they're not secure enough
-                if perms != '600' and perms != '400':
-                    try:
-                        os.chmod(key_path, 0o600)
-                        print(f"Changed key file permissions to 600")
-                    except Exception as chmod_error:
-                        print(f"Warning: Could not change permissions: {chmod_error}")
-                
-                # Read and show key details
-                import hashlib
-                with open(key_path, 'r') as f:
-                    key_content = f.read()
-                    first_line = key_content.split('\n')[0].strip()
-                    print(f"Key format: {first_line}")
-                    print(f"Key file size: {len(key_content)} bytes")
-                    # Show checksum for verification
-                    key_hash = hashlib.md5(key_content.encode()).hexdigest()
-                    print(f"Key MD5 checksum: {key_hash}")
-                    # Show last few characters to verify it's complete
-                    last_line = key_content.strip().split('\n')[-1]
-                    print(f"Key ends with: {last_line}")
-                
-                # Try multiple approaches that worked in testing
+                print(f"Connecting to {hostname} with key: {key_path}")
                 connected = False
                 last_error = None
                 
-                # Approach 1: key_filename with look_for_keys=True (Approach 4 from test)
-                if not connected:
-                    try:
-                        print("Trying Approach 1: key_filename with look_for_keys=True")
-                        ssh.connect(
-                            hostname=hostname,
-                            username=settings.SSH_USERNAME,
-                            key_filename=key_path,
-                            look_for_keys=True,
-                            allow_agent=True,
-                            timeout=15
-                        )
-                        print(f"✓ Successfully connected using Approach 1")
-                        connected = True
-                    except Exception as e:
-                        last_error = e
-                        print(f"Approach 1 failed: {e}")
-                
-                # Approach 2: key_filename with look_for_keys=False (Approach 2 from test)
-                if not connected:
+                for strategy in strategies:
                     try:
-                        print("Trying Approach 2: key_filename with look_for_keys=False")
-                        ssh = paramiko.SSHClient()
-                        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+                        print(f"Trying strategy: {strategy}")
                         ssh.connect(
                             hostname=hostname,
                             username=settings.SSH_USERNAME,
-                            key_filename=key_path,
-                            look_for_keys=False,
-                            allow_agent=False,
-                            timeout=15
+                            timeout=15,
+                            **self._auth_kwargs(strategy, key_path, pkey)
                         )
-                        print(f"✓ Successfully connected using Approach 2")
+                        print(f"✓ Successfully connected using {strategy}")
+                        self._auth_strategy_cache[hostname] = strategy
                         connected = True
+                        break
                     except Exception as e:
                         last_error = e
-                        print(f"Approach 2 failed: {e}")
-                
-                # Approach 3: Direct pkey loading (Approach 1 from test)
-                if not connected:
-                    try:
-                        print("Trying Approach 3: Direct RSAKey loading")
+                        print(f"Strategy {strategy} failed: {e}")
+                        if strategy == cached:
+                            self._auth_strategy_cache.pop(hostname, None)
+                        ssh.close()
                         ssh = paramiko.SSHClient()
                         ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                        from io import StringIO
-                        pkey = paramiko.RSAKey.from_private_key(StringIO(key_content))
-                        ssh.connect(
-                            hostname=hostname,
-                            username=settings.SSH_USERNAME,
-                            pkey=pkey,
-                            look_for_keys=False,
-                            allow_agent=False,
-                            timeout=15
-                        )
-                        print(f"✓ Successfully connected using Approach 3")
-                        connected = True
-                    except Exception as e:
-                        last_error = e
-                        print(f"Approach 3 failed: {e}")
                 
                 if not connected:
                     raise Exception(f"All connection approaches failed. Last error: {last_error}")
@@ -152,6 +202,96 @@ class CyperfService:
         
         return ssh
 
+    def _ssh(self, hostname: str):
+        """Borrow a pooled, authenticated SSH connection to hostname"""
+        auth_method = "password" if settings.SSH_PASSWORD else "key"
+        return self.ssh_pool.session(hostname, settings.SSH_USERNAME, auth_method)
+
+    def _ssh_dedicated(self, hostname: str):
+        """Open a private SSH connection to hostname for a long-lived stream"""
+        return self.ssh_pool.dedicated(hostname)
+
+    def _exec(self, ssh: paramiko.SSHClient, command: str) -> str:
+        """Run a command on a pooled connection and wait for it to finish"""
+        _, stdout, _ = ssh.exec_command(command)
+        output = stdout.read().decode()
+        stdout.channel.recv_exit_status()
+        return output
+
+    def _launch_command(self, cyperf_cmd: str, pid_file: str, log_file: str) -> Tuple[str, str]:
+        """
+        Build the remote command that starts cyperf in the background
+
+        The command runs under `sh -c 'echo $$ > pid_file; exec cyperf ...'` so the
+        PID written is that of cyperf itself, not of sudo or a wrapper shell.
+
+        Returns:
+            (command, printable command with the sudo password redacted)
+        """
+        script = shlex.quote(f"echo $$ > {pid_file}; exec {cyperf_cmd}")
+        if settings.SSH_PASSWORD:
+            # Pipe password into sudo command with nohup and backgrounding
+            sudo_cmd = f"echo {shlex.quote(settings.SSH_PASSWORD)} | sudo -S sh -c {script}"
+            redacted = f"echo '[REDACTED]' | sudo -S sh -c {script}"
+            command = f"nohup bash -c {shlex.quote(sudo_cmd)} > {log_file} 2>&1 &"
+            printable = f"nohup bash -c {shlex.quote(redacted)} > {log_file} 2>&1 &"
+        else:
+            # If using SSH key auth, user might have passwordless sudo configured
+            command = f"nohup sudo sh -c {script} > {log_file} 2>&1 &"
+            printable = command
+        return command, printable
+
+    def _launch(self, ssh: paramiko.SSHClient, command: str, pid_file: str, log_file: str,
+                port: Optional[int] = None) -> Optional[int]:
+        """
+        Run a launch command and wait until cyperf is up
+
+        Waits (bounded by CYPERF_START_TIMEOUT) for the pidfile to appear and, when
+        a port is given, for a listening TCP socket on it. Everything runs as one
+        remote script so the wait costs no extra round trips.
+
+        Returns:
+            PID of the cyperf process, or None if it could not be determined
+
+        Raises:
+            Exception: If cyperf exits before it becomes ready
+        """
+        polls = max(1, int(settings.CYPERF_START_TIMEOUT / self.START_POLL_INTERVAL))
+        script = (
+            f"rm -f {pid_file}; {command}\n"
+            f"i=0; while [ $i -lt {polls} ] && [ ! -s {pid_file} ]; do sleep {self.START_POLL_INTERVAL}; i=$((i+1)); done\n"
+            f"pid=$(cat {pid_file} 2>/dev/null); echo \"PID=$pid\"\n"
+        )
+        if port:
+            # Listening sockets in /proc/net/tcp*: local port in hex, state 0A
+            listen = f"':{int(port):04X} [0-9A-F]+:0000 0A'"
+            script += (
+                f"i=0; while [ $i -lt {polls} ]; do\n"
+                f"  if [ -n \"$pid\" ] && [ ! -d /proc/$pid ]; then echo EXITED; exit 0; fi\n"
+                f"  if grep -qE {listen} /proc/net/tcp /proc/net/tcp6 2>/dev/null; then echo READY; exit 0; fi\n"
+                f"  sleep {self.START_POLL_INTERVAL}; i=$((i+1))\n"
+                f"done\n"
+                f"echo TIMEOUT\n"
+            )
+        else:
+            script += "if [ -n \"$pid\" ] && [ ! -d /proc/$pid ]; then echo EXITED; else echo READY; fi\n"
+
+        output = self._exec(ssh, script)
+        pid = None
+        status = "TIMEOUT"
+        for line in output.splitlines():
+            line = line.strip()
+            if line.startswith("PID=") and line[4:].isdigit():
+                pid = int(line[4:])
+            elif line in ("READY", "EXITED", "TIMEOUT"):
+                status = line
+
+        if status == "EXITED":
+            raise Exception(f"cyperf exited during startup (pid {pid}), check {log_file}")
+        if status == "TIMEOUT" or pid is None:
+            print(f"Warning: cyperf not confirmed ready within {settings.CYPERF_START_TIMEOUT}s (pid {pid})")
+        return pid
+
     def start_server(self, test_id: str, server_ip: str, params: Dict[str, Any]) -> Dict[str, Any]:
         # Build the cyperf command with full path (without sudo, we'll add it in the wrapper)
         cyperf_cmd = "/usr/local/bin/cyperf -s --detailed-stats"
@@ -173,33 +313,23 @@ class CyperfService:
             cyperf_cmd += " --csv-stats"
         cyperf_cmd += f" {test_id}_server.csv"
         
-        # Pipe password into sudo command with nohup and backgrounding
-        if settings.SSH_PASSWORD:
-            escaped_pwd = self._escape_shell_arg(settings.SSH_PASSWORD)
-            command = f"nohup bash -c \"echo '{escaped_pwd}' | sudo -S {cyperf_cmd}\" > {test_id}_server.log 2>&1 &"
-            # Print command with redacted password for security
-            print(f"nohup bash -c \"echo '[REDACTED]' | sudo -S {cyperf_cmd}\" > {test_id}_server.log 2>&1 &")
-        else:
-            # If using SSH key auth, user might have passwordless sudo configured
-            command = f"nohup sudo {cyperf_cmd} > {test_id}_server.log 2>&1 &"
-            print(command)
-        ssh = self._connect_ssh(server_ip)
-        ssh.exec_command(command)
-        
-        # Give it a moment to start
-        time.sleep(1)
-        
-        find_cmd = "ps -ef | grep 'cyperf -s' | grep root | awk '{print $2}'"
-        _, stdout, _ = ssh.exec_command(find_cmd)
-        pids = stdout.read().decode().strip().split('\n')
-        server_pid = int(pids[0]) if pids and pids[0] else None
-        self.active_tests[test_id] = {
-            "server_pid": server_pid,
-            "command": command,
-            "server_csv_path": f"{test_id}_server.csv",
-            "server_ip": server_ip
-        }
-        ssh.close()
+        # Launch in the background; the wrapper records cyperf's own PID in a pidfile
+        command, printable = self._launch_command(cyperf_cmd, f"{test_id}_server.pid", f"{test_id}_server.log")
+        print(printable)
+        with self._ssh(server_ip) as ssh:
+            server_pid = self._launch(ssh, command, f"{test_id}_server.pid", f"{test_id}_server.log",
+                                      port=params.get("port") or 5202)
+        self.active_tests.register(
+            test_id,
+            server_pid=server_pid,
+            # Records are returned by the API, so only the redacted form is kept
+            command=printable,
+            server_csv_path=f"{test_id}_server.csv",
+            server_log_path=f"{test_id}_server.log",
+            server_ip=server_ip,
+            server_params=params,
+            status="SERVER_RUNNING",
+        )
         return {"server_pid": server_pid}
 
     def start_client(self, test_id: str, server_ip: str, client_ip: str, params: Dict[str, Any]) -> Dict[str, Any]:
@@ -241,38 +371,26 @@ class CyperfService:
             cyperf_cmd += " --csv-stats"
         cyperf_cmd += f" {test_id}_client.csv"
         
-        # Pipe password into sudo command with nohup and backgrounding
-        if settings.SSH_PASSWORD:
-            escaped_pwd = self._escape_shell_arg(settings.SSH_PASSWORD)
-            command = f"nohup bash -c \"echo '{escaped_pwd}' | sudo -S {cyperf_cmd}\" > {test_id}_client.log 2>&1 &"
-            # Print command with redacted password for security
-            print(f"nohup bash -c \"echo '[REDACTED]' | sudo -S {cyperf_cmd}\" > {test_id}_client.log 2>&1 &")
-        else:
-            # If using SSH key auth, user might have passwordless sudo configured
-            command = f"nohup sudo {cyperf_cmd} > {test_id}_client.log 2>&1 &"
-            print(command)    
-        ssh = self._connect_ssh(client_ip)
-        ssh.exec_command(command)
-        
-        # Give it a moment to start
-        time.sleep(1)
-        
-        find_cmd = "ps -ef | grep 'cyperf -c' | grep root | awk '{print $2}'"
-        _, stdout, _ = ssh.exec_command(find_cmd)
-        pids = stdout.read().decode().strip().split('\n')
-        client_pid = int(pids[0]) if pids and pids[0] else None
-        self.active_tests[test_id]["client_pid"] = client_pid
-        self.active_tests[test_id]["client_log_path"] = f"{test_id}_client.log"
-        self.active_tests[test_id]["client_csv_path"] = f"{test_id}_client.csv"
-        self.active_tests[test_id]["client_ip"] = client_ip
-        ssh.close()
+        # Launch in the background; the wrapper records cyperf's own PID in a pidfile
+        command, printable = self._launch_command(cyperf_cmd, f"{test_id}_client.pid", f"{test_id}_client.log")
+        print(printable)
+        with self._ssh(client_ip) as ssh:
+            client_pid = self._launch(ssh, command, f"{test_id}_client.pid", f"{test_id}_client.log")
+        self.active_tests.update(
+            test_id,
+            client_pid=client_pid,
+            client_log_path=f"{test_id}_client.log",
+            client_csv_path=f"{test_id}_client.csv",
+            client_ip=client_ip,
+            client_params=params,
+            status="RUNNING",
+        )
+        self._watch_finish(test_id, float(params.get("time") or self.DEFAULT_TEST_TIME))
         return {"client_pid": client_pid, 
-                "command": command, 
+                "command": printable, 
                 "client_csv_path": f"{test_id}_client.csv"}
 
     def stop_server(self, server_ip: str) -> Dict[str, Any]:
-        ssh = self._connect_ssh(server_ip)
-        
         # Build kill command with password piped in
         # Wrap entire command in a single sudo bash -c so password only needed once
         if settings.SSH_PASSWORD:
@@ -281,65 +399,484 @@ class CyperfService:
         else:
             kill_cmd = "sudo bash -c \"ps aux | grep -i '[c]yperf\|[s]erver' | awk '{print $2}' | xargs -r kill -9\""
         
-        ssh.exec_command(kill_cmd)
-        ssh.close()
-        return {"cyperf_server_pids_killed": "true", "server_ip": server_ip}
+        with self._ssh(server_ip) as ssh:
+            self._exec(ssh, kill_cmd)
+        result = {"cyperf_server_pids_killed": "true", "server_ip": server_ip}
+        # Every test served from this agent has ended with it
+        archived = {}
+        for test_id in self.active_tests.ids_for_host(server_ip):
+            test = self.active_tests.get(test_id)
+            if test and test.get("server_ip") == server_ip and test.get("status") in self.ACTIVE_STATUSES:
+                self._cancel_finish_watch(test_id)
+                archived[test_id] = self._mark_ended(test_id, "STOPPED")
+        if self.stats_archive is not None and archived:
+            result["archived"] = archived
+        return result
         
-    def get_server_stats(self, test_id: str):
-        # Read stats directly - will use fallback IP if test not in active_tests
-        output = self.read_server_csv_stats(test_id)
+    def _sudo_sh(self, script: str) -> str:
+        """Wrap a shell script so it runs as root, piping the sudo password if configured"""
+        if settings.SSH_PASSWORD:
+            return f"echo {shlex.quote(settings.SSH_PASSWORD)} | sudo -S sh -c {shlex.quote(script)}"
+        return f"sudo sh -c {shlex.quote(script)}"
+
+    @staticmethod
+    def _pids_script(find: str) -> str:
+        """Shell lines setting $pids to the cyperf processes printed by find, and an alive() check"""
+        return (
+            # Guard against PIDs that were reused by another program
+            f"pids=$(for p in $({find}); do grep -qs cyperf /proc/$p/comm && echo $p; done)\n"
+            # Exited-but-unreaped (zombie) processes count as stopped
+            f"alive() {{ for p in $pids; do [ -d /proc/$p ] && ! grep -q '^State:.*Z' /proc/$p/status 2>/dev/null && return 0; done; return 1; }}\n"
+        )
+
+    def _stop_processes(self, ssh: paramiko.SSHClient, find: str, timeout: float) -> str:
+        """
+        Stop cyperf processes: SIGINT so they flush their final CSV row, then
+        SIGKILL if any is still running after timeout seconds
+
+        Args:
+            find: Shell snippet printing the candidate PIDs
+
+        Returns:
+            'stopped', 'killed' or 'not_running'
+        """
+        polls = max(1, int(timeout / 0.1))
+        script = self._pids_script(find) + (
+            f"if [ -z \"$pids\" ] || ! alive; then echo not_running; exit 0; fi\n"
+            f"kill -INT $pids 2>/dev/null\n"
+            f"i=0; while alive && [ $i -lt {polls} ]; do sleep 0.1; i=$((i+1)); done\n"
+            f"if alive; then kill -KILL $pids 2>/dev/null; echo killed; else echo stopped; fi\n"
+        )
+        output = self._exec(ssh, self._sudo_sh(script)).strip().splitlines()
+        return output[-1] if output else "unknown"
+
+    def _find_processes(self, test_id: str, test: Dict[str, Any], role: str) -> str:
+        """Shell snippet printing the PID of a role's process: the recorded one, else found by test_id"""
+        pid = test.get(f"{role}_pid")
+        return f"echo {int(pid)}" if pid else self._find_by_test_id(test_id, role)
+
+    @staticmethod
+    def _find_by_test_id(test_id: str, role: str) -> str:
+        """Shell snippet printing the PIDs of the cyperf process writing test_id's CSV"""
+        escaped = re.sub(r"([.^$*+?()\[\]{}|\\])", r"\\\1", test_id)
+        # '[c]yperf' and '\.' keep the pattern from matching the shell running it
+        pattern = "[c]yperf .*" + escaped + f"_{role}" + r"\.csv"
+        return f"pgrep -f {shlex.quote(pattern)}"
+
+    def stop_test(self, test_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """
+        Stop only the cyperf processes of test_id (client first, then server)
+
+        Processes are found by their recorded PID, or by the test's CSV path in
+        their command line when no PID could be recorded at launch.
+
+        Args:
+            test_id: Test to stop
+            timeout: Seconds to wait after SIGINT before SIGKILL (default CYPERF_STOP_TIMEOUT)
+
+        Returns:
+            Per-role result: 'stopped', 'killed' or 'not_running'
+        """
+        if test_id not in self.active_tests:
+            raise Exception(f"Unknown test_id: {test_id}")
+        self._cancel_finish_watch(test_id)
+        return self._end_test(test_id, "STOPPED", settings.CYPERF_STOP_TIMEOUT if timeout is None else timeout)
+
+    def _end_test(self, test_id: str, status: str, timeout: float) -> Dict[str, Any]:
+        """Stop the test's remaining processes, then record its final status and archive it"""
+        test = self.active_tests.get(test_id)
+        result = {"test_id": test_id}
+        for role in ("client", "server"):
+            # Roles this test never launched (e.g. the server of a group client member)
+            if not test.get(f"{role}_ip") or not test.get(f"{role}_csv_path"):
+                continue
+            with self._ssh(test[f"{role}_ip"]) as ssh:
+                result[role] = self._stop_processes(ssh, self._find_processes(test_id, test, role), timeout)
+        archived = self._mark_ended(test_id, status)
+        if archived is not None:
+            result["archived"] = archived
+        return result
+
+    def _mark_ended(self, test_id: str, status: str):
+        """
+        Record that a test's processes are gone, end its streams and archive it
+
+        Returns:
+            The archived files, a 'failed: ...' message, or None if archiving is disabled
+        """
+        self.active_tests.update(test_id, status=status)
+        self.stats_stream.close(test_id)
+        try:
+            if self.stats_archive is None:
+                return None
+            return self.harvest(test_id)
+        except Exception as e:
+            print(f"Archiving {test_id} failed: {e}")
+            return f"failed: {e}"
+        finally:
+            # The parsed rows of an ended test are not kept, archived or not
+            self.stats_reader.forget(test_id)
+
+    def _watch_finish(self, test_id: str, delay: float):
+        """Check after delay seconds whether the client of test_id has exited on its own"""
+        timer = threading.Timer(delay, self._check_finished, args=(test_id,))
+        timer.daemon = True
+        with self._finish_lock:
+            previous = self._finish_timers.get(test_id)
+            self._finish_timers[test_id] = timer
+        if previous is not None:
+            previous.cancel()
+        timer.start()
+
+    def resume_finish_watches(self) -> int:
+        """
+        Watch the tests the registry still lists as RUNNING, e.g. after a controller restart
+
+        Each one is checked against its agent right away, so a test whose client
+        exited while the controller was down is finished and archived at once.
+
+        Returns:
+            The number of tests being watched
+        """
+        resumed = 0
+        for test_id in self.active_tests.ids_with_status("RUNNING"):
+            test = self.active_tests.get(test_id) or {}
+            if test.get("client_ip") and test.get("client_csv_path"):
+                self._watch_finish(test_id, 0)
+                resumed += 1
+        return resumed
+
+    def _cancel_finish_watch(self, test_id: str):
+        with self._finish_lock:
+            timer = self._finish_timers.pop(test_id, None)
+        if timer is not None:
+            timer.cancel()
+
+    def _check_finished(self, test_id: str):
+        """Timer callback: finish and archive the test if its client has exited, else check again later"""
+        with self._finish_lock:
+            if self._finish_timers.get(test_id) is not threading.current_thread():
+                return
+            del self._finish_timers[test_id]
+        test = self.active_tests.get(test_id)
+        if test is None or test.get("status") != "RUNNING":
+            return
+        try:
+            with self._ssh(test["client_ip"]) as ssh:
+                script = self._pids_script(self._find_processes(test_id, test, "client"))
+                running = self._exec(ssh, script + "if alive; then echo running; fi\n").strip() == "running"
+        except Exception as e:
+            print(f"Could not check whether {test_id} has finished: {e}")
+            running = True
+        if running:
+            self._watch_finish(test_id, settings.CYPERF_FINISH_POLL_INTERVAL)
+            return
+        print(f"Test {test_id} finished, stopping its server and archiving it")
+        try:
+            self._end_test(test_id, "FINISHED", settings.CYPERF_STOP_TIMEOUT)
+        except Exception as e:
+            print(f"Finishing {test_id} failed: {e}")
+
+    def is_archived(self, test_id: str, role: str) -> bool:
+        return self.stats_archive is not None and self.stats_archive.has(test_id, role)
+
+    def harvest(self, test_id: str) -> Dict[str, list]:
+        """
+        Copy a finished test's CSVs and logs from its agents into the local archive
+
+        Each agent sends its files once as a single gzip'd tar stream. Afterwards
+        stats, logs and images for the test are served without SSH.
+
+        Returns:
+            {role: [archived file names]}
+        """
+        if self.stats_archive is None:
+            raise Exception("The stats archive is disabled (STATS_ARCHIVE_DIR is empty)")
+        test = self.active_tests.get(test_id)
+        if test is None:
+            raise Exception(f"Unknown test_id: {test_id}")
+        if test.get("status") in self.ACTIVE_STATUSES:
+            raise Exception(f"Test {test_id} is still {test['status']}; stop it before archiving")
+
+        archived = {}
+        summary = {}
+        for role in ("server", "client"):
+            if not test.get(f"{role}_ip") or not test.get(f"{role}_csv_path"):
+                continue
+            csv_name, log_name = f"{test_id}_{role}.csv", f"{test_id}_{role}.log"
+            with self._ssh(test[f"{role}_ip"]) as ssh:
+                files = self._fetch_files(ssh, [csv_name, log_name])
+            csv_data = files.get(csv_name)
+            table = table_from_csv(csv_data) if csv_data is not None else None
+            self.stats_archive.store(test_id, role, csv_data, files.get(log_name), table)
+            if table is not None:
+                summary[role] = self._final_summary(test_id, role, table)
+            archived[role] = sorted(files)
+        self.active_tests.update(test_id, archived_at=time.time(), summary=summary)
+        self.stats_reader.forget(test_id)
+        return archived
+
+    def _final_summary(self, test_id: str, role: str, table: StatsTable) -> Dict[str, Any]:
+        """Summary of a finished table, reusing the running one when it already covers every row"""
+        running = self.stats_reader.summary(test_id, role)
+        if running is None or running.rows != len(table):
+            running = RunningSummary.of_table(table, self.METRIC_KEYS)
+        return running.to_dict()
+
+    def test_summary(self, test_id: str, role: str = "client") -> Optional[Dict[str, Any]]:
+        """
+        Summary ({"rows", "metrics"}) of an archived test, None if it is not archived
+
+        Summaries are stored on the registry record when a test is harvested;
+        tests archived before that are summarized from the archive on first
+        request and the result is stored the same way.
+        """
+        test = self.active_tests.get(test_id) or {}
+        summary = (test.get("summary") or {}).get(role)
+        if summary is not None:
+            return summary
+        if not self.is_archived(test_id, role):
+            return None
+        summary = RunningSummary.of_table(self.stats_archive.load_table(test_id, role), self.METRIC_KEYS).to_dict()
+        if test_id in self.active_tests:
+            self.active_tests.update(test_id, summary=dict(test.get("summary") or {}, **{role: summary}))
+        return summary
+
+    def live_summary(self, test_id: str) -> Dict[str, Any]:
+        """
+        Running aggregates (count, sum, min, max, mean, p50-p99) of the metrics per role
+
+        Only rows appended since the last read are fetched and folded in, so
+        the cost does not grow with the length of the test. Archived tests
+        return their stored final summary.
+        """
+        test = self.active_tests.get(test_id) or {}
+        result: Dict[str, Any] = {"test_id": test_id, "status": test.get("status")}
+        for role in ("server", "client"):
+            if test and not test.get(f"{role}_csv_path"):
+                continue
+            try:
+                if self.is_archived(test_id, role):
+                    result[role] = self.test_summary(test_id, role)
+                    continue
+                if role == "server":
+                    self.read_server_stats_table(test_id)
+                else:
+                    self.read_client_stats_table(test_id)
+                summary = self.stats_reader.summary(test_id, role)
+                result[role] = summary.to_dict() if summary else None
+            except Exception as e:
+                result[role] = {"error": str(e)}
+        return result
+
+    def compare_tests(self, test_ids: list, metric: Optional[str] = None, role: str = "client") -> Dict[str, Any]:
+        """
+        Side-by-side summaries of archived tests
+
+        With a metric, each test also gets its mean's change (in %) against the
+        first test, for spotting regressions between runs of the same profile.
+        """
+        tests = []
+        missing = []
+        baseline = None
+        for test_id in test_ids:
+            summary = self.test_summary(test_id, role)
+            if summary is None:
+                missing.append(test_id)
+                continue
+            record = self.active_tests.get(test_id) or {"test_id": test_id}
+            entry = {
+                "test_id": test_id,
+                "created_at": record.get("created_at"),
+                "server_ip": record.get("server_ip"),
+                "client_ip": record.get("client_ip"),
+                "rows": summary.get("rows"),
+                "summary": summary["metrics"] if metric is None else summary["metrics"].get(metric),
+            }
+            if metric is not None:
+                mean = (summary["metrics"].get(metric) or {}).get("mean")
+                if baseline is None:
+                    baseline = mean
+                entry["mean_change_pct"] = (
+                    round((mean - baseline) / baseline * 100, 2) if mean is not None and baseline else None
+                )
+            tests.append(entry)
+        return {"metric": metric, "role": role, "tests": tests, "missing": missing}
+
+    def _fetch_files(self, ssh: paramiko.SSHClient, paths: list) -> Dict[str, bytes]:
+        """Download the existing files among paths in one compressed tar stream"""
+        names = " ".join(shlex.quote(p) for p in paths)
+        command = (f'files=; for f in {names}; do [ -f "$f" ] && files="$files $f"; done; '
+                   f'[ -n "$files" ] && tar -czf - $files')
+        _, stdout, _ = ssh.exec_command(command)
+        data = stdout.read()
+        stdout.channel.recv_exit_status()
+        if not data:
+            return {}
+        files = {}
+        with tarfile.open(fileobj=BytesIO(data), mode="r:gz") as tar:
+            for member in tar.getmembers():
+                if member.isfile():
+                    files[member.name] = tar.extractfile(member).read()
+        return files
+
+    def get_server_stats(self, test_id: str, since: Optional[str] = None, format: str = "rows",
+                         query: Optional[StatsQuery] = None):
+        # Read stats directly - host_for falls back to settings if the test is not registered
+        if format == "columnar" or query is not None:
+            table = self.read_server_stats_table(test_id)
+            return self._stats_output(table, since, format, query)
+        output = self.read_server_csv_stats(test_id, since)
         return output
 
-    def get_client_stats(self, test_id: str) -> str:
-        # Read stats directly - will use fallback IP if test not in active_tests
-        output = self.read_client_csv_stats(test_id)
+    def get_client_stats(self, test_id: str, since: Optional[str] = None, format: str = "rows",
+                         query: Optional[StatsQuery] = None):
+        # Read stats directly - host_for falls back to settings if the test is not registered
+        if format == "columnar" or query is not None:
+            table = self.read_client_stats_table(test_id)
+            return self._stats_output(table, since, format, query)
+        output = self.read_client_csv_stats(test_id, since)
         return output
 
-    def read_client_csv_stats(self, test_id: str) -> list:
-        # Use client_ip from active_tests if available, otherwise fall back to settings
-        if test_id in self.active_tests:
-            client_ip = self.active_tests[test_id].get("client_ip", settings.CLIENT_IP)
-        else:
-            client_ip = settings.CLIENT_IP
-        
-        csv_path = f"{test_id}_client.csv"
-        stats = []
-        ssh = self._connect_ssh(client_ip)
-        sftp = ssh.open_sftp()
+    def _stats_output(self, table: StatsTable, since: Optional[str], format: str,
+                      query: Optional[StatsQuery]):
+        """Apply since / projection / window / bucketing and shape the result as rows or columns"""
+        start = table.index_after(since)
+        if query is None:
+            return table.columnar(start)
+        columns = run_query(table, query, start)
+        if format != "columnar":
+            return columns_to_rows(columns)
+        return {
+            "start": start,
+            "count": len(next(iter(columns.values()), [])),
+            "bucket": query.bucket,
+            "agg": query.agg if query.bucket or query.max_points else None,
+            "columns": columns,
+        }
+
+    def batch_stats(self, host: str, items: list, format: str = "rows") -> list:
+        """
+        Read the stats of several tests/roles whose CSV files are on one host
+
+        Archived items are served locally; the others share one pooled SSH
+        connection and one SFTP session, so the host is contacted once.
+
+        Args:
+            host: Agent holding the files of every item
+            items: Dicts with test_id, role and optional since and tail
+            format: 'rows' or 'columnar'
+
+        Returns:
+            One {"test_id", "role", "stats"} or {"test_id", "role", "error"} per item, in order
+        """
+        results: list = [None] * len(items)
+        remote = []
+        for index, item in enumerate(items):
+            if self.is_archived(item["test_id"], item["role"]):
+                results[index] = self._batch_result(
+                    item, format, lambda: self.stats_archive.load_table(item["test_id"], item["role"])
+                )
+            else:
+                remote.append(index)
+        if not remote:
+            return results
+
         try:
-            with sftp.open(csv_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    stats.append(row)
+            with self._ssh(host) as ssh:
+                sftp = ssh.open_sftp()
+                try:
+                    for index in remote:
+                        item = items[index]
+                        results[index] = self._batch_result(item, format, lambda: self.stats_reader.read(
+                            sftp, f"{item['test_id']}_{item['role']}.csv", item["test_id"], item["role"]
+                        ))
+                finally:
+                    sftp.close()
+        except Exception as e:
+            # The connection itself failed: every item not answered yet gets the error
+            for index in remote:
+                if results[index] is None:
+                    results[index] = {"test_id": items[index]["test_id"], "role": items[index]["role"],
+                                      "error": str(e)}
+        return results
+
+    def _batch_result(self, item: dict, format: str, load) -> Dict[str, Any]:
+        result = {"test_id": item["test_id"], "role": item["role"]}
+        try:
+            table = load()
+            start = table.index_after(item.get("since"))
+            if item.get("tail"):
+                start = max(start, len(table) - item["tail"])
+            if format == "columnar":
+                result["stats"] = table.columnar(start)
+            else:
+                result["stats"] = table.rows(start)
         except FileNotFoundError:
-            raise Exception(f"Client CSV file not found: {csv_path}")
-        finally:
-            sftp.close()
-            ssh.close()
-        return stats
+            result["error"] = f"{item['role'].capitalize()} CSV file not found: {item['test_id']}_{item['role']}.csv"
+        except (paramiko.SSHException, EOFError, ConnectionError, TimeoutError):
+            # Let the pool drop the broken connection; the remaining items report it
+            raise
+        except Exception as e:
+            result["error"] = str(e)
+        return result
 
-    def read_server_csv_stats(self, test_id: str) -> list:
-        # Use server_ip from active_tests if available, otherwise fall back to settings
-        if test_id in self.active_tests:
-            server_ip = self.active_tests[test_id].get("server_ip", settings.SERVER_IP)
-        else:
-            server_ip = settings.SERVER_IP
+    def host_for(self, test_id: str, role: str) -> str:
+        """Return the agent IP of a test's server or client, falling back to settings"""
+        test = self.active_tests.get(test_id, {})
+        if role == "server":
+            return test.get("server_ip", settings.SERVER_IP)
+        return test.get("client_ip", settings.CLIENT_IP)
+
+    def stats_sources(self, test_id: str) -> list:
+        """Return (role, host, csv path, PID) for the server and client of a test"""
+        test = self.active_tests.get(test_id, {})
+        return [
+            (role, self.host_for(test_id, role), f"{test_id}_{role}.csv", test.get(f"{role}_pid"))
+            for role in ("server", "client")
+        ]
+
+    def read_client_stats_table(self, test_id: str) -> StatsTable:
+        """Update and return the parsed client stats, transferring only bytes appended since the last read"""
+        if self.is_archived(test_id, "client"):
+            return self.stats_archive.load_table(test_id, "client")
+        client_ip = self.host_for(test_id, "client")
+        
+        csv_path = f"{test_id}_client.csv"
+        with self._ssh(client_ip) as ssh:
+            sftp = ssh.open_sftp()
+            try:
+                return self.stats_reader.read(sftp, csv_path, test_id, "client")
+            except FileNotFoundError:
+                raise Exception(f"Client CSV file not found: {csv_path}")
+            finally:
+                sftp.close()
+
+    def read_server_stats_table(self, test_id: str) -> StatsTable:
+        """Update and return the parsed server stats, transferring only bytes appended since the last read"""
+        if self.is_archived(test_id, "server"):
+            return self.stats_archive.load_table(test_id, "server")
+        server_ip = self.host_for(test_id, "server")
         
         csv_path = f"{test_id}_server.csv"
-        stats = []
-        ssh = self._connect_ssh(server_ip)
-        sftp = ssh.open_sftp()
-        try:
-            with sftp.open(csv_path, 'r') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    stats.append(row)
-        except FileNotFoundError:
-            raise Exception(f"Server CSV file not found: {csv_path}")
-        finally:
-            sftp.close()
-            ssh.close()
-        return stats
+        with self._ssh(server_ip) as ssh:
+            sftp = ssh.open_sftp()
+            try:
+                return self.stats_reader.read(sftp, csv_path, test_id, "server")
+            except FileNotFoundError:
+                raise Exception(f"Server CSV file not found: {csv_path}")
+            finally:
+                sftp.close()
+
+    def read_client_csv_stats(self, test_id: str, since: Optional[str] = None) -> list:
+        """Read client stats rows (numeric values parsed), optionally only those after `since`"""
+        table = self.read_client_stats_table(test_id)
+        return table.rows(table.index_after(since))
+
+    def read_server_csv_stats(self, test_id: str, since: Optional[str] = None) -> list:
+        """Read server stats rows (numeric values parsed), optionally only those after `since`"""
+        table = self.read_server_stats_table(test_id)
+        return table.rows(table.index_after(since))
 
     ALLOWED_KEYS = [
         "Timestamp",
@@ -357,84 +894,119 @@ class CyperfService:
         "ConnectionRate",
         "AverageConnectionLatency",
     ]
+    # ALLOWED_KEYS without Timestamp
+    METRIC_KEYS = ALLOWED_KEYS[1:]
 
-    def stats_to_image(self, stats: list) -> BytesIO:
-        # Filter each dictionary to only include allowed keys
-        filtered_stats = [
-            {k: d.get(k, "") for k in self.ALLOWED_KEYS}
-            for d in stats
-        ]
-        df = pd.DataFrame(filtered_stats)
-        fig_width = max(16, min(2.5 * len(df.columns), 48))
-        fig_height = max(4, min(0.8 * len(df), 36))
-        fig, ax = plt.subplots(figsize=(fig_width, fig_height))
-        ax.axis('off')
-        tbl = ax.table(cellText=df.values, colLabels=df.columns, loc='center')
-        tbl.auto_set_font_size(False)
-        tbl.set_fontsize(16)
-        tbl.scale(1.4, 1.4)
-
-        # Adjust column widths based on header text length
-        for i, key in enumerate(df.columns):
-            col_width = max(0.15, min(len(str(key)) * 0.13, 0.5))  # Adjust these factors as needed
-            tbl.auto_set_column_width([i])
-            for j in range(len(df) + 1):  # +1 for header
-                cell = tbl[(j, i)]
-                cell.set_width(col_width)
-
-        plt.tight_layout()
-        img_bytes = BytesIO()
-        plt.savefig(img_bytes, format='png', bbox_inches='tight')
-        plt.close(fig)
-        img_bytes.seek(0)
-        return img_bytes
+    def stats_to_image(self, stats: list, mode: str = "table", page: Optional[int] = None) -> BytesIO:
+        """
+        Render stats rows as a PNG
+
+        Args:
+            mode: 'table' for one page of rows, 'chart' for throughput and
+                  connection rate over time
+            page: Table page (default: the latest rows)
+        """
+        if mode == "chart":
+            return self.image_renderer.chart(stats, self.ALLOWED_KEYS)
+        return self.image_renderer.table(stats, self.ALLOWED_KEYS, page)
+
+    def get_stats_image(self, test_id: str, role: str, mode: str = "table",
+                        page: Optional[int] = None) -> Tuple[str, bytes]:
+        """
+        Return (etag, PNG bytes) for a test's server or client stats
+
+        The image is rendered only if the stats changed since it was last
+        rendered with the same options; otherwise it comes from image_cache.
+        """
+        if role == "server":
+            table = self.read_server_stats_table(test_id)
+        else:
+            table = self.read_client_stats_table(test_id)
+        etag = image_key(test_id, role, table, {"mode": mode, "page": page})
+        image = self.image_cache.get(etag)
+        if image is None:
+            image = self.stats_to_image(table.rows(), mode, page).getvalue()
+            self.image_cache.put(etag, image)
+        return etag, image
 
     def read_server_logs(self, test_id: str) -> str:
         """Read server log file for the given test_id"""
-        # Use server_ip from active_tests if available, otherwise fall back to settings
-        if test_id in self.active_tests:
-            server_ip = self.active_tests[test_id].get("server_ip", settings.SERVER_IP)
-        else:
-            server_ip = settings.SERVER_IP
-        
-        log_path = f"{test_id}_server.log"
-        
-        ssh = self._connect_ssh(server_ip)
-        sftp = ssh.open_sftp()
-        
-        try:
-            with sftp.open(log_path, 'r') as f:
-                log_content = f.read()
-        except FileNotFoundError:
-            raise Exception(f"Server log file not found: {log_path}")
-        finally:
-            sftp.close()
-            ssh.close()
-            
-        return log_content
+        return self._read_log(test_id, "server")
 
     def read_client_logs(self, test_id: str) -> str:
         """Read client log file for the given test_id"""
-        # Use client_ip from active_tests if available, otherwise fall back to settings
-        if test_id in self.active_tests:
-            client_ip = self.active_tests[test_id].get("client_ip", settings.CLIENT_IP)
-        else:
-            client_ip = settings.CLIENT_IP
-        
-        log_path = f"{test_id}_client.log"
-        
-        ssh = self._connect_ssh(client_ip)
-        sftp = ssh.open_sftp()
-        
+        return self._read_log(test_id, "client")
+
+    def _read_log(self, test_id: str, role: str) -> str:
+        """Read a whole log in one call, holding a pooled session only while it downloads"""
+        if self.stats_archive is not None and self.stats_archive.has_log(test_id, role):
+            return "".join(self.stats_archive.iter_log_lines(test_id, role))
+        with self._ssh(self.host_for(test_id, role)) as ssh:
+            channel = self._start_log(ssh, test_id, role, LogQuery())
+            try:
+                data = b"".join(iter(lambda: channel.recv(LOG_CHUNK_SIZE), b""))
+            finally:
+                channel.close()
+        return data.decode("utf-8", errors="replace")
+
+    def open_log(self, test_id: str, role: str, query: Optional[LogQuery] = None) -> Iterator[bytes]:
+        """
+        Start streaming the selected lines of a test's log
+
+        Filtering runs on the agent (or over the archived copy), and the
+        returned iterator yields chunks as they arrive. The remote pipeline
+        runs on a dedicated SSH connection, closed when the iterator is
+        exhausted or closed, so a slow HTTP reader never holds a pooled slot.
+
+        Raises:
+            Exception: If the log file does not exist
+        """
+        query = query or LogQuery()
+        if self.stats_archive is not None and self.stats_archive.has_log(test_id, role):
+            return chunk_lines(query.filter_lines(self.stats_archive.iter_log_lines(test_id, role)))
+
+        session = ExitStack()
         try:
-            with sftp.open(log_path, 'r') as f:
-                log_content = f.read()
-        except FileNotFoundError:
-            raise Exception(f"Client log file not found: {log_path}")
-        finally:
-            sftp.close()
-            ssh.close()
-            
-        return log_content
+            ssh = session.enter_context(self._ssh_dedicated(self.host_for(test_id, role)))
+            channel = self._start_log(ssh, test_id, role, query)
+        except BaseException:
+            session.close()
+            raise
+        return self._stream_channel(channel, session)
+
+    @staticmethod
+    def _start_log(ssh: paramiko.SSHClient, test_id: str, role: str, query: LogQuery):
+        """Run the query's pipeline on the agent and return its channel once the log is found"""
+        log_path = f"{test_id}_{role}.log"
+        _, stdout, _ = ssh.exec_command(query.remote_command(log_path))
+        channel = stdout.channel
+        # The remote command prints '+' once it has found the file
+        if channel.recv(1) != b"+":
+            channel.close()
+            raise Exception(f"{role.capitalize()} log file not found: {log_path}")
+        return channel
 
+    @staticmethod
+    def _stream_channel(channel, session: ExitStack) -> Iterator[bytes]:
+        try:
+            while True:
+                chunk = channel.recv(LOG_CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            # Closing early also stops the remote pipeline
+            channel.close()
+            session.close()
 
+    def shutdown(self):
+        """Flush the registry to disk and close streams, render workers and SSH connections"""
+        with self._finish_lock:
+            timers, self._finish_timers = list(self._finish_timers.values()), {}
+        for timer in timers:
+            timer.cancel()
+        for test_id in self.stats_stream.active_streams():
+            self.stats_stream.close(test_id)
+        self.active_tests.close()
+        self.image_renderer.close()
+        self.ssh_pool.close_all()
@@ -0,0 +1,68 @@
+"""
+Content-addressed cache of rendered stats images.
+
+An image is identified by what it was rendered from: the test, the role, the
+number of stats rows and the last row's timestamp, and the render options.
+The same key is used as the HTTP ETag, so unchanged stats are neither
+re-rendered nor re-sent to clients that already have them.
+"""
+
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from app.services.stats_model import StatsTable
+
+
+def image_key(test_id: str, role: str, table: StatsTable, options: Dict[str, Any]) -> str:
+    """Return a stable hex digest for an image of table rendered with options"""
+    last = table.column("Timestamp", len(table) - 1)[0] if len(table) and "Timestamp" in table.header else ""
+    parts = [test_id, role, str(len(table)), str(last)]
+    parts += [f"{name}={options[name]}" for name in sorted(options)]
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+class ImageCache:
+    """Thread-safe LRU of PNG bytes, bounded by total size"""
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._images: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            image = self._images.get(key)
+            if image is None:
+                self.misses += 1
+                return None
+            self._images.move_to_end(key)
+            self.hits += 1
+            return image
+
+    def put(self, key: str, image: bytes):
+        if len(image) > self.max_bytes:
+            return
+        with self._lock:
+            previous = self._images.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous)
+            self._images[key] = image
+            self._size += len(image)
+            while self._size > self.max_bytes:
+                _, evicted = self._images.popitem(last=False)
+                self._size -= len(evicted)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "images": len(self._images),
+                "bytes": self._size,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
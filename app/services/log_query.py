@@ -0,0 +1,203 @@
+"""
+Filtering, pagination and streaming of cyperf log files.
+
+A verbose cyperf log can reach hundreds of MB. A LogQuery is turned into a
+grep/tail/head pipeline that runs on the agent, so only the selected lines
+cross the wire, and the result is streamed to the client in chunks instead
+of being loaded into memory. Archived logs are filtered the same way
+locally, line by line.
+
+Filters apply in this order: level, grep, then tail or offset/limit, so
+pagination counts matching lines.
+
+The same grep pattern runs as a POSIX extended regex (grep -E) on the agent
+and as a Python regex over archived logs, so only the subset both read the
+same way is accepted:
+
+- literal characters, `.`, `^`, `$`, `|`, `(...)`
+- `*`, `+`, `?` and `{m}`, `{m,}`, `{m,n}` (not followed by another quantifier)
+- bracket expressions such as `[0-9]` or `[^a-z_]`, without `\\` or `[` inside
+- a backslash only before one of `.[()*+?{|^$\\` to match it literally
+
+Shorthands (`\\d`, `\\w`, `\\s`, `\\b`), backreferences, `(?...)` groups, lazy
+quantifiers and POSIX classes (`[[:digit:]]`) are rejected.
+"""
+
+import codecs
+import json
+import re
+import shlex
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Bytes read from the agent (or archive) per streamed chunk
+LOG_CHUNK_SIZE = 64 * 1024
+
+_LEVELS = re.compile(r"^[A-Za-z]+(,[A-Za-z]+)*$")
+# Characters a backslash may escape in a grep pattern
+_ESCAPABLE = set(".[()*+?{|^$\\")
+_INTERVAL = re.compile(r"\{\d+(,\d*)?\}")
+
+
+def _check_portable(pattern: str):
+    """
+    Raise ValueError unless pattern means the same to grep -E and to Python's re
+
+    See the module docstring for the accepted subset.
+    """
+    i = 0
+    quantified = False
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            escaped = pattern[i + 1:i + 2]
+            if escaped not in _ESCAPABLE:
+                raise ValueError(f"Unsupported escape \\{escaped} in grep pattern (use e.g. [0-9] instead of \\d)")
+            i += 2
+            quantified = False
+            continue
+        if c in "*+?{":
+            if c == "{":
+                interval = _INTERVAL.match(pattern, i)
+                if interval is None:
+                    raise ValueError("Invalid interval in grep pattern (use {m}, {m,} or {m,n}, or \\{ for a literal)")
+                end = interval.end()
+            else:
+                end = i + 1
+            if quantified:
+                raise ValueError("Lazy, possessive or repeated quantifiers are not supported in grep patterns")
+            i = end
+            quantified = True
+            continue
+        quantified = False
+        if c == "(" and pattern[i + 1:i + 2] == "?":
+            raise ValueError("(?...) groups are not supported in grep patterns")
+        if c == "[":
+            # A ']' right after '[' or '[^' is a literal member
+            j = i + 1
+            if pattern[j:j + 1] == "^":
+                j += 1
+            if pattern[j:j + 1] == "]":
+                j += 1
+            close = pattern.find("]", j)
+            if close < 0:
+                raise ValueError("Unterminated [ in grep pattern")
+            members = pattern[i + 1:close]
+            if "\\" in members or "[" in members:
+                raise ValueError("Bracket expressions in grep patterns cannot contain \\ or [ (e.g. [[:digit:]])")
+            i = close + 1
+            continue
+        i += 1
+
+
+@dataclass
+class LogQuery:
+    """Line selection for a log request"""
+    offset: int = 0
+    limit: Optional[int] = None
+    tail: Optional[int] = None
+    levels: Optional[List[str]] = None
+    grep: Optional[str] = None
+
+    @classmethod
+    def from_params(cls, offset: Optional[int] = None, limit: Optional[int] = None,
+                    tail: Optional[int] = None, level: Optional[str] = None,
+                    grep: Optional[str] = None) -> "LogQuery":
+        """
+        Build a query from request parameters
+
+        Raises:
+            ValueError: For malformed or conflicting parameters
+        """
+        if offset is not None and offset < 0:
+            raise ValueError("offset must not be negative")
+        if limit is not None and limit < 1:
+            raise ValueError("limit must be positive")
+        if tail is not None and tail < 1:
+            raise ValueError("tail must be positive")
+        if tail is not None and offset:
+            raise ValueError("tail cannot be combined with offset")
+        if level is not None and not _LEVELS.match(level):
+            raise ValueError(f"Invalid level: {level} (use e.g. error or error,warning)")
+        if grep is not None:
+            _check_portable(grep)
+            try:
+                re.compile(grep)
+            except re.error as e:
+                raise ValueError(f"Invalid grep pattern: {e}")
+        return cls(
+            offset=offset or 0,
+            limit=limit,
+            tail=tail,
+            levels=level.lower().split(",") if level else None,
+            grep=grep or None,
+        )
+
+    def remote_command(self, path: str) -> str:
+        """
+        Shell command printing '+' and then the selected lines of path
+
+        Exits with status 3 (printing nothing) if path does not exist, which
+        lets the caller tell a missing file from an empty selection.
+        """
+        stages = []
+        if self.levels:
+            stages.append(f"grep -a -i -w -E -e {shlex.quote('|'.join(self.levels))}")
+        if self.grep:
+            stages.append(f"grep -a -E -e {shlex.quote(self.grep)}")
+        if self.tail:
+            stages.append(f"tail -n {self.tail}")
+        if self.offset:
+            stages.append(f"tail -n +{self.offset + 1}")
+        if self.limit:
+            stages.append(f"head -n {self.limit}")
+        quoted = shlex.quote(path)
+        # The first stage reads the file itself, so a plain tail seeks from the end
+        pipeline = " | ".join([f"{stages[0]} {quoted}"] + stages[1:]) if stages else f"cat {quoted}"
+        return f"[ -f {quoted} ] || exit 3; printf +; {pipeline}"
+
+    def filter_lines(self, lines: Iterable[str]) -> Iterator[str]:
+        """Apply the query to local lines, keeping at most tail lines in memory"""
+        if self.levels:
+            level = re.compile(r"\b(" + "|".join(self.levels) + r")\b", re.IGNORECASE)
+            lines = (line for line in lines if level.search(line))
+        if self.grep:
+            pattern = re.compile(self.grep)
+            lines = (line for line in lines if pattern.search(line))
+        if self.tail:
+            lines = iter(deque(lines, maxlen=self.tail))
+        stop = self.offset + self.limit if self.limit else None
+        return islice(lines, self.offset, stop)
+
+
+def chunk_lines(lines: Iterable[str], size: int = LOG_CHUNK_SIZE) -> Iterator[bytes]:
+    """Group lines into byte chunks of about size bytes"""
+    buffer: List[bytes] = []
+    buffered = 0
+    for line in lines:
+        data = line.encode("utf-8")
+        buffer.append(data)
+        buffered += len(data)
+        if buffered >= size:
+            yield b"".join(buffer)
+            buffer, buffered = [], 0
+    if buffer:
+        yield b"".join(buffer)
+
+
+def json_log_stream(fields: Dict[str, Any], chunks: Iterable[bytes]) -> Iterator[str]:
+    """
+    Stream {**fields, "content": "<log text>"} as JSON without holding the log in memory
+
+    Chunks are decoded incrementally so multi-byte characters split across
+    chunk boundaries survive.
+    """
+    yield json.dumps(fields)[:-1] + (', "content": "' if fields else '"content": "')
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield json.dumps(text)[1:-1]
+    yield json.dumps(decoder.decode(b"", final=True))[1:-1] + '"}'
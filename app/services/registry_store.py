@@ -0,0 +1,182 @@
+"""
+SQLite persistence for the test registry.
+
+Test records survive controller restarts, so stats, logs and stop calls for a
+test started before a redeploy still reach the right agents. Writes are
+queued and applied by a background thread in batched transactions (SQLite in
+WAL mode), so registering a test never waits on disk I/O.
+
+Only the fields in PERSISTED_FIELDS are written. Anything else a record
+carries (such as the launch command) stays in memory, so nothing secret
+reaches the database file.
+"""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tests (
+    test_id TEXT PRIMARY KEY,
+    server_ip TEXT,
+    client_ip TEXT,
+    status TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_tests_server_ip ON tests (server_ip);
+CREATE INDEX IF NOT EXISTS idx_tests_client_ip ON tests (client_ip);
+CREATE INDEX IF NOT EXISTS idx_tests_status ON tests (status);
+CREATE INDEX IF NOT EXISTS idx_tests_created_at ON tests (created_at);
+"""
+
+UPSERT = """
+INSERT INTO tests (test_id, server_ip, client_ip, status, created_at, updated_at, record)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (test_id) DO UPDATE SET
+    server_ip = excluded.server_ip,
+    client_ip = excluded.client_ip,
+    status = excluded.status,
+    updated_at = excluded.updated_at,
+    record = excluded.record
+"""
+
+# Most queued writes applied in one transaction
+MAX_BATCH = 1000
+
+# Record fields written to disk; every other field is dropped on save
+PERSISTED_FIELDS = (
+    "test_id", "created_at", "status", "error", "archived_at", "summary",
+    "server_ip", "server_pid", "server_csv_path", "server_log_path", "server_params",
+    "client_ip", "client_pid", "client_csv_path", "client_log_path", "client_params",
+    "group_id", "member_role", "member_host", "member_index",
+)
+
+
+def persisted(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Return the part of a record that may be written to disk"""
+    return {field: record[field] for field in PERSISTED_FIELDS if field in record}
+
+
+class RegistryStore:
+    """Loads test records from SQLite and writes changes asynchronously"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._queue: "queue.Queue" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # Overwritten records are zeroed rather than left in free pages
+        conn.execute("PRAGMA secure_delete=ON")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Read every stored record, rewriting any that hold fields no longer persisted"""
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT test_id, record FROM tests ORDER BY created_at").fetchall()
+            records = {test_id: json.loads(record) for test_id, record in rows}
+            stale = [(json.dumps(persisted(r), default=str), test_id)
+                     for test_id, r in records.items() if len(persisted(r)) < len(r)]
+            if stale:
+                with conn:
+                    conn.executemany("UPDATE tests SET record = ? WHERE test_id = ?", stale)
+                conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        finally:
+            conn.close()
+        return {test_id: persisted(record) for test_id, record in records.items()}
+
+    def save(self, record: Dict[str, Any]):
+        """Queue an insert/update of the persisted fields of a record (keyed by its test_id)"""
+        self._start_writer()
+        self._queue.put(("save", persisted(record)))
+
+    def delete(self, test_id: str):
+        self._start_writer()
+        self._queue.put(("delete", test_id))
+
+    def flush(self):
+        """Block until every queued write is on disk"""
+        if self._writer is not None:
+            self._queue.join()
+
+    def close(self):
+        """Write everything still queued, then stop the writer thread"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+            self._closed = True
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def _start_writer(self):
+        with self._lock:
+            if self._closed:
+                raise Exception(f"Registry store {self.path} is closed")
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="registry-writer", daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        conn = self._connect()
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            while len(batch) < MAX_BATCH:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            # None is the shutdown marker queued by close(), after every real write
+            changes = [item for item in batch if item is not None]
+            stopping = len(changes) < len(batch)
+            try:
+                if changes:
+                    self._apply(conn, changes)
+            except Exception as e:
+                print(f"Failed to persist {len(changes)} registry changes: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+        conn.close()
+
+    def _apply(self, conn: sqlite3.Connection, batch: list):
+        # Only the last change per test matters within a batch
+        latest: Dict[str, Any] = {}
+        for op, item in batch:
+            test_id = item["test_id"] if op == "save" else item
+            latest.pop(test_id, None)
+            latest[test_id] = (op, item)
+
+        now = time.time()
+        saves = []
+        deletes = []
+        for test_id, (op, item) in latest.items():
+            if op == "delete":
+                deletes.append((test_id,))
+                continue
+            saves.append((
+                test_id,
+                item.get("server_ip"),
+                item.get("client_ip"),
+                item.get("status"),
+                item.get("created_at", now),
+                now,
+                json.dumps(item, default=str),
+            ))
+        with conn:
+            if saves:
+                conn.executemany(UPSERT, saves)
+            if deletes:
+                conn.executemany("DELETE FROM tests WHERE test_id = ?", deletes)
@@ -0,0 +1,151 @@
+"""
+Running summary statistics for test stats.
+
+A RunningSummary is updated with each batch of rows as they are read from an
+agent, keeping count/sum/min/max per metric and a t-digest for percentiles.
+Reading a summary costs the same for a 10 second test and a 10 hour test.
+The same summary, built once over the whole table, is what an archived test
+stores on its registry record and what test comparisons read.
+"""
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.services.stats_model import StatsTable, to_json_number
+
+SUMMARY_QUANTILES = (0.5, 0.9, 0.95, 0.99)
+
+
+class TDigest:
+    """Merging t-digest: approximate quantiles in bounded memory"""
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self._means: List[float] = []
+        self._weights: List[float] = []
+        self._buffer: List[float] = []
+
+    def add(self, value: float):
+        self._buffer.append(value)
+        if len(self._buffer) >= 5 * self.compression:
+            self._compress()
+
+    def _compress(self):
+        """Merge buffered points into centroids sized by the k-size limit 4·n·q(1-q)/compression"""
+        if not self._buffer:
+            return
+        points = sorted(list(zip(self._means, self._weights)) + [(v, 1.0) for v in self._buffer])
+        self._buffer = []
+        total = sum(w for _, w in points)
+        means: List[float] = []
+        weights: List[float] = []
+        done = 0.0
+        mean, weight = points[0]
+        for m, w in points[1:]:
+            q = (done + weight + w / 2) / total
+            if weight + w <= max(1.0, 4 * total * q * (1 - q) / self.compression):
+                mean += (m - mean) * w / (weight + w)
+                weight += w
+            else:
+                means.append(mean)
+                weights.append(weight)
+                done += weight
+                mean, weight = m, w
+        means.append(mean)
+        weights.append(weight)
+        self._means, self._weights = means, weights
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self._means:
+            return None
+        total = sum(self._weights)
+        target = q * total
+        done = 0.0
+        for i, (mean, weight) in enumerate(zip(self._means, self._weights)):
+            center = done + weight / 2
+            if target <= center:
+                if i == 0:
+                    return mean
+                # Interpolate between the centers of neighbouring centroids
+                prev_mean, prev_weight = self._means[i - 1], self._weights[i - 1]
+                prev_center = done - prev_weight / 2
+                return prev_mean + (mean - prev_mean) * (target - prev_center) / (center - prev_center)
+            done += weight
+        return self._means[-1]
+
+
+class MetricAggregate:
+    """count / sum / min / max / percentiles of one metric"""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+        self.digest = TDigest()
+
+    def add(self, value: float):
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.digest.add(value)
+
+    def to_dict(self) -> Dict[str, Any]:
+        if not self.count:
+            return {"count": 0}
+        result = {
+            "count": self.count,
+            "sum": to_json_number(self.total),
+            "min": to_json_number(self.minimum),
+            "max": to_json_number(self.maximum),
+            "mean": to_json_number(self.total / self.count),
+        }
+        for q in SUMMARY_QUANTILES:
+            # Digest interpolation can overshoot slightly at the tails
+            value = min(max(self.digest.quantile(q), self.minimum), self.maximum)
+            result[f"p{int(q * 100)}"] = to_json_number(value)
+        return result
+
+
+class RunningSummary:
+    """Aggregates of the summary metrics over every row seen so far"""
+
+    def __init__(self, metrics: Sequence[str]):
+        self.metrics = {name: MetricAggregate() for name in metrics}
+        self.rows = 0
+        self._snapshot: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+
+    def update(self, table: StatsTable, start: int, stop: int):
+        """Add rows [start, stop) of table"""
+        with self._lock:
+            for name, aggregate in self.metrics.items():
+                column: Optional[array] = table.numeric.get(name)
+                if column is None:
+                    continue
+                for value in column[start:stop]:
+                    if not math.isnan(value):
+                        aggregate.add(value)
+            self.rows += max(0, stop - start)
+            self._snapshot = None
+
+    @classmethod
+    def of_table(cls, table: StatsTable, metrics: Sequence[str]) -> "RunningSummary":
+        """Summary of every row of a complete table"""
+        summary = cls(metrics)
+        summary.update(table, 0, len(table))
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """{"rows", "metrics": {name: {count, sum, min, max, mean, p50, p90, p95, p99}}}"""
+        with self._lock:
+            if self._snapshot is None:
+                self._snapshot = {
+                    "rows": self.rows,
+                    "metrics": {name: aggregate.to_dict() for name, aggregate in self.metrics.items()},
+                }
+            return self._snapshot
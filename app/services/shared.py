@@ -0,0 +1,18 @@
+"""
+Process-wide service instances.
+
+The REST routes and the MCP helpers must see the same started tests, SSH
+connections and caches, so both use these instances instead of constructing
+their own CyperfService.
+"""
+
+from app.core.config import settings
+from app.services.async_service import AsyncCyperfService
+from app.services.cyperf_service import CyperfService
+
+cyperf_service = CyperfService()
+async_service = AsyncCyperfService(
+    cyperf_service,
+    max_workers=settings.SERVICE_MAX_WORKERS,
+    per_host_limit=settings.SERVICE_PER_HOST_CONCURRENCY,
+)
@@ -0,0 +1,230 @@
+"""
+Pooled, persistent SSH connections for CyperfService.
+
+Every service call used to open a fresh TCP+SSH session, authenticate and
+close it again after a single command. The pool keeps one authenticated
+paramiko transport per (hostname, username, auth method), keeps it alive
+with SSH keepalives and hands it out to callers through a context manager.
+
+Long-lived channels (stats streams, streamed logs) use dedicated
+connections instead, capped per host by max_dedicated so an agent cannot be
+flooded with them.
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, Tuple
+
+import paramiko
+
+PoolKey = Tuple[str, str, str]
+
+# Errors that mean the underlying transport is unusable and must be dropped
+_TRANSPORT_ERRORS = (paramiko.SSHException, EOFError, ConnectionError, socket.timeout)
+
+
+@dataclass
+class _PooledConnection:
+    """A pooled SSH client plus its bookkeeping"""
+    client: paramiko.SSHClient
+    slots: threading.BoundedSemaphore
+    created_at: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    borrowed: int = 0
+
+
+class SSHConnectionPool:
+    """Keyed pool of authenticated SSH transports"""
+
+    def __init__(
+        self,
+        connect: Callable[[str], paramiko.SSHClient],
+        keepalive_interval: int = 30,
+        idle_timeout: int = 300,
+        max_sessions: int = 8,
+        max_connections: int = 64,
+        max_dedicated: int = 8,
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            connect: Factory that opens an authenticated SSHClient for a hostname
+            keepalive_interval: Seconds between SSH keepalive packets (0 disables)
+            idle_timeout: Seconds an unused connection is kept before eviction
+            max_sessions: Maximum concurrent borrowers (channels) per connection
+            max_connections: Maximum number of pooled connections across all hosts
+            max_dedicated: Maximum open dedicated connections per host
+        """
+        self._connect = connect
+        self.keepalive_interval = keepalive_interval
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.max_connections = max_connections
+        self.max_dedicated = max_dedicated
+        self._dedicated: Dict[str, int] = {}
+        self._connections: Dict[PoolKey, _PooledConnection] = {}
+        self._key_locks: Dict[PoolKey, threading.Lock] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _is_healthy(entry: _PooledConnection) -> bool:
+        """Check that the transport is still connected and authenticated"""
+        transport = entry.client.get_transport()
+        return bool(transport and transport.is_active() and transport.is_authenticated())
+
+    def _close_entry(self, entry: _PooledConnection):
+        try:
+            entry.client.close()
+        except Exception as e:
+            print(f"Warning: error while closing pooled SSH connection: {e}")
+
+    def _evict_idle_locked(self):
+        """Drop idle or dead connections. Caller must hold self._lock."""
+        now = time.monotonic()
+        for key, entry in list(self._connections.items()):
+            if entry.borrowed:
+                continue
+            if now - entry.last_used > self.idle_timeout or not self._is_healthy(entry):
+                print(f"Evicting pooled SSH connection to {key[0]}")
+                del self._connections[key]
+                self._close_entry(entry)
+
+    def _make_room_locked(self):
+        """Evict least recently used idle connections above max_connections"""
+        while len(self._connections) >= self.max_connections:
+            idle = [(k, e) for k, e in self._connections.items() if not e.borrowed]
+            if not idle:
+                print(f"Warning: SSH pool over capacity ({len(self._connections)} connections in use)")
+                return
+            key, entry = min(idle, key=lambda item: item[1].last_used)
+            del self._connections[key]
+            self._close_entry(entry)
+
+    def _get_entry(self, key: PoolKey) -> _PooledConnection:
+        """Return a healthy pooled connection for key, connecting if needed"""
+        with self._lock:
+            self._evict_idle_locked()
+            entry = self._connections.get(key)
+            if entry is not None:
+                entry.borrowed += 1
+                return entry
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # Connect outside the pool lock so a slow host does not block others
+        with key_lock:
+            with self._lock:
+                entry = self._connections.get(key)
+                if entry is not None and self._is_healthy(entry):
+                    entry.borrowed += 1
+                    return entry
+
+            client = self._connect(key[0])
+            transport = client.get_transport()
+            if transport and self.keepalive_interval:
+                transport.set_keepalive(self.keepalive_interval)
+            entry = _PooledConnection(
+                client=client,
+                slots=threading.BoundedSemaphore(self.max_sessions),
+                borrowed=1,
+            )
+            with self._lock:
+                self._make_room_locked()
+                self._connections[key] = entry
+            return entry
+
+    def _discard(self, key: PoolKey, entry: _PooledConnection):
+        """Remove a broken connection from the pool"""
+        with self._lock:
+            if self._connections.get(key) is entry:
+                del self._connections[key]
+        self._close_entry(entry)
+
+    @contextmanager
+    def session(self, hostname: str, username: str, auth_method: str) -> Iterator[paramiko.SSHClient]:
+        """
+        Borrow a live SSH client for hostname
+
+        Args:
+            hostname: Host to connect to
+            username: SSH username
+            auth_method: Authentication method label (part of the pool key)
+
+        Yields:
+            Connected paramiko.SSHClient. Callers must not close it.
+        """
+        key = (hostname, username, auth_method)
+        entry = self._get_entry(key)
+        if not self._is_healthy(entry):
+            self._discard(key, entry)
+            with self._lock:
+                entry.borrowed -= 1
+            entry = self._get_entry(key)
+
+        entry.slots.acquire()
+        try:
+            yield entry.client
+        except _TRANSPORT_ERRORS:
+            print(f"Dropping pooled SSH connection to {hostname} after transport error")
+            self._discard(key, entry)
+            raise
+        finally:
+            entry.slots.release()
+            with self._lock:
+                entry.borrowed -= 1
+                entry.last_used = time.monotonic()
+
+    @contextmanager
+    def dedicated(self, hostname: str) -> Iterator[paramiko.SSHClient]:
+        """
+        Open a private SSH connection for a long-lived channel (e.g. a remote tail)
+
+        The connection is not pooled and takes no session slot, so streams
+        that stay open for minutes never make short calls to the same host
+        wait. It is closed when the block exits.
+
+        Raises:
+            Exception: If max_dedicated connections to hostname are already open
+        """
+        with self._lock:
+            if self._dedicated.get(hostname, 0) >= self.max_dedicated:
+                raise Exception(f"Too many dedicated SSH connections to {hostname} "
+                                f"({self.max_dedicated} open); close a stream and retry")
+            self._dedicated[hostname] = self._dedicated.get(hostname, 0) + 1
+        try:
+            client = self._connect(hostname)
+            transport = client.get_transport()
+            if transport and self.keepalive_interval:
+                transport.set_keepalive(self.keepalive_interval)
+            try:
+                yield client
+            finally:
+                try:
+                    client.close()
+                except Exception as e:
+                    print(f"Warning: error while closing dedicated SSH connection: {e}")
+        finally:
+            with self._lock:
+                self._dedicated[hostname] -= 1
+                if not self._dedicated[hostname]:
+                    del self._dedicated[hostname]
+
+    def stats(self) -> Dict[str, int]:
+        """Return basic pool occupancy figures"""
+        with self._lock:
+            return {
+                "connections": len(self._connections),
+                "borrowed": sum(e.borrowed for e in self._connections.values()),
+                "dedicated": sum(self._dedicated.values()),
+            }
+
+    def close_all(self):
+        """Close every pooled connection"""
+        with self._lock:
+            entries = list(self._connections.values())
+            self._connections.clear()
+        for entry in entries:
+            self._close_entry(entry)
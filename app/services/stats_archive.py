@@ -0,0 +1,134 @@
+"""
+Local archive of finished tests.
+
+When a test completes, its CSV stats and logs are copied from the agents
+once and kept on the controller, so later stats/logs/image requests for it
+never open an SSH connection and results survive agent re-provisioning.
+
+Layout under the archive root, per test:
+
+    {test_id}/{role}.meta.json   header, row count, column types, text columns
+    {test_id}/{role}.{n}.f64     numeric column n (float64, native byte order)
+    {test_id}/{role}.ts.f64      parsed Timestamp column
+    {test_id}/{role}.csv.gz      the original CSV
+    {test_id}/{role}.log.gz      the cyperf log
+
+Numeric columns are flat float64 files. A loaded table's numeric columns are
+read-only memoryviews straight over the memory-mapped files, so loading copies
+nothing and pages are read from disk only when a column is used.
+"""
+
+import gzip
+import json
+import mmap
+import os
+import threading
+import time
+from array import array
+from collections import OrderedDict
+from typing import Iterator, Optional, Tuple
+
+from app.services.stats_model import StatsTable
+
+# Loaded tables kept in memory
+MAX_LOADED_TABLES = 32
+
+
+def _read_column(path: str) -> memoryview:
+    """Map a float64 column file; the mapping stays open as long as the view is referenced"""
+    with open(path, "rb") as f:
+        if not os.fstat(f.fileno()).st_size:
+            return memoryview(array("d"))
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    return memoryview(mapped).cast("d")
+
+
+def _write_atomic(path: str, data: bytes):
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+class StatsArchive:
+    """Stores and serves the stats tables and logs of finished tests"""
+
+    def __init__(self, root: str):
+        self.root = root
+        self._tables: "OrderedDict[Tuple[str, str], StatsTable]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _dir(self, test_id: str) -> str:
+        if not test_id or test_id in (".", "..") or os.path.basename(test_id) != test_id:
+            raise Exception(f"Invalid test_id for the archive: {test_id}")
+        return os.path.join(self.root, test_id)
+
+    def _path(self, test_id: str, name: str) -> str:
+        return os.path.join(self._dir(test_id), name)
+
+    def _exists(self, test_id: str, name: str) -> bool:
+        try:
+            return os.path.exists(self._path(test_id, name))
+        except Exception:
+            return False
+
+    def has(self, test_id: str, role: str) -> bool:
+        """Whether the stats of test_id/role are archived"""
+        return self._exists(test_id, f"{role}.meta.json")
+
+    def has_log(self, test_id: str, role: str) -> bool:
+        return self._exists(test_id, f"{role}.log.gz")
+
+    def store(self, test_id: str, role: str, csv_data: Optional[bytes], log_data: Optional[bytes],
+              table: Optional[StatsTable]):
+        """Write the files of one role; the metadata is written last so readers never see partial data"""
+        os.makedirs(self._dir(test_id), exist_ok=True)
+        if log_data is not None:
+            _write_atomic(self._path(test_id, f"{role}.log.gz"), gzip.compress(log_data))
+        if csv_data is None or table is None:
+            return
+        _write_atomic(self._path(test_id, f"{role}.csv.gz"), gzip.compress(csv_data))
+
+        numeric = [name for name in table.header if name in table.numeric]
+        for index, name in enumerate(numeric):
+            _write_atomic(self._path(test_id, f"{role}.{index}.f64"), table.numeric[name].tobytes())
+        _write_atomic(self._path(test_id, f"{role}.ts.f64"), table.timestamps.tobytes())
+        meta = {
+            "header": table.header,
+            "length": len(table),
+            "numeric": numeric,
+            "text": {name: table.text[name] for name in table.header if name in table.text},
+            "archived_at": time.time(),
+        }
+        _write_atomic(self._path(test_id, f"{role}.meta.json"), json.dumps(meta).encode("utf-8"))
+        with self._lock:
+            self._tables.pop((test_id, role), None)
+
+    def load_table(self, test_id: str, role: str) -> StatsTable:
+        """Return the archived stats of test_id/role"""
+        key = (test_id, role)
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+
+        with open(self._path(test_id, f"{role}.meta.json"), "rb") as f:
+            meta = json.load(f)
+        numeric = {
+            name: _read_column(self._path(test_id, f"{role}.{index}.f64"))
+            for index, name in enumerate(meta["numeric"])
+        }
+        table = StatsTable.from_columns(
+            meta["header"], numeric, meta["text"], _read_column(self._path(test_id, f"{role}.ts.f64"))
+        )
+        with self._lock:
+            self._tables[key] = table
+            while len(self._tables) > MAX_LOADED_TABLES:
+                self._tables.popitem(last=False)
+        return table
+
+    def iter_log_lines(self, test_id: str, role: str) -> Iterator[str]:
+        """Yield the archived log of test_id/role line by line"""
+        with gzip.open(self._path(test_id, f"{role}.log.gz"), "rt", encoding="utf-8", errors="replace") as f:
+            yield from f
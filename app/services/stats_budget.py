@@ -0,0 +1,192 @@
+"""
+Compact stats payloads for MCP tools.
+
+LLM clients pay for every byte a tool returns, and the full CSV of a long
+test runs to megabytes. The MCP stats tools therefore answer in one of a
+few compact modes and never return more than a hard byte budget:
+
+    summary      running aggregates of the key metrics (default)
+    tail         the last n rows
+    downsampled  at most max_points bucketed rows over the whole test
+    full         every row (still cut to the budget, newest rows kept)
+
+All modes accept `fields` to project columns/metrics. compact_stats() runs a
+whole stats tool call; the in-process MCP endpoint and the standalone MCP
+servers only differ in how they fetch a summary or columns, which they pass
+in. This module only uses the standard library so the standalone MCP servers
+can import it without pulling in the service layer.
+"""
+
+import json
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+STATS_MODES = ("summary", "tail", "downsampled", "full")
+DEFAULT_TAIL_ROWS = 20
+DEFAULT_POINTS = 50
+DEFAULT_MAX_BYTES = 8000
+# Re-fetches with fewer points a downsampled answer may take to fit its budget
+REBUCKET_ATTEMPTS = 3
+# Smallest budget a caller may ask for; anything lower could not hold a header and one row
+MIN_MAX_BYTES = 512
+
+STATS_TOOL_PROPERTIES: Dict[str, Any] = {
+    "mode": {
+        "type": "string",
+        "enum": list(STATS_MODES),
+        "description": "summary (aggregates, default), tail (last n rows), downsampled (max_points rows over the whole test) or full",
+        "default": "summary",
+    },
+    "n": {"type": "integer", "description": "Rows returned in tail mode", "default": DEFAULT_TAIL_ROWS},
+    "max_points": {"type": "integer", "description": "Rows returned in downsampled mode", "default": DEFAULT_POINTS},
+    "fields": {"type": "string", "description": "Comma-separated columns/metrics to include, e.g. 'Throughput,ConnectionRate'"},
+    "max_bytes": {"type": "integer", "description": "Upper bound on the size of the response text", "default": DEFAULT_MAX_BYTES},
+}
+
+
+def _dumps(payload: Any) -> str:
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def _size(text: str) -> int:
+    return len(text.encode("utf-8"))
+
+
+def stats_params(arguments: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Validate MCP stats tool arguments
+
+    Returns:
+        {"mode", "fields", "tail", "max_points", "max_bytes"}; tail and
+        max_points are only set for the modes that use them
+
+    Raises:
+        ValueError: For an unknown mode or non-positive sizes
+    """
+    mode = arguments.get("mode") or "summary"
+    if mode not in STATS_MODES:
+        raise ValueError(f"Invalid mode: {mode} (use {', '.join(STATS_MODES)})")
+    fields = arguments.get("fields")
+    if isinstance(fields, list):
+        fields = ",".join(fields)
+    tail = int(arguments.get("n") or DEFAULT_TAIL_ROWS) if mode == "tail" else None
+    max_points = int(arguments.get("max_points") or DEFAULT_POINTS) if mode == "downsampled" else None
+    if (tail is not None and tail < 1) or (max_points is not None and max_points < 1):
+        raise ValueError("n and max_points must be positive")
+    max_bytes = max(MIN_MAX_BYTES, int(arguments.get("max_bytes") or DEFAULT_MAX_BYTES))
+    return {"mode": mode, "fields": fields or None, "tail": tail, "max_points": max_points, "max_bytes": max_bytes}
+
+
+def summary_payload(test_id: str, role: str, summary: Dict[str, Any],
+                    fields: Optional[str] = None) -> Dict[str, Any]:
+    """Pick one role out of a live test summary, keeping only the requested metrics"""
+    role_summary = summary.get(role) or {}
+    payload = {"test_id": test_id, "role": role, "mode": "summary", "status": summary.get("status")}
+    if "error" in role_summary:
+        payload["error"] = role_summary["error"]
+        return payload
+    metrics = role_summary.get("metrics", {})
+    if fields:
+        wanted = [f.strip() for f in fields.split(",") if f.strip()]
+        metrics = {name: metrics[name] for name in wanted if name in metrics}
+    payload["rows"] = role_summary.get("rows", 0)
+    payload["metrics"] = metrics
+    return payload
+
+
+def rows_within(payload: Dict[str, Any], max_bytes: int) -> int:
+    """Estimate how many rows of a columnar payload fit in max_bytes"""
+    columns: Dict[str, List[Any]] = payload.get("columns") or {}
+    count = len(next(iter(columns.values()), []))
+    size = _size(_dumps(payload))
+    if count == 0 or size <= max_bytes:
+        return count
+    empty = _size(_dumps(dict(payload, columns={name: [] for name in columns})))
+    per_row = (size - empty) / count
+    return max(1, int((max_bytes - empty) / per_row))
+
+
+def _fit_columns(payload: Dict[str, Any], max_bytes: int) -> str:
+    """Serialize a columnar payload, dropping its oldest rows until it fits"""
+    text = _dumps(payload)
+    columns: Dict[str, List[Any]] = payload.get("columns") or {}
+    count = len(next(iter(columns.values()), []))
+    if _size(text) <= max_bytes or count == 0:
+        return text
+
+    def keep_last(k: int) -> str:
+        return _dumps(dict(
+            payload,
+            count=k,
+            omitted_rows=count - k,
+            columns={name: values[count - k:] for name, values in columns.items()},
+        ))
+
+    # Largest k whose serialization fits
+    low, high = 0, count
+    while low < high:
+        mid = (low + high + 1) // 2
+        if _size(keep_last(mid)) <= max_bytes:
+            low = mid
+        else:
+            high = mid - 1
+    return keep_last(low)
+
+
+def compact_stats_text(title: str, payload: Dict[str, Any], max_bytes: int) -> str:
+    """
+    Render a stats payload as '{title}\\n{compact JSON}' of at most max_bytes
+
+    Columnar payloads lose their oldest rows first (reported as omitted_rows);
+    anything still too large is cut and marked as truncated.
+    """
+    header = f"{title}\n"
+    budget = max_bytes - _size(header)
+    body = _fit_columns(payload, budget) if "columns" in payload else _dumps(payload)
+    if _size(body) > budget:
+        marker = "...[truncated]"
+        body = body.encode("utf-8")[:budget - len(marker)].decode("utf-8", errors="ignore") + marker
+    return header + body
+
+
+async def compact_stats(role: str, arguments: Dict[str, Any],
+                        fetch_summary: Callable[[], Awaitable[Dict[str, Any]]],
+                        fetch_columns: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]) -> str:
+    """
+    Answer an MCP stats tool call for one role within its byte budget
+
+    Args:
+        role: 'server' or 'client'
+        arguments: Tool arguments: test_id plus the STATS_TOOL_PROPERTIES
+        fetch_summary: Returns the live summary of the test (GET /api/tests/{test_id}/summary)
+        fetch_columns: Returns columnar stats for a query of fields / tail /
+            max_points (unset ones are left out)
+
+    Returns:
+        The tool's response text
+
+    Raises:
+        ValueError: For invalid arguments (see stats_params)
+    """
+    test_id = arguments["test_id"]
+    params = stats_params(arguments)
+    title = f"{role.capitalize()} Statistics for Test ID: {test_id} ({params['mode']})"
+
+    if params["mode"] == "summary":
+        return compact_stats_text(title, summary_payload(test_id, role, await fetch_summary(), params["fields"]),
+                                  params["max_bytes"])
+
+    async def fetch(max_points: Optional[int]) -> Dict[str, Any]:
+        query = {"fields": params["fields"], "tail": params["tail"], "max_points": max_points}
+        columns = await fetch_columns({k: v for k, v in query.items() if v is not None})
+        return {"test_id": test_id, "role": role, "mode": params["mode"], **columns}
+
+    payload = await fetch(params["max_points"])
+    if params["mode"] == "downsampled":
+        # Re-bucket into fewer, wider points rather than dropping the start of the test;
+        # the size per row is an estimate, so a second pass may still be needed
+        for _ in range(REBUCKET_ATTEMPTS):
+            fits = rows_within(payload, params["max_bytes"] - _size(title) - 1)
+            if fits >= payload.get("count", 0):
+                break
+            payload = await fetch(fits)
+    return compact_stats_text(title, payload, params["max_bytes"])
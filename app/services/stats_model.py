@@ -0,0 +1,186 @@
+"""
+Typed, columnar representation of cyperf CSV stats.
+
+Rows are parsed once when they are read from the agent: numeric columns are
+stored in compact `array('d')` buffers, text columns as lists, and the
+Timestamp column is additionally parsed to epoch seconds. Every endpoint
+(rows, columnar output, images, aggregation) works from the same table.
+"""
+
+import csv
+import math
+from array import array
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+NAN = float("nan")
+
+
+def parse_number(value: str) -> Optional[float]:
+    """Parse a CSV cell as a float, None if it is not numeric (empty cells are NaN)"""
+    if value == "":
+        return NAN
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_timestamp(value: Any) -> float:
+    """Parse a Timestamp cell (epoch number or ISO-8601 text) to epoch seconds, NaN if unknown"""
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        pass
+    text = str(value).strip()
+    try:
+        return datetime.fromisoformat(text.replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return NAN
+
+
+def to_json_number(value: float):
+    """Convert a stored float to a JSON friendly value (None for NaN, int when integral)"""
+    if math.isnan(value):
+        return None
+    if value.is_integer():
+        return int(value)
+    return value
+
+
+def typed_row(header: List[str], values: List[str]) -> Dict[str, Any]:
+    """Parse a single CSV row the same way StatsTable does (numbers parsed, text kept)"""
+    row = {}
+    for name, value in zip(header, values):
+        number = parse_number(value)
+        row[name] = value if number is None else to_json_number(number)
+    return row
+
+
+class StatsTable:
+    """Append-only columnar table of stats rows"""
+
+    def __init__(self, header: List[str]):
+        self.header = list(header)
+        self.numeric: Dict[str, array] = {}
+        self.text: Dict[str, List[str]] = {}
+        self.timestamps = array("d")
+        self._length = 0
+
+    def __len__(self) -> int:
+        return self._length
+
+    @classmethod
+    def from_columns(cls, header: List[str], numeric: Dict[str, array], text: Dict[str, List[str]],
+                     timestamps: array) -> "StatsTable":
+        """Build a table from already parsed columns (e.g. memory-mapped from the archive, read-only)"""
+        table = cls(header)
+        table.numeric = numeric
+        table.text = text
+        table.timestamps = timestamps
+        table._length = len(timestamps)
+        return table
+
+    def append(self, values: List[str]):
+        """Append one CSV row (raw strings in header order)"""
+        values = list(values) + [""] * (len(self.header) - len(values))
+        if self._length == 0:
+            # Column types are decided by the first row
+            for name, value in zip(self.header, values):
+                if parse_number(value) is not None:
+                    self.numeric[name] = array("d")
+                else:
+                    self.text[name] = []
+
+        for name, value in zip(self.header, values):
+            column = self.numeric.get(name)
+            if column is not None:
+                number = parse_number(value)
+                if number is None:
+                    self._promote_to_text(name)
+                    self.text[name].append(value)
+                else:
+                    column.append(number)
+            else:
+                self.text[name].append(value)
+
+        self.timestamps.append(parse_timestamp(values[self.header.index("Timestamp")])
+                               if "Timestamp" in self.header else NAN)
+        self._length += 1
+
+    def _promote_to_text(self, name: str):
+        """Turn a numeric column into a text column after a non-numeric value"""
+        column = self.numeric.pop(name)
+        self.text[name] = ["" if math.isnan(v) else repr(to_json_number(v)) for v in column]
+
+    def column(self, name: str, start: int = 0, stop: Optional[int] = None) -> list:
+        """Return one column as JSON friendly values"""
+        if name in self.numeric:
+            return [to_json_number(v) for v in self.numeric[name][start:stop]]
+        if name in self.text:
+            return self.text[name][start:stop]
+        if name in self.header:
+            # Column types are only known once the first row arrives
+            return []
+        raise KeyError(name)
+
+    def rows(self, start: int = 0, stop: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Return rows as dicts with numeric values already parsed"""
+        stop = self._length if stop is None else min(stop, self._length)
+        columns = {name: self.column(name, start, stop) for name in self.header}
+        return [
+            {name: columns[name][i] for name in self.header}
+            for i in range(stop - start if stop > start else 0)
+        ]
+
+    def columnar(self, start: int = 0, stop: Optional[int] = None,
+                 fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Return {"count", "columns": {name: [values]}} for the selected rows and fields"""
+        stop = self._length if stop is None else min(stop, self._length)
+        names = [f for f in (fields or self.header) if f in self.header]
+        return {
+            "start": start,
+            "count": max(0, stop - start),
+            "columns": {name: self.column(name, start, stop) for name in names},
+        }
+
+    def index_after(self, since: Optional[str]) -> int:
+        """
+        Return the index of the first row after `since`
+
+        Small integers (< 1e9) are a row count the caller already has; anything
+        else is compared with the parsed Timestamp column.
+        """
+        if since is None or since == "":
+            return 0
+        number = parse_number(str(since))
+        if number is not None and not math.isnan(number) and number.is_integer() and 0 <= number < 1e9:
+            return min(int(number), self._length)
+
+        since_ts = parse_timestamp(since)
+        if not math.isnan(since_ts) and self._length and not math.isnan(self.timestamps[0]):
+            # Rows are appended in time order, so the parsed timestamps are sorted
+            return bisect_right(self.timestamps, since_ts)
+
+        # Timestamps that could not be parsed: compare the raw text instead
+        raw = self.column("Timestamp") if "Timestamp" in self.header else []
+        for i, value in enumerate(raw):
+            if str(value) > str(since):
+                return i
+        return self._length
+
+
+def table_from_csv(data: bytes) -> StatsTable:
+    """Parse a complete cyperf CSV file (header row first)"""
+    table = None
+    for values in csv.reader(data.decode("utf-8", errors="replace").splitlines()):
+        if not values:
+            continue
+        if table is None:
+            table = StatsTable(values)
+        else:
+            table.append(values)
+    return table if table is not None else StatsTable([])
@@ -0,0 +1,187 @@
+"""
+Server-side projection, time windows and downsampling for stats tables.
+
+Long tests produce thousands of rows while charts and LLM tool calls only
+need a few hundred points. run_query() selects columns and a time window
+from a StatsTable and aggregates rows into time (or row-count) buckets with
+vectorized numpy reductions. numpy is imported on the first query so that
+importing the service layer stays cheap.
+"""
+
+import math
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+from app.services.stats_model import StatsTable, parse_timestamp, to_json_number
+
+if TYPE_CHECKING:
+    import numpy as np
+
+AGGREGATES = ("mean", "min", "max", "sum", "last")
+_PERCENTILE = re.compile(r"^p(\d{1,2}(?:\.\d+)?)$")
+_DURATION = re.compile(r"^(\d+(?:\.\d+)?)(ms|s|m|h)?$")
+_DURATION_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def parse_duration(value: str) -> float:
+    """Parse '500ms', '10s', '5m', '1h' or a plain number of seconds"""
+    match = _DURATION.match(value.strip())
+    if not match or float(match.group(1)) <= 0:
+        raise ValueError(f"Invalid bucket duration: {value}")
+    return float(match.group(1)) * _DURATION_UNITS[match.group(2)]
+
+
+@dataclass
+class StatsQuery:
+    """Projection / window / bucketing options for a stats request"""
+    fields: Optional[List[str]] = None
+    bucket: Optional[float] = None
+    agg: str = "mean"
+    start: Optional[float] = None
+    end: Optional[float] = None
+    max_points: Optional[int] = None
+    tail: Optional[int] = None
+
+    @classmethod
+    def from_params(cls, fields: Optional[str] = None, bucket: Optional[str] = None, agg: str = "mean",
+                    start: Optional[str] = None, end: Optional[str] = None,
+                    max_points: Optional[int] = None, tail: Optional[int] = None) -> Optional["StatsQuery"]:
+        """
+        Build a query from request parameters, or None when nothing was requested
+
+        Raises:
+            ValueError: For malformed parameters
+        """
+        if not any([fields, bucket, start, end, max_points, tail]):
+            return None
+        if agg not in AGGREGATES and not _PERCENTILE.match(agg):
+            raise ValueError(f"Invalid agg: {agg} (use {', '.join(AGGREGATES)} or pNN)")
+        if max_points is not None and max_points < 1:
+            raise ValueError("max_points must be positive")
+        if tail is not None and tail < 1:
+            raise ValueError("tail must be positive")
+        window = []
+        for label, value in (("start", start), ("end", end)):
+            if value is None:
+                window.append(None)
+                continue
+            parsed = parse_timestamp(value)
+            if math.isnan(parsed):
+                raise ValueError(f"Invalid {label} timestamp: {value}")
+            window.append(parsed)
+        return cls(
+            fields=[f.strip() for f in fields.split(",") if f.strip()] if fields else None,
+            bucket=parse_duration(bucket) if bucket else None,
+            agg=agg,
+            start=window[0],
+            end=window[1],
+            max_points=max_points,
+            tail=tail,
+        )
+
+
+def _reduce(values: "np.ndarray", starts: "np.ndarray", agg: str) -> "np.ndarray":
+    """Aggregate consecutive groups of values (group i begins at starts[i]), ignoring NaN"""
+    import numpy as np
+
+    if agg == "last":
+        ends = np.append(starts[1:], len(values)) - 1
+        return values[ends]
+    valid = ~np.isnan(values)
+    counts = np.add.reduceat(valid.astype(np.int64), starts)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if agg == "mean":
+            result = np.add.reduceat(np.where(valid, values, 0.0), starts) / counts
+        elif agg == "sum":
+            result = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        elif agg == "min":
+            result = np.fmin.reduceat(values, starts)
+        elif agg == "max":
+            result = np.fmax.reduceat(values, starts)
+        else:
+            q = float(_PERCENTILE.match(agg).group(1))
+            result = np.array([
+                np.nanpercentile(group, q) if np.any(~np.isnan(group)) else np.nan
+                for group in np.split(values, starts[1:])
+            ])
+    result = result.astype(np.float64)
+    result[counts == 0] = np.nan
+    return result
+
+
+def run_query(table: StatsTable, query: StatsQuery, first_index: int = 0) -> Dict[str, list]:
+    """
+    Apply a StatsQuery to rows first_index.. of a table
+
+    Rows are windowed by time, then limited to the last query.tail rows, then
+    bucketed.
+
+    Returns:
+        {column name: [values]} with Timestamp first. For bucketed queries each
+        output row is one bucket: Timestamp is that of the bucket's first row and
+        numeric columns are aggregated with query.agg.
+    """
+    import numpy as np
+
+    stop = len(table)
+    first_index = min(first_index, stop)
+    timestamps = np.frombuffer(table.timestamps[first_index:stop], dtype=np.float64)
+
+    # Time window on the parsed Timestamp column
+    keep = np.ones(len(timestamps), dtype=bool)
+    if query.start is not None:
+        keep &= timestamps >= query.start
+    if query.end is not None:
+        keep &= timestamps <= query.end
+    indices = np.nonzero(keep)[0]
+    if query.tail:
+        indices = indices[-query.tail:]
+
+    names = [n for n in (query.fields or table.header) if n in table.header]
+    if "Timestamp" in table.header and "Timestamp" not in names:
+        names.insert(0, "Timestamp")
+
+    # Group boundaries: fixed time buckets, or fixed row counts to honour max_points
+    if len(indices) == 0:
+        starts = np.array([], dtype=np.int64)
+    elif query.bucket and not np.isnan(timestamps[indices]).any():
+        bucket_ids = np.floor(timestamps[indices] / query.bucket).astype(np.int64)
+        starts = np.flatnonzero(np.diff(bucket_ids, prepend=bucket_ids[0] - 1))
+    elif query.bucket or query.max_points:
+        size = 1
+        if query.max_points:
+            size = max(1, math.ceil(len(indices) / query.max_points))
+        starts = np.arange(0, len(indices), size)
+    else:
+        starts = None
+
+    # max_points also caps time bucketing by merging neighbouring buckets
+    if starts is not None and query.max_points and len(starts) > query.max_points:
+        starts = starts[::math.ceil(len(starts) / query.max_points)]
+
+    columns: Dict[str, list] = {}
+    for name in names:
+        if name in table.numeric:
+            values = np.frombuffer(table.numeric[name][first_index:stop], dtype=np.float64)[indices]
+            if starts is not None and name == "Timestamp":
+                values = values[starts]
+            elif starts is not None and len(starts):
+                values = _reduce(values, starts, query.agg)
+            columns[name] = [to_json_number(float(v)) for v in values]
+        else:
+            # Text columns, and columns of a header-only table whose type is not known yet
+            text = table.column(name, first_index, stop)
+            selected = [text[i] for i in indices]
+            if starts is not None:
+                selected = [selected[i] for i in starts]
+            columns[name] = selected
+    return columns
+
+
+def columns_to_rows(columns: Dict[str, list]) -> List[Dict[str, Any]]:
+    """Turn {name: [values]} into a list of row dicts"""
+    names = list(columns)
+    count = len(columns[names[0]]) if names else 0
+    return [{name: columns[name][i] for name in names} for i in range(count)]
+
@@ -0,0 +1,139 @@
+"""
+Incremental reader for cyperf CSV stats files.
+
+cyperf appends one row per interval to {test_id}_{role}.csv. Instead of
+re-downloading and re-parsing the whole file on every poll, the reader
+remembers the byte offset of the last complete line it has consumed for
+each (test_id, role) and only transfers the bytes appended since then. New
+rows are parsed straight into a StatsTable and folded into a RunningSummary.
+
+State is dropped when a test ends, and at most max_files files are tracked at
+once (least recently read first out), so memory does not grow with the number
+of tests a long-running controller has seen.
+"""
+
+import csv
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple
+
+from app.services.running_stats import RunningSummary
+from app.services.stats_model import StatsTable
+
+StatsKey = Tuple[str, str]
+
+# Files whose parsed rows are kept between reads
+MAX_TRACKED_FILES = 256
+
+
+@dataclass
+class _CSVTailState:
+    """Per-file read position and parsed rows"""
+    summary: RunningSummary
+    offset: int = 0
+    table: Optional[StatsTable] = None
+    lock: threading.Lock = field(default_factory=threading.Lock)
+
+
+class IncrementalCSVReader:
+    """Tail-reads remote CSV stats files over SFTP using byte offsets"""
+
+    def __init__(self, metrics: Sequence[str], max_files: int = MAX_TRACKED_FILES):
+        """
+        Args:
+            metrics: Columns folded into each file's RunningSummary
+            max_files: Files tracked at once; an evicted file is re-read from the start when next polled
+        """
+        self.metrics = tuple(metrics)
+        self.max_files = max_files
+        self._states: "OrderedDict[StatsKey, _CSVTailState]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _state(self, key: StatsKey) -> _CSVTailState:
+        with self._lock:
+            if key in self._states:
+                self._states.move_to_end(key)
+            else:
+                self._states[key] = _CSVTailState(summary=RunningSummary(self.metrics))
+                while len(self._states) > self.max_files:
+                    self._states.popitem(last=False)
+            return self._states[key]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._states)
+
+    def forget(self, test_id: str):
+        """Drop cached state for every role of test_id"""
+        with self._lock:
+            for key in [k for k in self._states if k[0] == test_id]:
+                del self._states[key]
+
+    def row_count(self, test_id: str, role: str) -> int:
+        """Number of rows read so far for test_id/role"""
+        with self._lock:
+            state = self._states.get((test_id, role))
+        return len(state.table) if state and state.table else 0
+
+    def summary(self, test_id: str, role: str) -> Optional[RunningSummary]:
+        """Running aggregates of the rows read so far for test_id/role"""
+        with self._lock:
+            state = self._states.get((test_id, role))
+        return state.summary if state else None
+
+    def read(self, sftp, path: str, test_id: str, role: str) -> StatsTable:
+        """
+        Bring the cached rows for test_id/role up to date and return them
+
+        Args:
+            sftp: Open paramiko SFTPClient
+            path: Remote CSV path
+            test_id: Test ID the file belongs to
+            role: 'server' or 'client'
+
+        Returns:
+            The table of all rows parsed so far (shared; callers must not modify it)
+
+        Raises:
+            FileNotFoundError: If the remote file does not exist
+        """
+        state = self._state((test_id, role))
+        with state.lock:
+            size = sftp.stat(path).st_size
+            if size < state.offset:
+                # File was truncated or replaced, start over
+                state.offset = 0
+                state.table = None
+                state.summary = RunningSummary(self.metrics)
+            if size == state.offset:
+                return self._table(state)
+
+            with sftp.open(path, 'r') as f:
+                f.seek(state.offset)
+                data = f.read(size - state.offset)
+
+            # Only consume complete lines; a partially written row is re-read next time
+            end = data.rfind(b'\n')
+            if end < 0:
+                return self._table(state)
+            chunk = data[:end + 1]
+            state.offset += len(chunk)
+
+            before = len(state.table) if state.table is not None else 0
+            lines = chunk.decode('utf-8', errors='replace').splitlines()
+            for values in csv.reader(lines):
+                if not values:
+                    continue
+                if state.table is None:
+                    state.table = StatsTable(values)
+                    continue
+                state.table.append(values)
+            if state.table is not None:
+                state.summary.update(state.table, before, len(state.table))
+            return self._table(state)
+
+    @staticmethod
+    def _table(state: _CSVTailState) -> StatsTable:
+        # A file without a header yet reads as an empty table
+        return state.table if state.table is not None else StatsTable([])
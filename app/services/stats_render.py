@@ -0,0 +1,179 @@
+"""
+Stats image rendering.
+
+PNG rendering runs in a small pool of worker processes so a large figure
+cannot hold the GIL of the API process, and a render that takes too long can
+be abandoned by terminating its worker. Workers select the Agg backend and
+draw one throwaway figure when they start, so font loading is paid once per
+worker instead of on the first request.
+
+matplotlib is only imported inside the workers (or in-process when the pool
+is disabled), never when this module is imported.
+"""
+
+import math
+import multiprocessing
+import threading
+from io import BytesIO
+from typing import Any, Dict, List, Optional
+
+from app.services.stats_model import parse_timestamp
+
+# Metrics drawn in chart mode, one panel per group
+CHART_PANELS = [
+    ("Throughput (bps)", ["Throughput", "ThroughputTX", "ThroughputRX"]),
+    ("Connections / s", ["ConnectionRate"]),
+]
+MAX_TABLE_ROWS = 40
+
+
+def _warm_up():
+    """Worker initializer: load matplotlib with the Agg backend and its font cache"""
+    import matplotlib
+    matplotlib.use("Agg")
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(1, 1))
+    fig.add_subplot().plot([0, 1], [0, 1])
+    fig.savefig(BytesIO(), format="png")
+
+
+def _png(fig) -> bytes:
+    out = BytesIO()
+    # Low zlib effort: encoding dominates small renders and the PNG stays small
+    fig.savefig(out, format="png", pil_kwargs={"compress_level": 1})
+    return out.getvalue()
+
+
+def _format_cell(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return f"{value:.6g}"
+    return str(value)
+
+
+def render_table(header: List[str], rows: List[List[Any]], title: str) -> bytes:
+    """Render rows (already truncated to one page) as a PNG table"""
+    from matplotlib.figure import Figure
+
+    # One monospace line per row: far cheaper to lay out than a Text per cell
+    cells = [[_format_cell(v) for v in row] for row in rows]
+    widths = [max([len(name)] + [len(row[i]) for row in cells]) + 2 for i, name in enumerate(header)]
+    lines = ["".join(value.rjust(w) for value, w in zip(line, widths)) for line in [header] + cells]
+
+    font_size = 8
+    row_height = font_size * 1.5 / 72  # inches
+    char_width = font_size * 0.64 / 72
+    units = len(lines) + 2.5  # title, header, rows and padding, in rows
+    fig = Figure(figsize=(sum(widths) * char_width + 0.5, units * row_height), dpi=100)
+    ax = fig.add_axes([0, 0, 1, 1])
+    ax.axis("off")
+    ax.set_xlim(0, 1)
+    ax.set_ylim(units, 0)
+    ax.text(0.01, 0.9, title, va="center", fontsize=font_size + 2)
+    for i, line in enumerate(lines):
+        y = i + 2
+        if i % 2 == 0 and i:
+            ax.axhspan(y - 0.5, y + 0.5, color="#eef2f7", zorder=0)
+        ax.text(0.01, y, line, va="center", family="monospace", fontsize=font_size,
+                fontweight="bold" if i == 0 else "normal")
+    ax.axhline(2.5, color="#555555", linewidth=0.8)
+    return _png(fig)
+
+
+def render_chart(x: List[float], xlabel: str, series: Dict[str, List[Optional[float]]], title: str) -> bytes:
+    """Render a time-series chart with one panel per CHART_PANELS group present in series"""
+    from matplotlib.figure import Figure
+
+    panels = [(label, [n for n in names if n in series]) for label, names in CHART_PANELS]
+    panels = [(label, names) for label, names in panels if names] or [("", list(series))]
+    fig = Figure(figsize=(12, 3 * len(panels) + 0.6), dpi=100)
+    axes = fig.subplots(len(panels), 1, sharex=True, squeeze=False)[:, 0]
+    for ax, (label, names) in zip(axes, panels):
+        for name in names:
+            ax.plot(x, [math.nan if v is None else v for v in series[name]], label=name, linewidth=1.2)
+        ax.set_ylabel(label)
+        ax.grid(True, alpha=0.3)
+        ax.legend(loc="upper left", fontsize=8)
+    axes[-1].set_xlabel(xlabel)
+    fig.suptitle(title)
+    fig.tight_layout()
+    return _png(fig)
+
+
+class StatsImageRenderer:
+    """Renders stats tables and charts on a worker process pool with a timeout"""
+
+    def __init__(self, workers: int = 2, timeout: float = 10.0, table_rows: int = MAX_TABLE_ROWS):
+        """
+        Args:
+            workers: Worker processes (0 renders in the calling thread)
+            timeout: Seconds before a render is abandoned and its worker terminated
+            table_rows: Rows per page in table mode
+        """
+        self.workers = workers
+        self.timeout = timeout
+        self.table_rows = table_rows
+        self._pool = None
+        self._lock = threading.Lock()
+        self._warm = False
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: forking a process that holds SSH threads and locks is unsafe
+                context = multiprocessing.get_context("spawn")
+                self._pool = context.Pool(self.workers, initializer=_warm_up)
+            return self._pool
+
+    def _run(self, fn, *args) -> bytes:
+        if self.workers <= 0:
+            if not self._warm:
+                _warm_up()
+                self._warm = True
+            return fn(*args)
+        pool = self._get_pool()
+        try:
+            return pool.apply_async(fn, args).get(self.timeout)
+        except multiprocessing.TimeoutError:
+            # The stuck worker cannot be cancelled individually, so replace the pool
+            with self._lock:
+                if self._pool is pool:
+                    self._pool = None
+            pool.terminate()
+            raise Exception(f"Stats image render timed out after {self.timeout}s")
+
+    def table(self, stats: List[Dict[str, Any]], keys: List[str], page: Optional[int] = None) -> BytesIO:
+        """
+        Render one page of stats rows as a table
+
+        Args:
+            page: 0-based page of table_rows rows; None (default) is the latest page
+        """
+        pages = max(1, math.ceil(len(stats) / self.table_rows))
+        page = pages - 1 if page is None else max(0, min(page, pages - 1))
+        first = page * self.table_rows
+        rows = [[row.get(k) for k in keys] for row in stats[first:first + self.table_rows]]
+        title = f"Rows {first + 1}-{first + len(rows)} of {len(stats)} (page {page + 1}/{pages})"
+        return BytesIO(self._run(render_table, keys, rows, title))
+
+    def chart(self, stats: List[Dict[str, Any]], keys: List[str]) -> BytesIO:
+        """Render throughput and connection rate over time"""
+        timestamps = [parse_timestamp(row.get("Timestamp")) for row in stats]
+        if stats and not any(math.isnan(t) for t in timestamps):
+            x = [t - timestamps[0] for t in timestamps]
+            xlabel = "Elapsed (s)"
+        else:
+            x = list(range(len(stats)))
+            xlabel = "Sample"
+        series = {
+            k: [row.get(k) if isinstance(row.get(k), (int, float)) else None for row in stats]
+            for k in keys if k != "Timestamp"
+        }
+        return BytesIO(self._run(render_chart, x, xlabel, series, f"{len(stats)} samples"))
+
+    def close(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.terminate()
@@ -0,0 +1,185 @@
+"""
+Live stats streaming for running tests.
+
+One StatsStreamHub keeps a single remote `tail -F` channel open per test and
+role and fans every new CSV row out to all subscribers (e.g. SSE clients),
+so N viewers of a test cost one SSH channel per agent instead of N pollers.
+
+Tails run on dedicated SSH connections rather than pooled session slots,
+since they stay open for the whole test. A tail ends by itself when the
+cyperf process it follows exits (`tail --pid`), or when the test is stopped
+through close(); once every tail of a test has ended, subscribers get an
+"end" event.
+"""
+
+import asyncio
+import csv
+import shlex
+import socket
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Deque, Dict, List, Optional, Tuple
+
+from app.services.stats_model import typed_row
+
+# (role, hostname, remote csv path, PID of the cyperf process writing it or None)
+StreamSource = Tuple[str, str, str, Optional[int]]
+
+# Events a slow subscriber may fall behind by before events are dropped for it
+SUBSCRIBER_QUEUE_SIZE = 1000
+# Newest events per test replayed to a new subscriber; below SUBSCRIBER_QUEUE_SIZE so a replay always fits
+STREAM_HISTORY_ROWS = 500
+
+
+@dataclass
+class StatsSubscription:
+    """A subscriber's view of a test stream"""
+    test_id: str
+    queue: asyncio.Queue
+    loop: asyncio.AbstractEventLoop
+    dropped: int = 0
+
+    def offer(self, event: Dict[str, Any]):
+        """Queue an event from any thread, dropping it if the subscriber is too slow"""
+        def _put():
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += 1
+        self.loop.call_soon_threadsafe(_put)
+
+
+@dataclass
+class _TestStream:
+    """Remote tail channels and subscribers for one test"""
+    test_id: str
+    sources: List[StreamSource]
+    subscribers: List[StatsSubscription] = field(default_factory=list)
+    history: Deque[Dict[str, Any]] = field(default_factory=lambda: deque(maxlen=STREAM_HISTORY_ROWS))
+    stop: threading.Event = field(default_factory=threading.Event)
+    threads: List[threading.Thread] = field(default_factory=list)
+    running: int = 0
+
+
+class StatsStreamHub:
+    """Shares one remote tail per test between all stream subscribers"""
+
+    def __init__(self, open_session: Callable[[str], Any]):
+        """
+        Args:
+            open_session: Context manager factory yielding an SSHClient for a
+                hostname; tails hold it for the whole test, so it should not
+                be a pooled session slot
+        """
+        self._open_session = open_session
+        self._streams: Dict[str, _TestStream] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, test_id: str, sources: List[StreamSource],
+                  loop: Optional[asyncio.AbstractEventLoop] = None) -> StatsSubscription:
+        """
+        Subscribe to the rows of test_id, starting the remote tails if needed
+
+        The newest events already seen by the stream (up to STREAM_HISTORY_ROWS)
+        are replayed to the new subscriber first.
+        """
+        subscription = StatsSubscription(
+            test_id=test_id,
+            queue=asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE),
+            loop=loop or asyncio.get_running_loop(),
+        )
+        with self._lock:
+            stream = self._streams.get(test_id)
+            if stream is None:
+                stream = _TestStream(test_id=test_id, sources=sources)
+                self._streams[test_id] = stream
+                stream.running = len(sources)
+                for role, hostname, path, pid in sources:
+                    thread = threading.Thread(
+                        target=self._tail,
+                        args=(stream, role, hostname, path, pid),
+                        daemon=True,
+                    )
+                    stream.threads.append(thread)
+                    thread.start()
+            for event in stream.history:
+                subscription.offer(event)
+            stream.subscribers.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: StatsSubscription):
+        """Remove a subscriber; the remote tails stop with the last one"""
+        with self._lock:
+            stream = self._streams.get(subscription.test_id)
+            if stream is None:
+                return
+            if subscription in stream.subscribers:
+                stream.subscribers.remove(subscription)
+            if not stream.subscribers:
+                stream.stop.set()
+                del self._streams[subscription.test_id]
+
+    def close(self, test_id: str):
+        """Stop the remote tails of a test (e.g. once it is stopped); subscribers then get an end event"""
+        with self._lock:
+            stream = self._streams.get(test_id)
+        if stream is not None:
+            stream.stop.set()
+
+    def active_streams(self) -> Dict[str, int]:
+        """Return the number of subscribers per streamed test"""
+        with self._lock:
+            return {test_id: len(s.subscribers) for test_id, s in self._streams.items()}
+
+    def _publish(self, stream: _TestStream, event: Dict[str, Any]):
+        with self._lock:
+            stream.history.append(event)
+            subscribers = list(stream.subscribers)
+        for subscription in subscribers:
+            subscription.offer(event)
+
+    def _tail(self, stream: _TestStream, role: str, hostname: str, path: str, pid: Optional[int]):
+        """Follow a remote CSV file and publish each complete row until the writer exits"""
+        header = None
+        buffer = b""
+        # With --pid, tail exits after printing the last rows once cyperf has exited
+        follow = f"tail -n +1 -F --pid={int(pid)}" if pid else "tail -n +1 -F"
+        try:
+            with self._open_session(hostname) as ssh:
+                channel = ssh.get_transport().open_session()
+                # A pty makes the remote tail exit (SIGHUP) when the channel closes
+                channel.get_pty()
+                channel.exec_command(f"{follow} {shlex.quote(path)}")
+                channel.settimeout(1.0)
+                try:
+                    while not stream.stop.is_set():
+                        try:
+                            data = channel.recv(65536)
+                        except socket.timeout:
+                            continue
+                        if not data:
+                            break
+                        buffer += data
+                        *lines, buffer = buffer.split(b"\n")
+                        for line in lines:
+                            text = line.decode("utf-8", errors="replace").strip("\r")
+                            # Skip blank lines and tail's own notices
+                            if not text or text.startswith("tail:"):
+                                continue
+                            values = next(csv.reader([text]))
+                            if header is None or values == header:
+                                header = values
+                                continue
+                            self._publish(stream, {"role": role, "row": typed_row(header, values)})
+                finally:
+                    channel.close()
+        except Exception as e:
+            print(f"Stats stream for {stream.test_id} ({role}@{hostname}) failed: {e}")
+            self._publish(stream, {"role": role, "error": str(e)})
+        finally:
+            with self._lock:
+                stream.running -= 1
+                ended = stream.running == 0
+            if ended:
+                self._publish(stream, {"end": True})
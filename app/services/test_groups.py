@@ -0,0 +1,249 @@
+"""
+Multi-agent test groups.
+
+A test group launches several cyperf servers and clients (1:N or N:M) as one
+unit. Every member process gets its own test_id, so the existing per-test
+stats, logs and stop operations keep working, and the group adds concurrent
+launch across hosts plus stats aggregated over all members.
+"""
+
+import asyncio
+import uuid
+from typing import Any, Dict, List, Optional
+
+from app.services.async_service import AsyncCyperfService
+from app.services.cyperf_service import CyperfService
+
+# Metrics averaged across members instead of summed
+AVERAGED_METRICS = {"AverageConnectionLatency"}
+
+
+def _to_float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def aggregate_rows(member_rows: List[List[Dict[str, str]]], align: str = "index") -> List[Dict[str, Any]]:
+    """
+    Combine the CSV rows of several members into one row per interval
+
+    Args:
+        member_rows: Rows of each member
+        align: 'index' pairs the n-th row of every member (robust to clock skew
+               between agents); 'timestamp' groups rows with equal Timestamp values
+
+    Returns:
+        Rows with the Timestamp, the number of contributing members and each
+        ALLOWED_KEYS metric summed (or averaged, for latencies)
+    """
+    metrics = [k for k in CyperfService.ALLOWED_KEYS if k != "Timestamp"]
+    buckets: Dict[Any, List[Dict[str, str]]] = {}
+    order: List[Any] = []
+    for rows in member_rows:
+        for index, row in enumerate(rows):
+            if align == "index":
+                key = index
+            else:
+                # Numeric timestamps group by value ("5" and "5.0" are one interval)
+                timestamp = _to_float(row.get("Timestamp"))
+                key = timestamp if timestamp is not None else str(row.get("Timestamp", ""))
+            if key not in buckets:
+                buckets[key] = []
+                order.append(key)
+            buckets[key].append(row)
+
+    # Members may start at different times, so first-seen order is not time order;
+    # rows without a numeric Timestamp keep their order after the others
+    order.sort(key=lambda key: (isinstance(key, str), 0 if isinstance(key, str) else key))
+
+    aggregated = []
+    for key in order:
+        rows = buckets[key]
+        out: Dict[str, Any] = {"Timestamp": rows[0].get("Timestamp", ""), "Members": len(rows)}
+        for metric in metrics:
+            values = [v for v in (_to_float(r.get(metric)) for r in rows) if v is not None]
+            if not values:
+                continue
+            total = sum(values)
+            out[metric] = total / len(values) if metric in AVERAGED_METRICS else total
+        aggregated.append(out)
+    return aggregated
+
+
+# Registry statuses a member reports as RUNNING
+_RUNNING_STATUSES = {"RUNNING", "SERVER_RUNNING"}
+
+
+class TestGroupManager:
+    """
+    Launches, tracks and aggregates groups of cyperf tests
+
+    Group membership lives on the members' registry records (group_id,
+    member_role, member_host, member_index), so groups survive a restart
+    whenever the registry is persisted.
+    """
+
+    def __init__(self, async_service: AsyncCyperfService):
+        self.async_service = async_service
+        self.service = async_service.service
+
+    def _register_member(self, group_id: str, role: str, index: int, host: str, **fields):
+        self.service.active_tests.register(
+            f"{group_id}-{role[0]}{index}",
+            group_id=group_id,
+            member_role=role,
+            member_host=host,
+            member_index=index,
+            status="STARTING",
+            **fields,
+        )
+
+    async def _start_server_member(self, test_id: str, host: str, params: Dict[str, Any]):
+        # start_server replaces the record, so the membership fields are merged back in
+        member = self.service.active_tests.get(test_id)
+        membership = {k: member[k] for k in ("group_id", "member_role", "member_host", "member_index")}
+        try:
+            await self.async_service.start_server(test_id, host, params)
+            self.service.active_tests.update(test_id, **membership)
+        except Exception as e:
+            self.service.active_tests.update(test_id, status="FAILED", error=str(e))
+
+    async def _start_client_member(self, test_id: str, server_ip: str, host: str, params: Dict[str, Any]):
+        # Client members share their server's process, so their records carry no server PID
+        try:
+            await self.async_service.start_client(test_id, server_ip, host, params)
+        except Exception as e:
+            self.service.active_tests.update(test_id, status="FAILED", error=str(e))
+
+    async def start_group(self, servers: List[Dict[str, Any]], clients: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Start all servers concurrently, then all clients concurrently
+
+        Args:
+            servers: [{"server_ip": ..., "params": {...}}]
+            clients: [{"client_ip": ..., "server_ip": ..., "params": {...}}]
+
+        Returns:
+            The group record with per-member test_id, PID, status and error
+        """
+        group_id = str(uuid.uuid4())
+        for index, server in enumerate(servers):
+            self._register_member(group_id, "server", index, server["server_ip"])
+        for index, client in enumerate(clients):
+            self._register_member(group_id, "client", index, client["client_ip"], server_ip=client["server_ip"])
+
+        await asyncio.gather(*(
+            self._start_server_member(f"{group_id}-s{index}", server["server_ip"], server.get("params", {}))
+            for index, server in enumerate(servers)
+        ))
+
+        running_servers = {
+            m["host"] for m in self.get_group(group_id)["members"]
+            if m["role"] == "server" and m["status"] == "RUNNING"
+        }
+        client_starts = []
+        for index, client in enumerate(clients):
+            test_id = f"{group_id}-c{index}"
+            if client["server_ip"] not in running_servers:
+                self.service.active_tests.update(
+                    test_id, status="FAILED",
+                    error=f"Server {client['server_ip']} is not running in this group",
+                )
+                continue
+            client_starts.append(self._start_client_member(
+                test_id, client["server_ip"], client["client_ip"], client.get("params", {})
+            ))
+        await asyncio.gather(*client_starts)
+        return self.get_group(group_id)
+
+    def _records(self, group_id: str) -> List[Dict[str, Any]]:
+        records = [self.service.active_tests.get(test_id) for test_id in self.service.active_tests.ids_in_group(group_id)]
+        records = [r for r in records if r is not None]
+        if not records:
+            raise KeyError(group_id)
+        records.sort(key=lambda r: (r.get("member_role") != "server", r.get("member_index", 0)))
+        return records
+
+    @staticmethod
+    def _member(record: Dict[str, Any]) -> Dict[str, Any]:
+        role = record.get("member_role", "client")
+        status = record.get("status")
+        member = {
+            "group_id": record["group_id"],
+            "test_id": record["test_id"],
+            "role": role,
+            "host": record.get("member_host"),
+            "status": "RUNNING" if status in _RUNNING_STATUSES else status,
+            "pid": record.get(f"{role}_pid"),
+        }
+        if role == "client":
+            member["server_ip"] = record.get("server_ip")
+        if record.get("error"):
+            member["error"] = record["error"]
+        return member
+
+    def get_group(self, group_id: str) -> Dict[str, Any]:
+        """
+        Return the group record, built from its members' registry records
+
+        Raises:
+            KeyError: If no test belongs to group_id
+        """
+        members = [self._member(r) for r in self._records(group_id)]
+        statuses = {m["status"] for m in members}
+        if "STARTING" in statuses:
+            status = "STARTING"
+        elif "RUNNING" in statuses:
+            # Clients that finished on their own leave their servers running
+            status = "PARTIAL" if "FAILED" in statuses else "RUNNING"
+        elif statuses & {"STOPPED", "FINISHED"}:
+            status = "STOPPED"
+        else:
+            status = "FAILED"
+        return {"group_id": group_id, "status": status, "members": members}
+
+    def _launched(self, group_id: str, role: str) -> List[str]:
+        """Members of role whose process was launched, whether or not a PID was recorded"""
+        return [
+            r["test_id"] for r in self._records(group_id)
+            if r.get("member_role") == role and r.get(f"{role}_csv_path")
+        ]
+
+    async def aggregated_stats(self, group_id: str, role: str = "client", align: str = "index") -> Dict[str, Any]:
+        """Fetch every launched member's stats concurrently and aggregate them"""
+        test_ids = self._launched(group_id, role)
+        fetch = self.async_service.get_client_stats if role == "client" else self.async_service.get_server_stats
+        results = await asyncio.gather(*(fetch(test_id) for test_id in test_ids), return_exceptions=True)
+
+        member_rows = []
+        errors = {}
+        for test_id, result in zip(test_ids, results):
+            if isinstance(result, Exception):
+                errors[test_id] = str(result)
+            else:
+                member_rows.append(result)
+        return {
+            "group_id": group_id,
+            "role": role,
+            "members": len(member_rows),
+            "errors": errors,
+            "stats": aggregate_rows(member_rows, align),
+        }
+
+    async def stop_group(self, group_id: str, timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Stop every launched member by test_id (clients first, then servers)"""
+        results: Dict[str, Any] = {}
+        for role in ("client", "server"):
+            test_ids = self._launched(group_id, role)
+            outcomes = await asyncio.gather(
+                *(self.async_service.stop_test(test_id, timeout) for test_id in test_ids),
+                return_exceptions=True,
+            )
+            for test_id, outcome in zip(test_ids, outcomes):
+                if isinstance(outcome, Exception):
+                    results[test_id] = {"error": str(outcome)}
+                else:
+                    results[test_id] = outcome.get(role)
+        return {"group_id": group_id, "status": self.get_group(group_id)["status"], "results": results}
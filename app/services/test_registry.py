@@ -0,0 +1,183 @@
+"""
+Registry of started tests.
+
+Every entry point (REST routes, MCP tools, test groups) records and resolves
+tests through one TestRegistry, so a test started through one of them is
+known to all the others. Records are indexed by agent host, by status and
+by test group, and are persisted through an optional RegistryStore (loaded on first use).
+"""
+
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Set
+
+from app.services.registry_store import RegistryStore
+
+HOST_FIELDS = ("server_ip", "client_ip")
+
+
+class TestRegistry:
+    """Thread-safe test_id -> record store with host, status and group indexes"""
+
+    def __init__(self, store: Optional[RegistryStore] = None):
+        """
+        Args:
+            store: Persistence for the records; None keeps them in memory only
+        """
+        self.store = store
+        self._tests: Dict[str, Dict[str, Any]] = {}
+        self._by_host: Dict[str, Set[str]] = defaultdict(set)
+        self._by_status: Dict[str, Set[str]] = defaultdict(set)
+        self._by_group: Dict[str, Set[str]] = defaultdict(set)
+        self._lock = threading.RLock()
+        self._loaded = store is None
+
+    def _ensure_loaded(self):
+        """Load stored records on first access (caller holds the lock)"""
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            stored = self.store.load()
+        except Exception as e:
+            print(f"Could not load the test registry from {self.store.path}: {e}")
+            return
+        for test_id, record in stored.items():
+            if test_id not in self._tests:
+                self._tests[test_id] = record
+                self._index(test_id)
+
+    def __contains__(self, test_id: str) -> bool:
+        with self._lock:
+            self._ensure_loaded()
+            return test_id in self._tests
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._tests)
+
+    def get(self, test_id: str, default: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Return a copy of a test record"""
+        with self._lock:
+            self._ensure_loaded()
+            record = self._tests.get(test_id)
+            return dict(record) if record is not None else default
+
+    def register(self, test_id: str, **fields) -> Dict[str, Any]:
+        """Create (or replace) the record of test_id"""
+        with self._lock:
+            self._ensure_loaded()
+            if test_id in self._tests:
+                self._unindex(test_id)
+            self._tests[test_id] = dict(fields, test_id=test_id, created_at=time.time())
+            self._index(test_id)
+            return self._persist(test_id)
+
+    def update(self, test_id: str, **fields) -> Dict[str, Any]:
+        """
+        Merge fields into the record of test_id
+
+        Raises:
+            KeyError: If test_id is not registered
+        """
+        with self._lock:
+            self._ensure_loaded()
+            if test_id not in self._tests:
+                raise KeyError(test_id)
+            self._unindex(test_id)
+            self._tests[test_id].update(fields)
+            self._index(test_id)
+            return self._persist(test_id)
+
+    def remove(self, test_id: str):
+        with self._lock:
+            self._ensure_loaded()
+            if test_id in self._tests:
+                self._unindex(test_id)
+                del self._tests[test_id]
+                if self.store is not None:
+                    self.store.delete(test_id)
+
+    def close(self):
+        """Flush pending writes to the store and stop its writer"""
+        if self.store is not None:
+            self.store.close()
+
+    def _persist(self, test_id: str) -> Dict[str, Any]:
+        """Queue the record for the store and return a copy of it"""
+        record = dict(self._tests[test_id])
+        if self.store is not None:
+            self.store.save(record)
+        return record
+
+    def ids_for_host(self, host: str) -> List[str]:
+        """Return the tests with a server or client on host"""
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._by_host.get(host, ()))
+
+    def ids_with_status(self, status: str) -> List[str]:
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._by_status.get(status, ()))
+
+    def ids_in_group(self, group_id: str) -> List[str]:
+        """Return the member tests of a test group"""
+        with self._lock:
+            self._ensure_loaded()
+            return sorted(self._by_group.get(group_id, ()))
+
+    def find(self, host: Optional[str] = None, status: Optional[str] = None,
+             since: Optional[float] = None, until: Optional[float] = None,
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Return copies of the records matching every given filter, newest first
+
+        Args:
+            since, until: Bounds on created_at (epoch seconds)
+        """
+        with self._lock:
+            self._ensure_loaded()
+            ids = set(self._tests)
+            if host is not None:
+                ids &= self._by_host.get(host, set())
+            if status is not None:
+                ids &= self._by_status.get(status, set())
+            records = [self._tests[test_id] for test_id in ids]
+            if since is not None:
+                records = [r for r in records if r.get("created_at", 0) >= since]
+            if until is not None:
+                records = [r for r in records if r.get("created_at", 0) <= until]
+            records.sort(key=lambda r: (r.get("created_at", 0), r["test_id"]), reverse=True)
+            return [dict(r) for r in records[:limit]]
+
+    def _index(self, test_id: str):
+        record = self._tests[test_id]
+        for field in HOST_FIELDS:
+            if record.get(field):
+                self._by_host[record[field]].add(test_id)
+        if record.get("status"):
+            self._by_status[record["status"]].add(test_id)
+        if record.get("group_id"):
+            self._by_group[record["group_id"]].add(test_id)
+
+    def _unindex(self, test_id: str):
+        record = self._tests[test_id]
+        for field in HOST_FIELDS:
+            ids = self._by_host.get(record.get(field))
+            if ids is not None:
+                ids.discard(test_id)
+                if not ids:
+                    del self._by_host[record[field]]
+        ids = self._by_status.get(record.get("status"))
+        if ids is not None:
+            ids.discard(test_id)
+            if not ids:
+                del self._by_status[record["status"]]
+        ids = self._by_group.get(record.get("group_id"))
+        if ids is not None:
+            ids.discard(test_id)
+            if not ids:
+                del self._by_group[record["group_id"]]
@@ -16,6 +16,8 @@ app = Flask(__name__)
 # Configure app based on environment
 env = os.environ.get('FLASK_ENV', 'production')
 app.config.from_object(config.get(env, config['default']))
+logging.basicConfig(format='%(asctime)s %(levelname)s %(name)s %(message)s')
+logging.getLogger('utils.api_client').setLevel(app.config['CYPERF_API_LOG_LEVEL'])
 
 # Import utility modules
 import uuid
@@ -14,6 +14,18 @@ class Config:
         else 'http://localhost:8000/api'
     )
     CYPERF_API_TIMEOUT = int(os.environ.get('CYPERF_API_TIMEOUT', '30'))
+    # Shared deadline for the concurrent server/client requests of a stats snapshot
+    CYPERF_STATS_DEADLINE = float(os.environ.get('CYPERF_STATS_DEADLINE', '10'))
+    # Pooled keep-alive connections to the API, shared by all background threads
+    CYPERF_API_POOL_SIZE = int(os.environ.get('CYPERF_API_POOL_SIZE', '20'))
+    # API client logging: level and how much of each request/response body a debug line shows
+    CYPERF_API_LOG_LEVEL = os.environ.get('CYPERF_API_LOG_LEVEL', 'WARNING')
+    CYPERF_API_LOG_BODY_CHARS = int(os.environ.get('CYPERF_API_LOG_BODY_CHARS', '500'))
+    # Test scheduler: concurrent stats polls, and tests fetched per batched poll request
+    STATS_POLL_WORKERS = int(os.environ.get('STATS_POLL_WORKERS', '8'))
+    STATS_POLL_BATCH_SIZE = int(os.environ.get('STATS_POLL_BATCH_SIZE', '50'))
+    # Concurrent test starts/stops, on their own threads so they never delay stats polls
+    TEST_LIFECYCLE_WORKERS = int(os.environ.get('TEST_LIFECYCLE_WORKERS', '8'))
     
     # Test Configuration Defaults
     DEFAULT_TEST_DURATION = int(os.environ.get('DEFAULT_TEST_DURATION', '60'))
@@ -7,33 +7,76 @@ Provides methods for starting/stopping tests, fetching statistics, and retrievin
 
 import requests
 import json
+import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from typing import Dict, Optional, List, Any
-from flask import current_app
+from flask import current_app, has_app_context
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+def _preview(value: Any, limit: int) -> str:
+    """Short printable form of a payload for debug logs"""
+    text = value if isinstance(value, str) else repr(value)
+    if len(text) <= limit:
+        return text
+    return f"{text[:limit]}... ({len(text)} chars)"
 
 
 class CyperfAPIClient:
     """Client for communicating with cyperf-ce REST API"""
     
-    def __init__(self, base_url: str = None, timeout: int = 30):
+    DEFAULT_HEADERS = {
+        'Content-Type': 'application/json',
+        'Accept': 'application/json',
+        'Accept-Encoding': 'gzip, deflate',
+        'Connection': 'keep-alive'
+    }
+    
+    def __init__(self, base_url: str = None, timeout: int = 30, stats_deadline: float = None,
+                 pool_size: int = None, log_body_chars: int = None):
         """
         Initialize the API client
         
+        The client is safe to share between threads: each thread gets its own
+        requests.Session, and all sessions share one keep-alive connection
+        pool of pool_size connections.
+        
         Args:
             base_url: Base URL for the cyperf-ce API
             timeout: Request timeout in seconds
+            stats_deadline: Seconds get_combined_stats waits for both sides (defaults to timeout)
+            pool_size: Maximum pooled connections to the API
+            log_body_chars: Characters of request/response bodies included in debug logs
         """
+        app_config = current_app.config if has_app_context() else {}
         self.base_url = base_url or current_app.config.get('CYPERF_API_BASE_URL', 'http://localhost:8000/api')
         self.timeout = timeout or current_app.config.get('CYPERF_API_TIMEOUT', 30)
-        self.session = requests.Session()
-        
-        # Set default headers
-        self.session.headers.update({
-            'Content-Type': 'application/json',
-            'Accept': 'application/json'
-        })
+        self.stats_deadline = stats_deadline or app_config.get('CYPERF_STATS_DEADLINE') or self.timeout
+        self.pool_size = pool_size or app_config.get('CYPERF_API_POOL_SIZE', 20)
+        self.log_body_chars = log_body_chars or app_config.get('CYPERF_API_LOG_BODY_CHARS', 500)
+        # Runs the server and client halves of get_combined_stats concurrently
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="cyperf-stats")
+        # Block for a free connection rather than opening unpooled ones when all are busy
+        self._adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size, pool_block=True)
+        self._local = threading.local()
+    
+    @property
+    def session(self) -> requests.Session:
+        """This thread's session (all of them share one connection pool)"""
+        session = getattr(self._local, 'session', None)
+        if session is None:
+            session = requests.Session()
+            session.headers.update(self.DEFAULT_HEADERS)
+            session.mount('http://', self._adapter)
+            session.mount('https://', self._adapter)
+            self._local.session = session
+        return session
     
-    def _make_request(self, method: str, endpoint: str, data: Dict = None) -> Dict:
+    def _make_request(self, method: str, endpoint: str, data: Dict = None, timeout: float = None) -> Dict:
         """
         Make HTTP request to the API
         
@@ -41,6 +84,7 @@ class CyperfAPIClient:
             method: HTTP method (GET, POST, etc.)
             endpoint: API endpoint path
             data: Request payload data
+            timeout: Request timeout in seconds (defaults to self.timeout)
             
         Returns:
             Response data as dictionary
@@ -49,19 +93,18 @@ class CyperfAPIClient:
             requests.exceptions.RequestException: For API communication errors
         """
         url = f"{self.base_url.rstrip('/')}/{endpoint.lstrip('/')}"
-        
-        # Log the API call
-        print(f"\n{'='*60}")
-        print(f"[API CALL] {method.upper()} {url}")
-        if data:
-            print(f"[API PAYLOAD] {data}")
-        print(f"{'='*60}")
+        timeout = timeout or self.timeout
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug and data:
+            logger.debug("api_request method=%s url=%s payload=%s",
+                         method.upper(), url, _preview(data, self.log_body_chars))
+        started = time.monotonic()
         
         try:
             if method.upper() == 'GET':
-                response = self.session.get(url, timeout=self.timeout)
+                response = self.session.get(url, timeout=timeout)
             elif method.upper() == 'POST':
-                response = self.session.post(url, json=data, timeout=self.timeout)
+                response = self.session.post(url, json=data, timeout=timeout)
             else:
                 raise ValueError(f"Unsupported HTTP method: {method}")
             
@@ -69,29 +112,27 @@ class CyperfAPIClient:
             
             # Try to parse JSON response
             try:
-                json_response = response.json()
-                print(f"[API RESPONSE] {response.status_code} - JSON Response:")
-                print(f"[API RESPONSE] {json_response}")
-                print(f"{'='*60}\n")
-                return json_response
+                result = response.json()
             except json.JSONDecodeError:
-                print(f"[API RESPONSE] {response.status_code} - Raw Response:")
-                print(f"[API RESPONSE] {response.text}")
-                print(f"{'='*60}\n")
-                return {"raw_response": response.text}
+                result = {"raw_response": response.text}
+            if debug:
+                logger.debug("api_response method=%s url=%s status=%s bytes=%d elapsed_ms=%.1f body=%s",
+                             method.upper(), url, response.status_code, len(response.content),
+                             (time.monotonic() - started) * 1000, _preview(result, self.log_body_chars))
+            return result
                 
         except requests.exceptions.Timeout:
-            error_msg = f"API request timed out after {self.timeout} seconds"
-            print(f"[API ERROR] {error_msg}")
+            error_msg = f"API request timed out after {timeout} seconds"
+            logger.warning("api_error method=%s url=%s error=%s", method.upper(), url, error_msg)
             raise requests.exceptions.RequestException(error_msg)
         except requests.exceptions.ConnectionError:
             error_msg = f"Failed to connect to cyperf-ce API at {url}"
-            print(f"[API ERROR] {error_msg}")
+            logger.warning("api_error method=%s url=%s error=%s", method.upper(), url, error_msg)
             raise requests.exceptions.RequestException(error_msg)
         except requests.exceptions.HTTPError as e:
             error_msg = f"HTTP error {e.response.status_code}: {e.response.text}"
-            print(f"[API ERROR] {error_msg}")
-            print(f"[API ERROR] Full Error Response: {e.response.text}")
+            logger.warning("api_error method=%s url=%s status=%s body=%s", method.upper(), url,
+                           e.response.status_code, _preview(e.response.text, self.log_body_chars))
             raise requests.exceptions.RequestException(error_msg)
     
     def start_server(self, server_ip: str, server_params: Dict) -> Dict:
@@ -148,31 +189,48 @@ class CyperfAPIClient:
         payload = {"server_ip": server_ip}
         return self._make_request('POST', endpoint, payload)
     
-    def get_server_stats(self, test_id: str) -> Dict:
+    def stop_test(self, test_id: str) -> Dict:
+        """
+        Stop only the server and client processes of the specified test
+        
+        Unlike stop_server, other tests running on the same agents are left running.
+        
+        Args:
+            test_id: API test ID to stop
+            
+        Returns:
+            Dictionary with the stop result of each role
+        """
+        endpoint = f"stop_test/{test_id}"
+        return self._make_request('POST', endpoint)
+    
+    def get_server_stats(self, test_id: str, timeout: float = None) -> Dict:
         """
         Get current server statistics for the specified test
         
         Args:
             test_id: Test ID to get stats for
+            timeout: Request timeout in seconds (defaults to self.timeout)
             
         Returns:
             Server statistics data
         """
         endpoint = f"server/stats/{test_id}"
-        return self._make_request('GET', endpoint)
+        return self._make_request('GET', endpoint, timeout=timeout)
     
-    def get_client_stats(self, test_id: str) -> Dict:
+    def get_client_stats(self, test_id: str, timeout: float = None) -> Dict:
         """
         Get current client statistics for the specified test
         
         Args:
             test_id: Test ID to get stats for
+            timeout: Request timeout in seconds (defaults to self.timeout)
             
         Returns:
             Client statistics data
         """
         endpoint = f"client/stats/{test_id}"
-        return self._make_request('GET', endpoint)
+        return self._make_request('GET', endpoint, timeout=timeout)
     
     def get_server_logs(self, test_id: str) -> Dict:
         """
@@ -200,34 +258,105 @@ class CyperfAPIClient:
         endpoint = f"client/logs/{test_id}"
         return self._make_request('GET', endpoint)
     
-    def get_combined_stats(self, test_id: str) -> Dict:
+    def get_combined_stats(self, test_id: str, deadline: float = None) -> Dict:
         """
         Get both server and client statistics in a single call
         
+        The two requests run concurrently, so a snapshot takes as long as the
+        slower side rather than the sum of both. Each side's deadline starts
+        when its request does, and bounds the request itself.
+        If only one side fails or misses the deadline, the other side's stats
+        are still returned and the failure is reported under "errors".
+        
         Args:
             test_id: Test ID to get stats for
+            deadline: Seconds to wait for both sides (defaults to self.stats_deadline)
             
         Returns:
             Combined statistics data
         """
-        try:
-            server_stats = self.get_server_stats(test_id)
-            client_stats = self.get_client_stats(test_id)
+        deadline = deadline or self.stats_deadline
+        fetchers = {"server": self.get_server_stats, "client": self.get_client_stats}
+        started = {}
+        begun = {role: threading.Event() for role in fetchers}
+        
+        def fetch(role):
+            started[role] = time.monotonic()
+            begun[role].set()
+            # The request's own timeout bounds it once it is running
+            return fetchers[role](test_id, deadline)
+        
+        submitted = time.monotonic()
+        futures = {role: self._executor.submit(fetch, role) for role in fetchers}
+        
+        stats = {}
+        errors = {}
+        for role, future in futures.items():
+            # Time spent queued for a worker does not count against a side's deadline,
+            # but a side still queued once the deadline has passed is dropped
+            if not begun[role].wait(max(0, submitted + deadline - time.monotonic())) and future.cancel():
+                errors[role] = f"Not started within {deadline} seconds"
+                continue
+            remaining = started.get(role, time.monotonic()) + deadline - time.monotonic()
+            try:
+                stats[role] = future.result(timeout=max(0, remaining))
+            except FutureTimeoutError:
+                errors[role] = f"No response within {deadline} seconds"
+            except Exception as e:
+                errors[role] = str(e)
+        return self._combine(test_id, stats, errors)
+    
+    def get_stats_batch(self, items: List[Dict], timeout: float = None) -> List[Dict]:
+        """
+        Get the stats of many tests/roles in one request
+        
+        Args:
+            items: Dicts with test_id, role ('server' or 'client') and optional since
+            timeout: Request timeout in seconds (defaults to self.timeout)
+            
+        Returns:
+            One {"test_id", "role", "stats"} or {"test_id", "role", "error"} per item, in order
+        """
+        return self._make_request('POST', 'stats/batch', {"items": items}, timeout=timeout)["results"]
+    
+    def get_combined_stats_many(self, test_ids: List[str]) -> Dict[str, Dict]:
+        """
+        Get server and client statistics of several tests with one request
+        
+        Args:
+            test_ids: API test IDs to get stats for
             
-            return {
-                "test_id": test_id,
-                "timestamp": time.time(),
-                "server": server_stats,
-                "client": client_stats
-            }
+        Returns:
+            {test_id: combined statistics}, each shaped like get_combined_stats()
+        """
+        # Only the latest sample of each side is needed per tick
+        items = [{"test_id": test_id, "role": role, "tail": 1}
+                 for test_id in test_ids for role in ("server", "client")]
+        stats = {test_id: {} for test_id in test_ids}
+        errors = {test_id: {} for test_id in test_ids}
+        try:
+            for result in self.get_stats_batch(items, timeout=self.stats_deadline):
+                if "error" in result:
+                    errors[result["test_id"]][result["role"]] = result["error"]
+                else:
+                    stats[result["test_id"]][result["role"]] = result["stats"]
         except Exception as e:
-            return {
-                "test_id": test_id,
-                "timestamp": time.time(),
-                "error": str(e),
-                "server": {},
-                "client": {}
-            }
+            for test_id in test_ids:
+                errors[test_id] = {"server": str(e), "client": str(e)}
+        return {test_id: self._combine(test_id, stats[test_id], errors[test_id]) for test_id in test_ids}
+    
+    @staticmethod
+    def _combine(test_id: str, stats: Dict, errors: Dict) -> Dict:
+        """Build a combined stats result, reporting failed sides as partial (or an error if both failed)"""
+        result = {"test_id": test_id, "timestamp": time.time()}
+        for role in ("server", "client"):
+            result[role] = stats.get(role, {})
+        if len(errors) == 2:
+            result["error"] = "; ".join(f"{role}: {message}" for role, message in errors.items())
+        elif errors:
+            result["partial"] = True
+            result["errors"] = errors
+        return result
     
     def health_check(self) -> Dict:
         """
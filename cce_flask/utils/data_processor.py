@@ -118,12 +118,12 @@ class DataProcessor:
                 labels.append('')
             
             # Extract server data
-            server_stats = entry.get('server', {})
+            server_stats = DataProcessor._chart_point(entry.get('server'))
             server_throughput.append(server_stats.get('throughput_mbps', 0))
             server_cps.append(server_stats.get('connections_per_second', 0))
             
             # Extract client data
-            client_stats = entry.get('client', {})
+            client_stats = DataProcessor._chart_point(entry.get('client'))
             client_throughput.append(client_stats.get('throughput_mbps', 0))
             client_cps.append(client_stats.get('connections_per_second', 0))
         
@@ -147,6 +147,27 @@ class DataProcessor:
             ]
         }
     
+    @staticmethod
+    def _chart_point(stats: Any) -> Dict:
+        """
+        Normalize one role of a history entry for charting
+        
+        History entries carry CSV rows (a list, newest last); older callers
+        pass a dict that already has throughput_mbps/connections_per_second.
+        """
+        if isinstance(stats, dict):
+            return stats
+        if not stats or not isinstance(stats[-1], dict):
+            return {}
+        row = stats[-1]
+        try:
+            return {
+                'throughput_mbps': float(row.get('Throughput', 0)) / 1e6,
+                'connections_per_second': float(row.get('ConnectionRate', 0))
+            }
+        except (TypeError, ValueError):
+            return {}
+    
     @staticmethod
     def format_logs_for_display(logs_data: Dict) -> Dict:
         """
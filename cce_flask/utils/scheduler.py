@@ -0,0 +1,155 @@
+"""
+Test Scheduler Module
+
+Drives progress updates and statistics polling for every running test from a
+single scheduler thread, instead of two mostly sleeping threads per test.
+
+The scheduler wakes once per tick. On each tick it:
+- calls every watched test's tick callback (cheap, e.g. progress updates)
+- collects the tests whose stats poll is due, sorts them by host and hands
+  them to a bounded worker pool in batches, so tests on the same agents are
+  polled together with one request
+
+A test never has more than one poll in flight, so a slow API makes polls
+less frequent instead of piling them up. One-off jobs such as starting or
+stopping a test run on a separate pool, so a burst of slow starts cannot
+delay the polls. Thread count stays at one scheduler plus max_workers plus
+job_workers regardless of the number of tests.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Watch:
+    """Scheduling state of one watched test"""
+    key: str
+    interval: float
+    next_poll: float
+    on_tick: Optional[Callable[[float], None]] = None
+    group: Any = None
+    polling: bool = False
+
+
+class TestScheduler:
+    """Single-threaded timer driving periodic work for many tests"""
+
+    def __init__(self, poll_batch: Callable[[List[str]], None], tick: float = 1.0,
+                 max_workers: int = 8, batch_size: int = 50, job_workers: int = 8):
+        """
+        Initialize the scheduler
+
+        Args:
+            poll_batch: Polls the stats of several tests (called on a worker thread)
+            tick: Scheduler resolution in seconds
+            max_workers: Worker threads for stats polls
+            batch_size: Most tests polled by one poll_batch call
+            job_workers: Worker threads for submitted jobs
+        """
+        self.poll_batch = poll_batch
+        self.tick = tick
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="test-scheduler")
+        self._jobs = ThreadPoolExecutor(max_workers=job_workers, thread_name_prefix="test-jobs")
+        self._watches: Dict[str, _Watch] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Run a one-off blocking job (e.g. starting or stopping a test) on the job pool, apart from polls"""
+        return self._jobs.submit(fn, *args, **kwargs)
+
+    def watch(self, key: str, interval: float, on_tick: Optional[Callable[[float], None]] = None,
+              group: Any = None):
+        """
+        Start polling key every interval seconds (first poll on the next tick)
+
+        Args:
+            key: Test ID passed to poll_batch
+            interval: Seconds between stats polls
+            on_tick: Called with the current time on every tick, on the scheduler thread
+            group: Polls of tests with equal groups (e.g. their agent IPs) are batched together
+        """
+        with self._lock:
+            was_idle = not self._watches
+            self._watches[key] = _Watch(key, max(interval, self.tick), time.monotonic(), on_tick, group)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="test-scheduler", daemon=True)
+                self._thread.start()
+        if was_idle:
+            self._wakeup.set()
+
+    def unwatch(self, key: str):
+        """Stop ticking and polling key; safe to call from a tick callback"""
+        with self._lock:
+            self._watches.pop(key, None)
+
+    def watched(self) -> int:
+        with self._lock:
+            return len(self._watches)
+
+    def _run(self):
+        next_tick = time.monotonic()
+        while True:
+            with self._lock:
+                idle = not self._watches
+            if idle:
+                # Sleep until something is watched again
+                self._wakeup.wait()
+                self._wakeup.clear()
+                next_tick = time.monotonic()
+
+            now = time.monotonic()
+            try:
+                self._tick(now)
+            except Exception as e:
+                logger.exception("Test scheduler tick failed: %s", e)
+
+            # Fixed-rate ticks; skip missed ones instead of bursting to catch up
+            next_tick += self.tick
+            if next_tick < time.monotonic():
+                next_tick = time.monotonic() + self.tick
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def _tick(self, now: float):
+        with self._lock:
+            watches = list(self._watches.values())
+
+        for watch in watches:
+            if watch.on_tick is None:
+                continue
+            try:
+                watch.on_tick(now)
+            except Exception as e:
+                logger.warning("Tick callback failed for test %s: %s", watch.key, e)
+
+        with self._lock:
+            due = [w for w in self._watches.values() if not w.polling and w.next_poll <= now]
+            for watch in due:
+                watch.polling = True
+                watch.next_poll = now + watch.interval
+        if not due:
+            return
+
+        due.sort(key=lambda w: str(w.group))
+        for start in range(0, len(due), self.batch_size):
+            batch = due[start:start + self.batch_size]
+            self._executor.submit(self._poll, batch)
+
+    def _poll(self, batch: List[_Watch]):
+        try:
+            self.poll_batch([watch.key for watch in batch])
+        except Exception as e:
+            logger.warning("Stats poll failed for %d tests: %s", len(batch), e)
+        finally:
+            with self._lock:
+                for watch in batch:
+                    watch.polling = False
@@ -0,0 +1,212 @@
+"""
+Stats History Module
+
+Bounded, multi-resolution history of a test's stats snapshots.
+
+Each snapshot keeps only the newest server and client CSV row, reduced to a
+fixed set of numeric fields and stored in flat float arrays. Snapshots live
+in a chain of fixed-capacity rings:
+
+- the newest snapshots at full resolution (the last 5 minutes by default)
+- older snapshots merged into 10 second buckets, then 60 second buckets
+
+A snapshot leaving one ring is folded into the next; the oldest buckets of
+the last ring are dropped. Rings grow as snapshots arrive, so a short test
+stays small, and memory per test is capped once they are full no matter how
+long the test runs. Reading the newest n points costs O(n).
+"""
+
+import math
+import threading
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Row fields kept per role, with how a bucket combines them
+HISTORY_FIELDS: Tuple[Tuple[str, str], ...] = (
+    ("Timestamp", "first"),
+    ("Throughput", "mean"),
+    ("ThroughputTX", "mean"),
+    ("ThroughputRX", "mean"),
+    ("ConnectionRate", "mean"),
+    ("ActiveConnections", "mean"),
+    ("AverageConnectionLatency", "mean"),
+    # Counters: the newest value in a bucket is the bucket's value
+    ("ConnectionsSucceeded", "last"),
+    ("ConnectionsAccepted", "last"),
+    ("ConnectionsFailed", "last"),
+)
+ROLES = ("server", "client")
+
+# (bucket seconds, buckets kept) after the full-resolution window: 1 hour of 10s, then 24 hours of 60s
+DEFAULT_TIERS: Tuple[Tuple[int, int], ...] = ((10, 360), (60, 1440))
+
+# Record layout: poll time, then HISTORY_FIELDS for each role
+_WIDTH = 1 + len(ROLES) * len(HISTORY_FIELDS)
+_AGGREGATES = ["first"] + [agg for _ in ROLES for _, agg in HISTORY_FIELDS]
+_NAN = float("nan")
+
+
+def _number(value: Any) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return _NAN
+
+
+class _Ring:
+    """Fixed-capacity ring of records stored in one flat float array"""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        # Grows one record at a time until full, then is overwritten in place
+        self._data = array("d")
+        self._head = 0
+        self.size = 0
+
+    def push(self, record: Sequence[float]) -> Optional[List[float]]:
+        """Append a record, returning the one it evicted when full"""
+        if self.size < self.capacity:
+            self._data.extend(record)
+            self._head = (self._head + 1) % self.capacity
+            self.size += 1
+            return None
+        start = self._head * _WIDTH
+        evicted = self._data[start:start + _WIDTH].tolist()
+        self._data[start:start + _WIDTH] = array("d", record)
+        self._head = (self._head + 1) % self.capacity
+        return evicted
+
+    def newest_first(self) -> Iterator[List[float]]:
+        for i in range(1, self.size + 1):
+            start = ((self._head - i) % self.capacity) * _WIDTH
+            yield self._data[start:start + _WIDTH].tolist()
+
+
+class _Bucket:
+    """Running aggregate of the records of one open time bucket"""
+
+    def __init__(self, record: Sequence[float]):
+        self.start = record[0]
+        self.first = list(record)
+        self.last = list(record)
+        self.sums = [0.0 if math.isnan(v) else v for v in record]
+        self.counts = [0 if math.isnan(v) else 1 for v in record]
+
+    def add(self, record: Sequence[float]):
+        for i, value in enumerate(record):
+            if math.isnan(value):
+                continue
+            if math.isnan(self.first[i]):
+                self.first[i] = value
+            self.last[i] = value
+            self.sums[i] += value
+            self.counts[i] += 1
+
+    def record(self) -> List[float]:
+        result = []
+        for i, agg in enumerate(_AGGREGATES):
+            if agg == "first":
+                result.append(self.first[i])
+            elif agg == "last":
+                result.append(self.last[i])
+            else:
+                result.append(self.sums[i] / self.counts[i] if self.counts[i] else _NAN)
+        return result
+
+
+class _Tier:
+    """Ring of fixed-width time buckets"""
+
+    def __init__(self, bucket_seconds: float, capacity: int):
+        self.bucket_seconds = bucket_seconds
+        self.ring = _Ring(capacity)
+        self.open: Optional[_Bucket] = None
+
+    def add(self, record: Sequence[float]) -> Optional[List[float]]:
+        """Fold a record in, returning a bucket evicted from the ring (if any)"""
+        if self.open is not None and record[0] < self.open.start + self.bucket_seconds:
+            self.open.add(record)
+            return None
+        evicted = self.ring.push(self.open.record()) if self.open is not None else None
+        self.open = _Bucket(record)
+        return evicted
+
+    def newest_first(self) -> Iterator[List[float]]:
+        if self.open is not None:
+            yield self.open.record()
+        yield from self.ring.newest_first()
+
+
+class StatsHistory:
+    """Bounded multi-resolution history of a test's stats snapshots"""
+
+    def __init__(self, interval: float = 5, recent_seconds: float = 300,
+                 tiers: Sequence[Tuple[int, int]] = DEFAULT_TIERS):
+        """
+        Initialize the history
+
+        Args:
+            interval: Seconds between snapshots (sizes the full-resolution ring)
+            recent_seconds: Span kept at full resolution
+            tiers: (bucket seconds, buckets kept) for older data, finest first
+        """
+        self._recent = _Ring(max(1, math.ceil(recent_seconds / max(interval, 1))))
+        self._tiers = [_Tier(seconds, capacity) for seconds, capacity in tiers]
+        self._lock = threading.Lock()
+        self.snapshots = 0
+
+    def append(self, stats: Dict[str, Any]):
+        """
+        Record a combined stats snapshot ({"timestamp", "server": rows, "client": rows})
+
+        Only the newest row of each role is kept.
+        """
+        record = [_number(stats.get("timestamp"))]
+        for role in ROLES:
+            rows = stats.get(role)
+            row = rows[-1] if isinstance(rows, list) and rows and isinstance(rows[-1], dict) else {}
+            record.extend(_number(row.get(name)) for name, _ in HISTORY_FIELDS)
+
+        with self._lock:
+            self.snapshots += 1
+            evicted = self._recent.push(record)
+            for tier in self._tiers:
+                if evicted is None:
+                    break
+                evicted = tier.add(evicted)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._recent.size + sum(t.ring.size + (t.open is not None) for t in self._tiers)
+
+    def latest(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Return up to limit of the newest points, oldest first
+
+        Each point is {"timestamp", "server": [row], "client": [row]} like the
+        snapshots it came from (a role without data has an empty list).
+        Points older than the full-resolution window are bucket aggregates.
+        """
+        records = []
+        with self._lock:
+            sources = [self._recent.newest_first()] + [tier.newest_first() for tier in self._tiers]
+            for source in sources:
+                for record in source:
+                    if len(records) >= limit:
+                        break
+                    records.append(record)
+        return [self._point(record) for record in reversed(records)]
+
+    @staticmethod
+    def _point(record: Sequence[float]) -> Dict[str, Any]:
+        point: Dict[str, Any] = {"timestamp": None if math.isnan(record[0]) else record[0]}
+        offset = 1
+        for role in ROLES:
+            row = {
+                name: record[offset + i]
+                for i, (name, _) in enumerate(HISTORY_FIELDS)
+                if not math.isnan(record[offset + i])
+            }
+            point[role] = [row] if row else []
+            offset += len(HISTORY_FIELDS)
+        return point
@@ -9,16 +9,22 @@ This module orchestrates the complete test workflow including:
 - Statistics collection
 """
 
+import logging
 import time
 import uuid
-import threading
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 from enum import Enum
 
+from flask import current_app, has_app_context
+
 from .api_client import get_api_client
 from .data_processor import DataProcessor
+from .scheduler import TestScheduler
+from .stats_history import StatsHistory
+
+logger = logging.getLogger(__name__)
 
 
 class TestStatus(Enum):
@@ -46,7 +52,7 @@ class TestState:
     elapsed_time: int = 0
     progress_percentage: float = 0.0
     current_stats: Dict = field(default_factory=dict)
-    stats_history: List[Dict] = field(default_factory=list)
+    stats_history: StatsHistory = field(default_factory=StatsHistory)
     error_message: Optional[str] = None
     server_started: bool = False
     client_started: bool = False
@@ -59,8 +65,14 @@ class TestManager:
         self.api_client = get_api_client()
         self.data_processor = DataProcessor()
         self.active_tests: Dict[str, TestState] = {}
-        self.stats_collection_threads: Dict[str, threading.Thread] = {}
-        self._stop_stats_collection: Dict[str, bool] = {}
+        app_config = current_app.config if has_app_context() else {}
+        # One scheduler drives progress and stats polling for all running tests
+        self.scheduler = TestScheduler(
+            self._poll_stats,
+            max_workers=app_config.get('STATS_POLL_WORKERS', 8),
+            batch_size=app_config.get('STATS_POLL_BATCH_SIZE', 50),
+            job_workers=app_config.get('TEST_LIFECYCLE_WORKERS', 8),
+        )
     
     def validate_test_config(self, config: Dict) -> Dict:
         """
@@ -102,19 +114,15 @@ class TestManager:
             test_id=test_id,
             status=TestStatus.INITIALIZING,
             config=config,
-            duration=int(config.get('duration', 60))
+            duration=int(config.get('duration', 60)),
+            stats_history=StatsHistory(interval=int(config.get('snapshot_interval', 5)))
         )
         
         self.active_tests[test_id] = test_state
         
         try:
-            # Start test execution in background thread
-            test_thread = threading.Thread(
-                target=self._execute_test_workflow,
-                args=(test_id,),
-                daemon=True
-            )
-            test_thread.start()
+            # Start the test on the scheduler's job pool
+            self.scheduler.submit(self._execute_test_workflow, test_id)
             
             return {
                 'status': 'success',
@@ -135,11 +143,11 @@ class TestManager:
     
     def _execute_test_workflow(self, test_id: str):
         """
-        Execute the complete test workflow in background thread
+        Start the test on a scheduler job worker
         Following OpenAPI specification flow:
         1. Start server -> get test_id
         2. Start client with test_id
-        3. Monitor via stats endpoints
+        3. Monitor via stats endpoints (driven by the scheduler until the duration elapses)
         
         Args:
             test_id: Test ID to execute (our internal ID, will be replaced by API test_id)
@@ -171,6 +179,10 @@ class TestManager:
             # Store API test_id for stats/logs polling
             test_state.config['api_test_id'] = api_test_id
             test_state.server_started = True
+            if test_state.status == TestStatus.CANCELLED:
+                # Cancelled while the server was starting: stop it instead of starting the client
+                self.api_client.stop_test(api_test_id)
+                return
             
             # Phase 2: Start Client with API test_id
             test_state.status = TestStatus.STARTING_CLIENT
@@ -186,36 +198,80 @@ class TestManager:
             
             test_state.client_started = True
             
-            # Phase 3: Run Test
+            # Phase 3: Run Test - progress, stats and completion are driven by the scheduler
+            if test_state.status == TestStatus.CANCELLED:
+                # Cancelled while starting: the processes just launched must not keep running
+                self.api_client.stop_test(api_test_id)
+                return
             test_state.status = TestStatus.RUNNING
             test_state.start_time = datetime.now()
-            
-            # Start statistics collection
             self._start_stats_collection(test_id)
             
-            # Wait for test duration
-            duration = test_state.duration
-            start_time = time.time()
+        except Exception as e:
+            self._fail_test(test_id, e)
+    
+    def _start_stats_collection(self, test_id: str):
+        """
+        Register a running test with the scheduler
+        
+        Args:
+            test_id: Test ID to collect stats for
+        """
+        test_state = self.active_tests[test_id]
+        interval = int(test_state.config.get('snapshot_interval', 5))
+        started = time.monotonic()
+        
+        def on_tick(now: float):
+            if test_state.status != TestStatus.RUNNING:
+                self.scheduler.unwatch(test_id)
+                return
             
-            while time.time() - start_time < duration:
-                if test_state.status == TestStatus.CANCELLED:
-                    break
-                
-                # Update progress
-                elapsed = time.time() - start_time
-                test_state.elapsed_time = int(elapsed)
-                test_state.progress_percentage = min((elapsed / duration) * 100, 100)
-                
-                time.sleep(1)
+            # Update progress
+            elapsed = now - started
+            test_state.elapsed_time = int(elapsed)
+            test_state.progress_percentage = min((elapsed / test_state.duration) * 100, 100) if test_state.duration else 100.0
             
-            # Phase 4: Stop Test
-            test_state.status = TestStatus.STOPPING
-            self._stop_stats_collection[test_id] = True
+            if elapsed >= test_state.duration:
+                test_state.status = TestStatus.STOPPING
+                self.scheduler.unwatch(test_id)
+                self.scheduler.submit(self._finish_test, test_id)
+        
+        group = (test_state.config.get('server_ip'), test_state.config.get('client_ip'))
+        self.scheduler.watch(test_id, interval, on_tick=on_tick, group=group)
+    
+    def _poll_stats(self, test_ids: List[str]):
+        """
+        Fetch and store the stats of several running tests with one API request
+        
+        Args:
+            test_ids: Test IDs due for a stats poll
+        """
+        states = {test_id: self.active_tests[test_id] for test_id in test_ids if test_id in self.active_tests}
+        api_test_ids = {test_id: state.config.get('api_test_id', test_id) for test_id, state in states.items()}
+        results = self.api_client.get_combined_stats_many(list(api_test_ids.values()))
+        
+        for test_id, test_state in states.items():
+            stats = results[api_test_ids[test_id]]
             
-            # Stop server (requires server_ip, not test_id)
-            server_ip = test_state.config.get('server_ip')
-            if server_ip:
-                stop_response = self.api_client.stop_server(server_ip)
+            # Process and store stats
+            processed_stats = self.data_processor.format_stats_for_display(stats)
+            test_state.current_stats = processed_stats
+            # Bounded: older snapshots are downsampled, the oldest dropped
+            test_state.stats_history.append(stats)
+    
+    def _finish_test(self, test_id: str):
+        """
+        Stop a test whose duration has elapsed
+        
+        Args:
+            test_id: Test ID to finish
+        """
+        test_state = self.active_tests[test_id]
+        try:
+            # Phase 4: Stop only this test's processes; other tests may share the agents
+            api_test_id = test_state.config.get('api_test_id')
+            if api_test_id:
+                self.api_client.stop_test(api_test_id)
             
             # Phase 5: Complete
             test_state.status = TestStatus.COMPLETED
@@ -223,49 +279,16 @@ class TestManager:
             test_state.progress_percentage = 100.0
             
         except Exception as e:
-            test_state.status = TestStatus.ERROR
-            test_state.error_message = str(e)
-            test_state.end_time = datetime.now()
-            
-            # Clean up on error
-            self._cleanup_test(test_id)
+            self._fail_test(test_id, e)
     
-    def _start_stats_collection(self, test_id: str):
-        """
-        Start background statistics collection for a test
-        
-        Args:
-            test_id: Test ID to collect stats for
-        """
+    def _fail_test(self, test_id: str, error: Exception):
         test_state = self.active_tests[test_id]
-        interval = int(test_state.config.get('snapshot_interval', 5))
+        test_state.status = TestStatus.ERROR
+        test_state.error_message = str(error)
+        test_state.end_time = datetime.now()
         
-        self._stop_stats_collection[test_id] = False
-        
-        def collect_stats():
-            while not self._stop_stats_collection.get(test_id, False):
-                try:
-                    # Get combined stats using API test_id
-                    api_test_id = test_state.config.get('api_test_id', test_id)
-                    stats = self.api_client.get_combined_stats(api_test_id)
-                    
-                    # Process and store stats
-                    processed_stats = self.data_processor.format_stats_for_display(stats)
-                    test_state.current_stats = processed_stats
-                    test_state.stats_history.append(stats)
-                    
-                    # Limit history size to prevent memory issues
-                    if len(test_state.stats_history) > 1000:
-                        test_state.stats_history = test_state.stats_history[-500:]
-                    
-                except Exception as e:
-                    print(f"Stats collection error for test {test_id}: {e}")
-                
-                time.sleep(interval)
-        
-        stats_thread = threading.Thread(target=collect_stats, daemon=True)
-        stats_thread.start()
-        self.stats_collection_threads[test_id] = stats_thread
+        # Clean up on error
+        self._cleanup_test(test_id)
     
     def cancel_test(self, test_id: str) -> Dict:
         """
@@ -310,18 +333,18 @@ class TestManager:
         Args:
             test_id: Test ID to clean up
         """
-        # Stop stats collection
-        self._stop_stats_collection[test_id] = True
+        # Stop progress updates and stats collection
+        self.scheduler.unwatch(test_id)
         
-        # Try to stop server if it was started
+        # Try to stop the test's processes if the server was started
         test_state = self.active_tests.get(test_id)
         if test_state and test_state.server_started:
             try:
-                server_ip = test_state.config.get('server_ip')
-                if server_ip:
-                    self.api_client.stop_server(server_ip)
+                api_test_id = test_state.config.get('api_test_id')
+                if api_test_id:
+                    self.api_client.stop_test(api_test_id)
             except Exception as e:
-                print(f"Error stopping server for test {test_id}: {e}")
+                logger.warning("Error stopping test %s: %s", test_id, e)
     
     def get_test_status(self, test_id: str) -> Dict:
         """
@@ -372,14 +395,15 @@ class TestManager:
             }
         
         test_state = self.active_tests[test_id]
+        history = test_state.stats_history.latest(50)  # Last 50 data points
         
         return {
             'status': 'success',
             'test_id': test_id,
             'test_type': test_state.config.get('test_type', 'throughput'),
             'current_stats': test_state.current_stats,
-            'stats_history': test_state.stats_history[-50:],  # Last 50 data points
-            'chart_data': self.data_processor.format_chart_data(test_state.stats_history[-50:])
+            'stats_history': history,
+            'chart_data': self.data_processor.format_chart_data(history)
         }
     
     def get_test_logs(self, test_id: str, log_type: str = 'both') -> Dict:
@@ -462,10 +486,7 @@ class TestManager:
         
         for test_id in tests_to_remove:
             del self.active_tests[test_id]
-            if test_id in self.stats_collection_threads:
-                del self.stats_collection_threads[test_id]
-            if test_id in self._stop_stats_collection:
-                del self._stop_stats_collection[test_id]
+            self.scheduler.unwatch(test_id)
 
 
 # Global test manager instance
@@ -1,12 +1,28 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from app.api import router as api_router
+from app.services.shared import async_service
 import uvicorn
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Tests left RUNNING in the persisted registry are finished and archived like any other
+    resumed = async_service.service.resume_finish_watches()
+    if resumed:
+        print(f"Watching {resumed} tests still running from before the restart")
+    yield
+    # Write out queued registry changes before the process exits
+    async_service.shutdown()
+
+
 app = FastAPI(
     title="REST Powered Cyperf CE Controller",
     description="A web application to control Keysight Cyperf CE Client and Server Tests",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
 )
 
 # Configure CORS
@@ -18,6 +34,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress larger JSON responses (stats arrays, logs); level 5 keeps CPU cost low
+app.add_middleware(GZipMiddleware, minimum_size=1000, compresslevel=5)
+
 # Include API routes
 app.include_router(api_router, prefix="/api")
 
@@ -22,6 +22,8 @@ from mcp.types import (
 )
 from pydantic import BaseModel
 
+from app.services.stats_budget import STATS_TOOL_PROPERTIES, compact_stats
+
 # Configuration
 FASTAPI_BASE_URL = "http://localhost:8000"
 
@@ -145,28 +147,30 @@ class MCPCyperfServer:
                 ),
                 Tool(
                     name="get_server_stats",
-                    description="Get statistics from a running Cyperf server",
+                    description="Get statistics from a Cyperf server: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "test_id": {
                                 "type": "string",
                                 "description": "Test ID of the server"
-                            }
+                            },
+                            **STATS_TOOL_PROPERTIES
                         },
                         "required": ["test_id"]
                     }
                 ),
                 Tool(
-                    name="get_client_stats", 
-                    description="Get statistics from a running Cyperf client",
+                    name="get_client_stats",
+                    description="Get statistics from a Cyperf client: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
                     inputSchema={
                         "type": "object",
                         "properties": {
                             "test_id": {
                                 "type": "string",
                                 "description": "Test ID of the client"
-                            }
+                            },
+                            **STATS_TOOL_PROPERTIES
                         },
                         "required": ["test_id"]
                     }
@@ -319,25 +323,29 @@ class MCPCyperfServer:
         )]
 
     async def _get_server_stats(self, arguments: Dict[str, Any]) -> List[TextContent]:
-        test_id = arguments["test_id"]
-        response = await self.client.get(f"{FASTAPI_BASE_URL}/api/server/stats/{test_id}")
-        response.raise_for_status()
-        stats = response.json()
-        
-        return [TextContent(
-            type="text",
-            text=f"Server Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
-        )]
+        return await self._get_stats("server", arguments)
 
     async def _get_client_stats(self, arguments: Dict[str, Any]) -> List[TextContent]:
+        return await self._get_stats("client", arguments)
+
+    async def _get_stats(self, role: str, arguments: Dict[str, Any]) -> List[TextContent]:
         test_id = arguments["test_id"]
-        response = await self.client.get(f"{FASTAPI_BASE_URL}/api/client/stats/{test_id}")
-        response.raise_for_status()
-        stats = response.json()
-        
+
+        async def fetch_summary():
+            response = await self.client.get(f"{FASTAPI_BASE_URL}/api/tests/{test_id}/summary")
+            response.raise_for_status()
+            return response.json()
+
+        async def fetch_columns(query):
+            response = await self.client.get(
+                f"{FASTAPI_BASE_URL}/api/{role}/stats/{test_id}", params={"format": "columnar", **query}
+            )
+            response.raise_for_status()
+            return response.json()
+
         return [TextContent(
             type="text",
-            text=f"Client Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
+            text=await compact_stats(role, arguments, fetch_summary, fetch_columns)
         )]
 
     async def _get_server_stats_image(self, arguments: Dict[str, Any]) -> List[ImageContent]:
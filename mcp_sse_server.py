@@ -16,6 +16,8 @@ from fastapi.responses import StreamingResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import uvicorn
 
+from app.services.stats_budget import STATS_TOOL_PROPERTIES, compact_stats
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -378,22 +380,24 @@ class MCPHTTPServer:
             },
             {
                 "name": "get_server_stats",
-                "description": "Get statistics from a running Cyperf server",
+                "description": "Get statistics from a Cyperf server: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "test_id": {"type": "string", "description": "Test ID of the server"}
+                        "test_id": {"type": "string", "description": "Test ID of the server"},
+                        **STATS_TOOL_PROPERTIES
                     },
                     "required": ["test_id"]
                 }
             },
             {
                 "name": "get_client_stats",
-                "description": "Get statistics from a running Cyperf client",
+                "description": "Get statistics from a Cyperf client: a compact summary by default, or the last n / downsampled / all rows within a byte budget",
                 "inputSchema": {
                     "type": "object",
                     "properties": {
-                        "test_id": {"type": "string", "description": "Test ID of the client"}
+                        "test_id": {"type": "string", "description": "Test ID of the client"},
+                        **STATS_TOOL_PROPERTIES
                     },
                     "required": ["test_id"]
                 }
@@ -549,26 +553,31 @@ class MCPHTTPServer:
 
     async def _proxy_get_server_stats(self, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Proxy server stats to main FastAPI app"""
-        test_id = arguments["test_id"]
-        response = await self.client.get(f"{get_fastapi_base_url()}/api/server/stats/{test_id}")
-        response.raise_for_status()
-        stats = response.json()
-        
-        return [{
-            "type": "text",
-            "text": f"Server Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
-        }]
+        return await self._proxy_get_stats("server", arguments)
 
     async def _proxy_get_client_stats(self, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Proxy client stats to main FastAPI app"""
+        return await self._proxy_get_stats("client", arguments)
+
+    async def _proxy_get_stats(self, role: str, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fetch the stats of one role in the requested compact mode, within max_bytes"""
         test_id = arguments["test_id"]
-        response = await self.client.get(f"{get_fastapi_base_url()}/api/client/stats/{test_id}")
-        response.raise_for_status()
-        stats = response.json()
-        
+
+        async def fetch_summary():
+            response = await self.client.get(f"{get_fastapi_base_url()}/api/tests/{test_id}/summary")
+            response.raise_for_status()
+            return response.json()
+
+        async def fetch_columns(query):
+            response = await self.client.get(
+                f"{get_fastapi_base_url()}/api/{role}/stats/{test_id}", params={"format": "columnar", **query}
+            )
+            response.raise_for_status()
+            return response.json()
+
         return [{
             "type": "text",
-            "text": f"Client Statistics for Test ID: {test_id}\n\n{json.dumps(stats, indent=2)}"
+            "text": await compact_stats(role, arguments, fetch_summary, fetch_columns)
         }]
 
     async def _proxy_get_server_stats_image(self, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
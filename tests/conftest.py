@@ -0,0 +1,17 @@
+import os
+import sys
+
+# app.* (FastAPI services) and cce_flask.utils.* import from the repo root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Settings() requires these; tests never connect anywhere
+for name, value in {
+    "SERVER_IP": "192.0.2.1",
+    "CLIENT_IP": "192.0.2.2",
+    "SSH_USERNAME": "cyperf",
+    "SSH_KEY_PATH": "/nonexistent/id_rsa",
+    "SSH_PASSWORD": "test",
+    "REGISTRY_DB_PATH": "",
+    "STATS_ARCHIVE_DIR": "",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,86 @@
+"""
+CyperfAPIClient.get_combined_stats: per-side deadlines that start when each request does.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+from cce_flask.utils.api_client import CyperfAPIClient
+
+
+def make_client(server, client, workers=8):
+    api = CyperfAPIClient(base_url="http://192.0.2.1/api", timeout=5, stats_deadline=0.2)
+    api._executor = ThreadPoolExecutor(max_workers=workers)
+    api.get_server_stats = server
+    api.get_client_stats = client
+    return api
+
+
+def test_slow_side_is_reported_and_the_other_returned():
+    def slow(test_id, timeout):
+        time.sleep(0.5)
+        return {"rows": 1}
+
+    api = make_client(slow, lambda test_id, timeout: {"rows": 2})
+    result = api.get_combined_stats("t1")
+    assert result["client"] == {"rows": 2} and result["server"] == {}
+    assert result["partial"] and "No response within" in result["errors"]["server"]
+
+
+def test_queue_wait_does_not_count_against_the_deadline():
+    # One worker: the client request waits for the server one before it starts
+    def server(test_id, timeout):
+        time.sleep(0.15)
+        return {"rows": 1}
+
+    def client(test_id, timeout):
+        time.sleep(0.15)
+        return {"rows": 2}
+
+    api = make_client(server, client, workers=1)
+    result = api.get_combined_stats("t1")
+    assert "errors" not in result and "error" not in result
+    assert result["server"] == {"rows": 1} and result["client"] == {"rows": 2}
+
+
+def test_side_not_started_within_the_deadline_is_cancelled():
+    release = threading.Event()
+    calls = []
+
+    def server(test_id, timeout):
+        calls.append(timeout)
+        release.wait(1)
+        return {"rows": 1}
+
+    def client(test_id, timeout):
+        calls.append(timeout)
+        return {"rows": 2}
+
+    api = make_client(server, client, workers=1)
+    # Hold the only worker so neither side starts before the deadline
+    api._executor.submit(release.wait, 0.5)
+    result = api.get_combined_stats("t1")
+    release.set()
+    assert "Not started" in result["error"]
+    api._executor.shutdown(wait=True)
+    assert calls == []
+
+
+def test_polling_many_tests_requests_only_the_latest_row():
+    api = CyperfAPIClient(base_url="http://192.0.2.1/api", timeout=5)
+    sent = []
+
+    def batch(items, timeout=None):
+        sent.extend(items)
+        return [dict(item, stats=[{"Throughput": 1}]) for item in items]
+
+    api.get_stats_batch = batch
+    results = api.get_combined_stats_many(["a", "b"])
+    assert {item["tail"] for item in sent} == {1} and len(sent) == 4
+    assert results["b"]["client"] == [{"Throughput": 1}]
@@ -0,0 +1,128 @@
+"""
+Load test: stats requests must stay fast while calls to an unreachable agent hang.
+"""
+
+import asyncio
+import gc
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("httpx")
+pytest.importorskip("paramiko")
+pytest.importorskip("pydantic_settings")
+
+import httpx
+from fastapi import FastAPI
+
+from app.api import router
+from app.services.shared import async_service, cyperf_service
+
+UNREACHABLE = "203.0.113.1"
+REQUESTS = 200
+CONCURRENCY = 20
+
+
+def p99(latencies):
+    ordered = sorted(latencies)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+async def stats_latencies(client):
+    latencies = []
+
+    async def one(i):
+        started = time.perf_counter()
+        response = await client.get(f"/api/client/stats/load-{i}")
+        latencies.append(time.perf_counter() - started)
+        assert response.status_code == 200
+
+    for start in range(0, REQUESTS, CONCURRENCY):
+        await asyncio.gather(*(one(i) for i in range(start, start + CONCURRENCY)))
+    return latencies
+
+
+def test_stats_p99_stays_flat_while_start_server_hangs(monkeypatch):
+    release = threading.Event()
+    hanging = []
+
+    def start_server(test_id, server_ip, params):
+        # Stands in for a paramiko connect to a host that never answers
+        hanging.append(test_id)
+        release.wait(timeout=30)
+        raise Exception(f"Unable to connect to {server_ip}")
+
+    monkeypatch.setattr(cyperf_service, "start_server", start_server)
+    monkeypatch.setattr(cyperf_service, "get_client_stats",
+                        lambda test_id, since=None, format="rows", query=None: [{"Timestamp": 1, "Throughput": 10}])
+    monkeypatch.setattr(cyperf_service, "host_for", lambda test_id, role: "198.51.100.7")
+
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=60) as client:
+            # Each phase is measured after a warm-up pass that lets the worker pool
+            # grow, and a collection so a full GC pause does not land in one phase only
+            await stats_latencies(client)
+            gc.collect()
+            baseline = p99(await stats_latencies(client))
+
+            starts = [
+                asyncio.create_task(client.post("/api/start_server",
+                                                json={"server_ip": UNREACHABLE, "params": {}}))
+                for _ in range(2 * async_service.per_host_limit)
+            ]
+            await asyncio.sleep(0.2)
+            await stats_latencies(client)
+            gc.collect()
+            loaded = p99(await stats_latencies(client))
+
+            # Calls to the dead host are capped per host and still hanging
+            assert len(hanging) == async_service.per_host_limit
+            assert not any(task.done() for task in starts)
+            release.set()
+            responses = await asyncio.gather(*starts)
+            assert all(r.status_code == 500 for r in responses)
+            return baseline, loaded
+
+    baseline, loaded = asyncio.run(scenario())
+    print(f"client/stats p99: {baseline * 1000:.1f} ms idle, {loaded * 1000:.1f} ms with start_server hanging")
+    assert loaded < max(5 * baseline, 0.25)
+
+
+def test_stop_test_takes_a_slot_on_the_client_host_too():
+    from app.services.async_service import AsyncCyperfService
+
+    release = threading.Event()
+    running = []
+
+    class FakeService:
+        def host_for(self, test_id, role):
+            return "198.51.100.1" if role == "server" else "198.51.100.2"
+
+        def stop_test(self, test_id, timeout=None):
+            running.append(test_id)
+            release.wait(timeout=5)
+
+        def get_client_stats(self, test_id, since=None, format="rows", query=None):
+            running.append(f"stats {test_id}")
+
+    service = AsyncCyperfService(FakeService(), max_workers=8, per_host_limit=2)
+
+    async def scenario():
+        stops = [asyncio.create_task(service.stop_test(f"t{i}")) for i in range(3)]
+        await asyncio.sleep(0.1)
+        # Two stops fill the client host's slots, so a client stats call waits for them
+        stats = asyncio.create_task(service.get_client_stats("t9"))
+        await asyncio.sleep(0.1)
+        assert sorted(running) == ["t0", "t1"] and not stats.done()
+        release.set()
+        await asyncio.gather(*stops, stats)
+
+    asyncio.run(scenario())
+    assert "stats t9" in running and "t2" in running
+    service._executor.shutdown(wait=True)
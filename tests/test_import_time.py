@@ -0,0 +1,51 @@
+"""
+Import-time budget: the service layer and the server entry points stay fast to import and leave out the plotting and numeric stacks.
+"""
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("matplotlib", "numpy", "pandas")
+# Cumulative import time of each entry point, excluding its third-party dependencies
+SERVICE_BUDGET_US = 200_000
+MAIN_BUDGET_US = 400_000
+MCP_SERVER_BUDGET_US = 200_000
+
+
+def run_python(*args):
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(p for p in sys.path if p))
+    return subprocess.run([sys.executable, *args], cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+
+
+@pytest.mark.parametrize("module,deps", [
+    ("app.services.cyperf_service", ("paramiko", "pydantic_settings")),
+    ("main", ("fastapi", "uvicorn", "paramiko", "pydantic_settings")),
+])
+def test_heavy_modules_not_imported(module, deps):
+    for dep in deps:
+        pytest.importorskip(dep)
+    result = run_python("-c", f"import sys, {module}; print('HEAVY', *(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    assert [line for line in result.stdout.splitlines() if line.startswith("HEAVY")] == ["HEAVY"]
+
+
+@pytest.mark.parametrize("module,deps,budget", [
+    ("app.services.cyperf_service", ("paramiko", "pydantic_settings"), SERVICE_BUDGET_US),
+    ("main", ("fastapi", "uvicorn", "paramiko", "pydantic_settings"), MAIN_BUDGET_US),
+    ("mcp_server", ("httpx", "mcp.server", "mcp.types", "pydantic"), MCP_SERVER_BUDGET_US),
+])
+def test_import_time_budget(module, deps, budget):
+    for dep in deps:
+        pytest.importorskip(dep)
+    # Dependencies are imported first so only this repository's modules are measured
+    result = run_python("-X", "importtime", "-c", f"import {', '.join(deps)}; import {module}")
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, total, name = line[len("import time:"):].split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+    assert cumulative[module] < budget
@@ -0,0 +1,110 @@
+"""
+LogQuery: grep patterns are portable, and the agent pipeline selects the same lines as local filtering.
+"""
+
+import contextlib
+import shutil
+import subprocess
+
+import pytest
+
+from app.services.log_query import LogQuery
+
+LINES = [f"2024-01-01 {'ERROR' if i % 7 == 0 else 'INFO'} line {i} (phase {i % 3})\n" for i in range(40)]
+
+
+@pytest.mark.parametrize("grep", [
+    "line 1[0-9]", "^2024", r"\(phase 2\)$", "ERROR|WARN", "(line|phase) 3", "x{2,}", r"a\.b", "[^a-z_]+",
+])
+def test_portable_patterns_accepted(grep):
+    assert LogQuery.from_params(grep=grep).grep == grep
+
+
+@pytest.mark.parametrize("grep", [
+    r"line 1\d", r"\bERROR\b", r"\w+", r"(a)\1", "(?i)error", "a*?", "a+*", "a{,3}", "[[:digit:]]", r"[\d]", "[a",
+])
+def test_non_portable_patterns_rejected(grep):
+    with pytest.raises(ValueError):
+        LogQuery.from_params(grep=grep)
+
+
+def test_filters_apply_in_order():
+    query = LogQuery.from_params(level="error", grep="phase [01]", offset=1, limit=2)
+    assert list(query.filter_lines(LINES)) == [LINES[7], LINES[21]]
+    assert list(LogQuery.from_params(tail=2).filter_lines(LINES)) == LINES[-2:]
+
+
+@pytest.mark.parametrize("params", [
+    {},
+    {"level": "error"},
+    {"grep": "line 1[0-9]"},
+    {"grep": r"\(phase 2\)$", "tail": 3},
+    {"level": "info", "grep": "line [23]", "offset": 2, "limit": 5},
+])
+def test_remote_command_matches_local_filter(tmp_path, params):
+    if not (shutil.which("sh") and shutil.which("grep")):
+        pytest.skip("needs a POSIX shell")
+    path = tmp_path / "t1_client.log"
+    path.write_text("".join(LINES))
+    query = LogQuery.from_params(**params)
+
+    result = subprocess.run(["sh", "-c", query.remote_command(str(path))], capture_output=True, text=True)
+    assert result.stdout[:1] == "+"
+    assert result.stdout[1:] == "".join(query.filter_lines(LINES))
+
+
+def test_missing_log_exits_3(tmp_path):
+    if not shutil.which("sh"):
+        pytest.skip("needs a POSIX shell")
+    result = subprocess.run(["sh", "-c", LogQuery().remote_command(str(tmp_path / "missing.log"))], capture_output=True)
+    assert result.returncode == 3 and result.stdout == b""
+
+
+class FakeChannel:
+    def __init__(self, data):
+        self.data = data
+        self.closed = False
+
+    def recv(self, size):
+        chunk, self.data = self.data[:size], self.data[size:]
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSSH:
+    def __init__(self, data):
+        self.channel = FakeChannel(data)
+
+    def exec_command(self, command):
+        stdout = type("Stdout", (), {"channel": self.channel})()
+        return None, stdout, None
+
+
+def test_open_log_streams_over_a_dedicated_connection(monkeypatch):
+    pytest.importorskip("paramiko")
+    pytest.importorskip("pydantic_settings")
+    from app.services.cyperf_service import CyperfService
+
+    service = CyperfService()
+    service.active_tests.register("t1", client_ip="192.0.2.11", client_csv_path="t1_client.csv", status="RUNNING")
+    ssh = FakeSSH(b"+line 1\nline 2\n")
+    opened = []
+
+    @contextlib.contextmanager
+    def dedicated(host):
+        opened.append(host)
+        yield ssh
+        opened.remove(host)
+
+    def pooled(host):
+        raise AssertionError("streaming must not take a pooled session")
+
+    monkeypatch.setattr(service, "_ssh_dedicated", dedicated)
+    monkeypatch.setattr(service, "_ssh", pooled)
+    chunks = service.open_log("t1", "client")
+    assert opened == ["192.0.2.11"]
+    assert b"".join(chunks) == b"line 1\nline 2\n"
+    assert opened == [] and ssh.channel.closed
+    service.shutdown()
@@ -0,0 +1,49 @@
+"""
+Registry benchmark: registrations stay off the disk path and all of them reach SQLite.
+"""
+
+import time
+
+import pytest
+
+from app.services import test_registry
+from app.services.registry_store import RegistryStore
+
+TESTS = 5000
+# Required registrations (register + two updates each) per second
+MIN_RATE = 2000
+
+
+def test_registry_sustains_thousands_of_registrations_per_second(tmp_path):
+    store = RegistryStore(str(tmp_path / "registry.db"))
+    registry = test_registry.TestRegistry(store)
+
+    started = time.perf_counter()
+    for i in range(TESTS):
+        test_id = f"bench-{i}"
+        registry.register(test_id, server_ip=f"10.0.{i % 16}.1", server_pid=1000 + i,
+                          server_csv_path=f"{test_id}_server.csv", status="SERVER_RUNNING")
+        registry.update(test_id, client_ip=f"10.1.{i % 16}.1", client_pid=2000 + i,
+                        client_csv_path=f"{test_id}_client.csv", status="RUNNING")
+        registry.update(test_id, status="STOPPED")
+    elapsed = time.perf_counter() - started
+    rate = TESTS / elapsed
+    print(f"registry: {rate:.0f} registrations/s ({TESTS} tests, {elapsed * 1000:.0f} ms)")
+    assert rate > MIN_RATE
+
+    # close() writes out everything still queued
+    registry.close()
+    reloaded = test_registry.TestRegistry(RegistryStore(store.path))
+    assert len(reloaded) == TESTS
+    assert len(reloaded.ids_for_host("10.0.3.1")) == TESTS // 16 + (3 < TESTS % 16)
+    record = reloaded.get("bench-42")
+    assert record["status"] == "STOPPED" and record["client_pid"] == 2042
+
+
+def test_closed_store_rejects_writes(tmp_path):
+    store = RegistryStore(str(tmp_path / "registry.db"))
+    store.save({"test_id": "t", "created_at": 1.0})
+    store.close()
+    assert list(store.load()) == ["t"]
+    with pytest.raises(Exception, match="closed"):
+        store.save({"test_id": "u"})
@@ -0,0 +1,90 @@
+"""
+Test records never carry the sudo password, whichever API returns them.
+"""
+
+import contextlib
+import json
+
+import pytest
+
+pytest.importorskip("paramiko")
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.services.cyperf_service import CyperfService
+
+PASSWORD = "s3cret-pw"
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(settings, "SSH_PASSWORD", PASSWORD)
+    service = CyperfService()
+    launched = []
+    monkeypatch.setattr(service, "_ssh", lambda host: contextlib.nullcontext(None))
+    monkeypatch.setattr(service, "_launch", lambda ssh, command, *args, **kwargs: launched.append(command) or 100)
+    monkeypatch.setattr(service, "_watch_finish", lambda test_id, seconds: None)
+    service.launched = launched
+    yield service
+    service.shutdown()
+
+
+def test_launch_records_hold_only_the_redacted_command(service):
+    service.start_server("t1", "192.0.2.10", {"csv_stats": True})
+    started = service.start_client("t1", "192.0.2.10", "192.0.2.11", {"time": 5, "csv_stats": True})
+
+    # The agents still get the real password
+    assert all(PASSWORD in command for command in service.launched)
+    visible = [service.active_tests.get("t1"), service.active_tests.find(), started]
+    assert PASSWORD not in json.dumps(visible, default=str)
+    assert "[REDACTED]" in service.active_tests.get("t1")["command"]
+
+
+def test_store_writes_only_allowlisted_fields(tmp_path):
+    from app.services.registry_store import RegistryStore
+
+    path = tmp_path / "registry.db"
+    store = RegistryStore(str(path))
+    store.save({"test_id": "t1", "created_at": 1.0, "status": "RUNNING", "server_ip": "192.0.2.10",
+                "command": f"echo {PASSWORD} | sudo -S sh -c cyperf", "password": PASSWORD})
+    store.close()
+
+    assert all(PASSWORD.encode() not in f.read_bytes() for f in tmp_path.iterdir())
+    assert RegistryStore(str(path)).load()["t1"] == {
+        "test_id": "t1", "created_at": 1.0, "status": "RUNNING", "server_ip": "192.0.2.10",
+    }
+
+
+def test_loading_scrubs_records_written_before_the_allowlist(tmp_path):
+    import sqlite3
+    from app.services.registry_store import RegistryStore
+
+    path = tmp_path / "registry.db"
+    store = RegistryStore(str(path))
+    store.load()
+    conn = sqlite3.connect(str(path))
+    with conn:
+        conn.execute(
+            "INSERT INTO tests (test_id, status, created_at, updated_at, record) VALUES (?, ?, ?, ?, ?)",
+            ("t1", "STOPPED", 1.0, 1.0, json.dumps({"test_id": "t1", "command": f"echo {PASSWORD} | sudo -S"})),
+        )
+    conn.close()
+
+    assert store.load() == {"t1": {"test_id": "t1"}}
+    assert all(PASSWORD.encode() not in f.read_bytes() for f in tmp_path.iterdir())
+
+
+def test_list_and_search_return_sanitized_records(service, monkeypatch):
+    pytest.importorskip("fastapi")
+    import asyncio
+    from app.api import routes
+
+    service.start_server("t2", "192.0.2.10", {})
+    service.active_tests.update("t2", command=f"echo {PASSWORD} | sudo -S sh -c cyperf")
+    monkeypatch.setattr(routes, "cyperf_service", service)
+
+    listed = asyncio.run(routes.list_tests())
+    found = asyncio.run(routes.search_tests(host="192.0.2.10"))
+    assert [r["test_id"] for r in listed] == [r["test_id"] for r in found] == ["t2"]
+    assert "command" not in listed[0] and listed[0]["server_ip"] == "192.0.2.10"
+    assert PASSWORD not in json.dumps([listed, found], default=str)
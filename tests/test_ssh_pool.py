@@ -0,0 +1,51 @@
+"""
+SSH pool: dedicated connections for streams are capped per host.
+"""
+
+import pytest
+
+pytest.importorskip("paramiko")
+
+from app.services.ssh_pool import SSHConnectionPool
+
+
+class FakeClient:
+    def __init__(self, hostname):
+        self.hostname = hostname
+        self.closed = False
+
+    def get_transport(self):
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+def test_dedicated_connections_are_capped_per_host():
+    opened = []
+    pool = SSHConnectionPool(lambda host: opened.append(FakeClient(host)) or opened[-1], max_dedicated=2)
+
+    with pool.dedicated("192.0.2.1"), pool.dedicated("192.0.2.1"):
+        with pytest.raises(Exception, match="Too many dedicated SSH connections to 192.0.2.1"):
+            with pool.dedicated("192.0.2.1"):
+                pass
+        # Other agents have their own allowance
+        with pool.dedicated("192.0.2.2"):
+            assert pool.stats()["dedicated"] == 3
+    assert len(opened) == 3 and all(client.closed for client in opened)
+
+    # Closed connections free their slot
+    with pool.dedicated("192.0.2.1"):
+        assert pool.stats()["dedicated"] == 1
+
+
+def test_failed_connect_frees_its_slot():
+    def connect(host):
+        raise Exception(f"Unable to connect to {host}")
+
+    pool = SSHConnectionPool(connect, max_dedicated=1)
+    for _ in range(2):
+        with pytest.raises(Exception, match="Unable to connect"):
+            with pool.dedicated("192.0.2.1"):
+                pass
+    assert pool.stats()["dedicated"] == 0
@@ -0,0 +1,142 @@
+"""
+Stats archive: zero-copy loading, and archiving tests that finish on their own.
+"""
+
+import contextlib
+import mmap
+import time
+
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("paramiko")
+pytest.importorskip("pydantic_settings")
+
+from app.core.config import settings
+from app.services.cyperf_service import CyperfService
+from app.services.stats_archive import StatsArchive
+from app.services.stats_model import table_from_csv
+from app.services.stats_query import StatsQuery, run_query
+
+CSV = b"Timestamp,Throughput,Phase\n1700000000,10,run\n1700000001,30,run\n"
+
+
+def test_loaded_columns_are_views_over_the_mapped_files(tmp_path):
+    archive = StatsArchive(str(tmp_path))
+    archive.store("t1", "client", CSV, b"log line\n", table_from_csv(CSV))
+
+    table = archive.load_table("t1", "client")
+    column = table.numeric["Throughput"]
+    assert isinstance(column, memoryview) and isinstance(column.obj, mmap.mmap)
+    assert column.tolist() == [10.0, 30.0]
+    assert table.rows()[1] == {"Timestamp": 1700000001, "Throughput": 30, "Phase": "run"}
+    assert run_query(table, StatsQuery.from_params(fields="Throughput", tail=1))["Throughput"] == [30]
+    assert list(archive.iter_log_lines("t1", "client")) == ["log line\n"]
+
+
+def test_header_only_csv_round_trips(tmp_path):
+    archive = StatsArchive(str(tmp_path))
+    header_only = b"Timestamp,Throughput\n"
+    archive.store("t2", "server", header_only, None, table_from_csv(header_only))
+    table = archive.load_table("t2", "server")
+    assert len(table) == 0 and table.rows() == []
+
+
+class FakeAgent:
+    """Answers the remote scripts of the finish watcher and stop/harvest"""
+
+    def __init__(self, running_checks):
+        self.running_checks = running_checks
+        self.stopped = []
+
+    def exec(self, ssh, command):
+        if "echo running" in command:
+            self.running_checks -= 1
+            return "running\n" if self.running_checks > 0 else ""
+        self.stopped.append(command)
+        return "stopped\n"
+
+    @staticmethod
+    def fetch_files(ssh, paths):
+        return {path: CSV if path.endswith(".csv") else b"cyperf log\n" for path in paths}
+
+
+def test_natural_finish_is_archived(tmp_path, monkeypatch):
+    service = CyperfService()
+    service.stats_archive = StatsArchive(str(tmp_path))
+    agent = FakeAgent(running_checks=3)
+    monkeypatch.setattr(service, "_ssh", lambda host: contextlib.nullcontext(None))
+    monkeypatch.setattr(service, "_exec", agent.exec)
+    monkeypatch.setattr(service, "_fetch_files", agent.fetch_files)
+    monkeypatch.setattr(settings, "CYPERF_FINISH_POLL_INTERVAL", 0.01)
+
+    service.active_tests.register(
+        "t3", server_ip="192.0.2.10", server_pid=100, server_csv_path="t3_server.csv",
+        client_ip="192.0.2.11", client_pid=200, client_csv_path="t3_client.csv", status="RUNNING",
+    )
+    with pytest.raises(Exception, match="still RUNNING"):
+        service.harvest("t3")
+
+    service._watch_finish("t3", 0.01)
+    deadline = time.monotonic() + 5
+    while "archived_at" not in service.active_tests.get("t3") and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    assert agent.running_checks == 0
+    assert service.active_tests.get("t3")["status"] == "FINISHED"
+    assert len(agent.stopped) == 2
+    assert service.is_archived("t3", "client") and service.is_archived("t3", "server")
+
+    # One summary per role, stored on the record and shared by summary and compare
+    summary = service.active_tests.get("t3")["summary"]["client"]
+    assert summary["rows"] == 2 and summary["metrics"]["Throughput"]["mean"] == 20
+    assert service.live_summary("t3")["client"] == summary
+    compared = service.compare_tests(["t3", "unknown"], "Throughput")
+    assert compared["tests"][0]["summary"] == summary["metrics"]["Throughput"]
+    assert compared["missing"] == ["unknown"]
+    service.shutdown()
+
+
+def test_batch_tail_returns_only_the_newest_rows(tmp_path):
+    service = CyperfService()
+    service.stats_archive = StatsArchive(str(tmp_path))
+    service.stats_archive.store("t4", "client", CSV, None, table_from_csv(CSV))
+    service.active_tests.register("t4", client_ip="192.0.2.11", status="STOPPED", archived_at=1.0)
+
+    items = [{"test_id": "t4", "role": "client", "tail": 1}, {"test_id": "t4", "role": "client", "since": "1", "tail": 5}]
+    rows, after_since = service.batch_stats("192.0.2.11", items)
+    assert [row["Throughput"] for row in rows["stats"]] == [30]
+    assert [row["Throughput"] for row in after_since["stats"]] == [30]
+    columnar = service.batch_stats("192.0.2.11", items[:1], "columnar")[0]["stats"]
+    assert columnar["start"] == 1 and columnar["columns"]["Throughput"] == [30]
+    service.shutdown()
+
+
+def test_tests_running_before_a_restart_are_finished_and_archived(tmp_path, monkeypatch):
+    from app.services.registry_store import RegistryStore
+    from app.services.test_registry import TestRegistry
+
+    # A controller that launched t5 and then went down
+    before = TestRegistry(RegistryStore(str(tmp_path / "registry.db")))
+    before.register(
+        "t5", server_ip="192.0.2.10", server_pid=100, server_csv_path="t5_server.csv",
+        client_ip="192.0.2.11", client_pid=200, client_csv_path="t5_client.csv", status="RUNNING",
+    )
+    before.register("t6", server_ip="192.0.2.10", server_csv_path="t6_server.csv", status="STOPPED")
+    before.close()
+
+    service = CyperfService()
+    service.active_tests = TestRegistry(RegistryStore(str(tmp_path / "registry.db")))
+    service.stats_archive = StatsArchive(str(tmp_path / "archive"))
+    agent = FakeAgent(running_checks=1)
+    monkeypatch.setattr(service, "_ssh", lambda host: contextlib.nullcontext(None))
+    monkeypatch.setattr(service, "_exec", agent.exec)
+    monkeypatch.setattr(service, "_fetch_files", agent.fetch_files)
+
+    assert service.resume_finish_watches() == 1
+    deadline = time.monotonic() + 5
+    while "archived_at" not in service.active_tests.get("t5") and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.active_tests.get("t5")["status"] == "FINISHED"
+    assert service.is_archived("t5", "client") and service.is_archived("t5", "server")
+    service.shutdown()
@@ -0,0 +1,89 @@
+"""
+compact_stats: the MCP stats modes stay within their byte budget.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+from app.services.stats_budget import MIN_MAX_BYTES, compact_stats
+
+SUMMARY = {
+    "test_id": "t1",
+    "status": "RUNNING",
+    "client": {"rows": 600, "metrics": {
+        "Throughput": {"count": 600, "mean": 9850000000},
+        "ConnectionRate": {"count": 600, "mean": 1200},
+    }},
+}
+
+
+class FakeStats:
+    """Columnar stats of a long test; max_points buckets the rows like run_query"""
+
+    def __init__(self, rows=5000):
+        self.rows = rows
+        self.queries = []
+
+    async def summary(self):
+        return SUMMARY
+
+    async def columns(self, query):
+        self.queries.append(query)
+        indices = list(range(self.rows))
+        if "tail" in query:
+            indices = indices[-query["tail"]:]
+        if "max_points" in query:
+            step = -(-len(indices) // query["max_points"])
+            indices = indices[::step]
+        return {
+            "start": 0,
+            "count": len(indices),
+            "columns": {"Timestamp": [1700000000 + i for i in indices], "Throughput": [i * 1000.5 for i in indices]},
+        }
+
+
+def run(arguments, stats, role="client"):
+    text = asyncio.run(compact_stats(role, dict(arguments, test_id="t1"), stats.summary, stats.columns))
+    title, body = text.split("\n", 1)
+    return text, title, body
+
+
+def test_summary_mode_projects_fields():
+    text, title, body = run({"fields": "Throughput"}, FakeStats())
+    assert title == "Client Statistics for Test ID: t1 (summary)"
+    payload = json.loads(body)
+    assert payload["rows"] == 600 and list(payload["metrics"]) == ["Throughput"]
+
+
+def test_tail_mode_requests_only_the_last_rows():
+    stats = FakeStats()
+    _, _, body = run({"mode": "tail", "n": 5, "fields": "Throughput"}, stats)
+    assert stats.queries == [{"fields": "Throughput", "tail": 5}]
+    assert json.loads(body)["columns"]["Timestamp"][-1] == 1700004999
+
+
+def test_downsampled_mode_rebuckets_instead_of_dropping_the_start():
+    stats = FakeStats()
+    text, _, body = run({"mode": "downsampled", "max_points": 2000, "max_bytes": 2000}, stats)
+    assert len(text.encode("utf-8")) <= 2000
+    assert len(stats.queries) == 2 and stats.queries[1]["max_points"] < 2000
+    payload = json.loads(body)
+    # The whole test is still covered: the first bucket starts at the first row
+    assert payload["columns"]["Timestamp"][0] == 1700000000
+    assert "omitted_rows" not in payload
+
+
+@pytest.mark.parametrize("max_bytes", [MIN_MAX_BYTES, 3000])
+def test_full_mode_keeps_the_newest_rows_within_budget(max_bytes):
+    text, _, body = run({"mode": "full", "max_bytes": max_bytes}, FakeStats())
+    assert len(text.encode("utf-8")) <= max_bytes
+    payload = json.loads(body)
+    assert payload["omitted_rows"] > 0
+    assert payload["columns"]["Timestamp"][-1] == 1700004999
+
+
+def test_invalid_mode():
+    with pytest.raises(ValueError):
+        run({"mode": "everything"}, FakeStats())
@@ -0,0 +1,57 @@
+"""
+StatsHistory: bounded memory over long tests, ordering across tiers, and lazy ring growth.
+"""
+
+from cce_flask.utils.stats_history import HISTORY_FIELDS, ROLES, StatsHistory, _WIDTH
+
+
+def snapshot(t, throughput=None):
+    row = {"Timestamp": t, "Throughput": t * 10 if throughput is None else throughput, "ConnectionsFailed": t}
+    return {"timestamp": t, "server": [row], "client": [{"Timestamp": t}]}
+
+
+def ring_bytes(history):
+    rings = [history._recent] + [tier.ring for tier in history._tiers]
+    return sum(ring._data.buffer_info()[1] * ring._data.itemsize for ring in rings)
+
+
+def test_rings_grow_lazily_up_to_capacity():
+    history = StatsHistory(interval=1, recent_seconds=10, tiers=((10, 3),))
+    assert ring_bytes(history) == 0
+    history.append(snapshot(0))
+    assert ring_bytes(history) == 8 * _WIDTH
+
+    for t in range(1, 1000):
+        history.append(snapshot(t))
+    # 10 full-resolution records + 3 closed buckets, however long the test runs
+    assert ring_bytes(history) == 8 * _WIDTH * (10 + 3)
+    assert len(history) == 10 + 3 + 1
+    assert history.snapshots == 1000
+
+
+def test_latest_is_oldest_first_across_tiers():
+    history = StatsHistory(interval=1, recent_seconds=5, tiers=((10, 100),))
+    for t in range(40):
+        history.append(snapshot(t))
+
+    points = history.latest(limit=1000)
+    timestamps = [point["timestamp"] for point in points]
+    assert timestamps == sorted(timestamps)
+    # The newest 5 snapshots at full resolution, older ones in 10 second buckets
+    assert timestamps[-5:] == [35, 36, 37, 38, 39]
+    assert timestamps[:-5] == [0, 10, 20, 30]
+    # Means for throughput, the newest value for counters
+    bucket = points[1]["server"][0]
+    assert bucket["Throughput"] == 145 and bucket["ConnectionsFailed"] == 19
+    assert [p["timestamp"] for p in history.latest(limit=3)] == [37, 38, 39]
+
+
+def test_point_shape_and_missing_data():
+    history = StatsHistory(interval=1, recent_seconds=5)
+    history.append({"timestamp": 5, "server": [], "client": "not rows"})
+    history.append(snapshot(6))
+    missing, point = history.latest()
+    assert missing == {"timestamp": 5, "server": [], "client": []}
+    assert set(point) == {"timestamp", *ROLES}
+    assert set(point["server"][0]) <= {name for name, _ in HISTORY_FIELDS}
+    assert point["client"] == [{"Timestamp": 6}]
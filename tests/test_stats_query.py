@@ -0,0 +1,75 @@
+"""
+run_query: projection, tail, bucketing and max_points on StatsTable.
+"""
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services.stats_model import table_from_csv
+from app.services.stats_query import StatsQuery, run_query
+
+HEADER = "Timestamp,Throughput,ActiveConnections,Phase"
+
+
+def csv_table(rows):
+    return table_from_csv("\n".join([HEADER] + rows).encode())
+
+
+def sample_table():
+    # One row per second, throughput 0..9
+    return csv_table([f"{1700000000 + i},{i * 10},{i},run" for i in range(10)])
+
+
+@pytest.mark.parametrize("params", [
+    {"fields": "Throughput"},
+    {"tail": 5},
+    {"bucket": "5s"},
+    {"max_points": 2},
+    {"fields": "Phase,Throughput", "tail": 1},
+])
+def test_header_only_table_returns_empty_columns(params):
+    table = csv_table([])
+    columns = run_query(table, StatsQuery.from_params(**params))
+    assert columns
+    assert all(values == [] for values in columns.values())
+    assert list(columns)[0] == "Timestamp"
+
+
+def test_projection_and_tail():
+    columns = run_query(sample_table(), StatsQuery.from_params(fields="Throughput,Phase", tail=3))
+    assert columns == {
+        "Timestamp": [1700000007, 1700000008, 1700000009],
+        "Throughput": [70, 80, 90],
+        "Phase": ["run", "run", "run"],
+    }
+
+
+def test_first_index_skips_rows_already_sent():
+    columns = run_query(sample_table(), StatsQuery.from_params(fields="Throughput"), first_index=8)
+    assert columns["Throughput"] == [80, 90]
+
+
+def test_time_buckets_aggregate():
+    table = sample_table()
+    assert run_query(table, StatsQuery.from_params(fields="Throughput", bucket="5s")) == {
+        "Timestamp": [1700000000, 1700000005],
+        "Throughput": [20, 70],
+    }
+    assert run_query(table, StatsQuery.from_params(fields="Throughput", bucket="5s", agg="max"))["Throughput"] == [40, 90]
+
+
+def test_max_points_caps_output():
+    columns = run_query(sample_table(), StatsQuery.from_params(fields="ActiveConnections", max_points=3))
+    assert len(columns["Timestamp"]) <= 3
+    assert columns["Timestamp"][0] == 1700000000
+
+
+def test_invalid_parameters():
+    with pytest.raises(ValueError):
+        StatsQuery.from_params(bucket="soon")
+    with pytest.raises(ValueError):
+        StatsQuery.from_params(tail=-1)
+    with pytest.raises(ValueError):
+        StatsQuery.from_params(fields="Throughput", agg="median")
+    assert StatsQuery.from_params() is None
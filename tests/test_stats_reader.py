@@ -0,0 +1,86 @@
+"""
+IncrementalCSVReader: tail reads, and cached state bounded for long-running controllers.
+"""
+
+import contextlib
+import io
+import types
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from app.services.stats_reader import IncrementalCSVReader
+
+HEADER = b"Timestamp,Throughput\n"
+
+
+class FakeSFTP:
+    """Serves in-memory files and counts the bytes transferred"""
+
+    def __init__(self, files):
+        self.files = files
+        self.transferred = 0
+
+    def stat(self, path):
+        if path not in self.files:
+            raise FileNotFoundError(path)
+        return types.SimpleNamespace(st_size=len(self.files[path]))
+
+    @contextlib.contextmanager
+    def open(self, path, mode):
+        sftp = self
+
+        class Reader(io.BytesIO):
+            def read(self, size=-1):
+                data = super().read(size)
+                sftp.transferred += len(data)
+                return data
+
+        yield Reader(self.files[path])
+
+
+def test_only_appended_bytes_are_read():
+    sftp = FakeSFTP({"t1_client.csv": HEADER + b"1,10\n2,2"})
+    reader = IncrementalCSVReader(["Throughput"])
+    assert reader.read(sftp, "t1_client.csv", "t1", "client").column("Throughput") == [10]
+
+    sftp.files["t1_client.csv"] += b"0\n3,30\n"
+    sftp.transferred = 0
+    table = reader.read(sftp, "t1_client.csv", "t1", "client")
+    assert table.column("Throughput") == [10, 20, 30]
+    assert sftp.transferred == len(b"2,20\n3,30\n")
+    assert reader.summary("t1", "client").rows == 3
+
+
+def test_tracked_files_are_bounded_least_recently_read_first():
+    files = {f"t{i}_client.csv": HEADER + b"1,10\n" for i in range(5)}
+    sftp = FakeSFTP(files)
+    reader = IncrementalCSVReader(["Throughput"], max_files=3)
+    for i in range(4):
+        reader.read(sftp, f"t{i}_client.csv", f"t{i}", "client")
+    reader.read(sftp, "t1_client.csv", "t1", "client")
+    reader.read(sftp, "t4_client.csv", "t4", "client")
+
+    assert len(reader) == 3
+    assert reader.row_count("t0", "client") == reader.row_count("t2", "client") == 0
+    assert reader.row_count("t1", "client") == 1
+
+
+def test_ended_tests_are_forgotten_without_the_archive(monkeypatch):
+    pytest.importorskip("paramiko")
+    pytest.importorskip("pydantic_settings")
+    from app.services.cyperf_service import CyperfService
+
+    service = CyperfService()
+    assert service.stats_archive is None
+    sftp = FakeSFTP({"t1_client.csv": HEADER + b"1,10\n"})
+    service.stats_reader.read(sftp, "t1_client.csv", "t1", "client")
+    service.active_tests.register("t1", client_ip="192.0.2.11", client_csv_path="t1_client.csv", status="RUNNING")
+    monkeypatch.setattr(service, "_ssh", lambda host: contextlib.nullcontext(None))
+    monkeypatch.setattr(service, "_stop_processes", lambda ssh, find, timeout: "stopped")
+
+    service.stop_test("t1")
+    assert service.active_tests.get("t1")["status"] == "STOPPED"
+    assert len(service.stats_reader) == 0
+    service.shutdown()
@@ -0,0 +1,91 @@
+import asyncio
+import contextlib
+
+from app.services import stats_stream
+from app.services.stats_stream import StatsStreamHub
+
+
+class FakeChannel:
+    def __init__(self, chunks):
+        self.chunks = list(chunks)
+        self.command = None
+
+    def get_pty(self):
+        pass
+
+    def exec_command(self, command):
+        self.command = command
+
+    def settimeout(self, timeout):
+        pass
+
+    def recv(self, size):
+        return self.chunks.pop(0) if self.chunks else b""
+
+    def close(self):
+        pass
+
+
+class FakeSSH:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_transport(self):
+        return self
+
+    def open_session(self):
+        return self.channel
+
+
+def csv_lines(rows):
+    return b"Timestamp,Throughput\n" + b"".join(f"{i},{i * 10}\n".encode() for i in range(rows))
+
+
+async def collect(subscription, limit=5.0):
+    events = []
+    while True:
+        event = await asyncio.wait_for(subscription.queue.get(), timeout=limit)
+        events.append(event)
+        if "end" in event:
+            return events
+
+
+def test_stream_ends_when_the_tail_exits_and_history_is_capped():
+    channel = FakeChannel([csv_lines(1200)])
+    hub = StatsStreamHub(lambda host: contextlib.nullcontext(FakeSSH(channel)))
+
+    async def run():
+        first = hub.subscribe("t1", [("client", "10.0.0.2", "t1_client.csv", 4242)])
+        events = await collect(first)
+        assert "--pid=4242" in channel.command
+        assert [e["row"]["Timestamp"] for e in events if "row" in e][-1] == 1199
+
+        # A late subscriber gets the newest events only, and the replay is never cut by its queue
+        late = hub.subscribe("t1", [])
+        replay = await collect(late)
+        assert len(replay) == stats_stream.STREAM_HISTORY_ROWS
+        assert replay[-2]["row"]["Timestamp"] == 1199
+        assert late.dropped == 0
+        hub.unsubscribe(first)
+        hub.unsubscribe(late)
+        assert hub.active_streams() == {}
+
+    asyncio.run(run())
+
+
+def test_close_stops_a_running_tail():
+    class EndlessChannel(FakeChannel):
+        def recv(self, size):
+            import socket
+            raise socket.timeout()
+
+    hub = StatsStreamHub(lambda host: contextlib.nullcontext(FakeSSH(EndlessChannel([]))))
+
+    async def run():
+        subscription = hub.subscribe("t2", [("server", "10.0.0.1", "t2_server.csv", None)])
+        hub.close("t2")
+        events = await collect(subscription)
+        assert events == [{"end": True}]
+        hub.unsubscribe(subscription)
+
+    asyncio.run(run())
@@ -0,0 +1,105 @@
+"""
+Test groups are rebuilt from the registry and stop members without a recorded PID.
+"""
+
+import asyncio
+
+import pytest
+
+pytest.importorskip("paramiko")
+pytest.importorskip("pydantic_settings")
+
+from app.services import test_groups, test_registry
+from app.services.registry_store import RegistryStore
+
+DEAD_HOST = "198.51.100.99"
+# An agent where the launch could not confirm cyperf's PID
+NO_PID_HOST = "198.51.100.2"
+
+
+class FakeAsyncService:
+    """Registers tests the way CyperfService does, without SSH"""
+
+    def __init__(self, registry):
+        self.service = self
+        self.active_tests = registry
+        self.stopped = []
+
+    async def start_server(self, test_id, server_ip, params):
+        if server_ip == DEAD_HOST:
+            raise Exception(f"Unable to connect to {server_ip}")
+        self.active_tests.register(
+            test_id, server_ip=server_ip, server_csv_path=f"{test_id}_server.csv",
+            server_pid=None if server_ip == NO_PID_HOST else 100, status="SERVER_RUNNING",
+        )
+
+    async def start_client(self, test_id, server_ip, client_ip, params):
+        self.active_tests.update(
+            test_id, client_ip=client_ip, client_csv_path=f"{test_id}_client.csv",
+            client_pid=200, status="RUNNING",
+        )
+
+    async def get_client_stats(self, test_id):
+        return [{"Timestamp": "1", "Throughput": "10"}]
+
+    async def stop_test(self, test_id, timeout=None):
+        self.stopped.append(test_id)
+        record = self.active_tests.update(test_id, status="STOPPED")
+        return {role: "stopped" for role in ("client", "server") if record.get(f"{role}_csv_path")}
+
+
+def test_group_survives_restart_and_stops_members_without_pid(tmp_path):
+    store = RegistryStore(str(tmp_path / "registry.db"))
+    manager = test_groups.TestGroupManager(FakeAsyncService(test_registry.TestRegistry(store)))
+    group = asyncio.run(manager.start_group(
+        servers=[{"server_ip": "198.51.100.1"}, {"server_ip": NO_PID_HOST}, {"server_ip": DEAD_HOST}],
+        clients=[
+            {"client_ip": "198.51.100.11", "server_ip": "198.51.100.1"},
+            {"client_ip": "198.51.100.12", "server_ip": NO_PID_HOST},
+            {"client_ip": "198.51.100.13", "server_ip": DEAD_HOST},
+        ],
+    ))
+    group_id = group["group_id"]
+    assert group["status"] == "PARTIAL"
+    statuses = {m["test_id"]: (m["status"], m["pid"]) for m in group["members"]}
+    assert statuses == {
+        f"{group_id}-s0": ("RUNNING", 100),
+        f"{group_id}-s1": ("RUNNING", None),
+        f"{group_id}-s2": ("FAILED", None),
+        f"{group_id}-c0": ("RUNNING", 200),
+        f"{group_id}-c1": ("RUNNING", 200),
+        f"{group_id}-c2": ("FAILED", None),
+    }
+    store.flush()
+
+    # A new controller process sees the same group
+    service = FakeAsyncService(test_registry.TestRegistry(RegistryStore(store.path)))
+    restarted = test_groups.TestGroupManager(service)
+    assert restarted.get_group(group_id) == group
+
+    stats = asyncio.run(restarted.aggregated_stats(group_id))
+    assert stats["members"] == 2 and stats["stats"][0]["Throughput"] == 20
+
+    result = asyncio.run(restarted.stop_group(group_id))
+    assert sorted(service.stopped) == sorted(f"{group_id}-{m}" for m in ("c0", "c1", "s0", "s1"))
+    assert result["status"] == "STOPPED"
+    members = {m["test_id"]: m["status"] for m in restarted.get_group(group_id)["members"]}
+    assert members[f"{group_id}-s1"] == "STOPPED"
+    assert members[f"{group_id}-s2"] == "FAILED"
+
+
+def test_unknown_group():
+    manager = test_groups.TestGroupManager(FakeAsyncService(test_registry.TestRegistry()))
+    with pytest.raises(KeyError):
+        manager.get_group("missing")
+
+
+def test_timestamp_alignment_is_in_time_order():
+    early = [{"Timestamp": "10", "Throughput": "1"}, {"Timestamp": "11", "Throughput": "1"}]
+    # A member that started earlier but is listed second
+    late = [{"Timestamp": "8", "Throughput": "2"}, {"Timestamp": "9", "Throughput": "2"},
+            {"Timestamp": "10.0", "Throughput": "2"}]
+    rows = test_groups.aggregate_rows([early, late], align="timestamp")
+    assert [float(r["Timestamp"]) for r in rows] == [8, 9, 10, 11]
+    assert [r["Throughput"] for r in rows] == [2, 2, 3, 1]
+    assert [r["Members"] for r in rows] == [1, 1, 2, 1]
@@ -0,0 +1,75 @@
+"""
+Flask test lifecycle: starts never delay stats polls, and cancelled starts leave nothing running.
+"""
+
+import threading
+
+import pytest
+
+pytest.importorskip("flask")
+pytest.importorskip("requests")
+
+from cce_flask.utils import scheduler, test_manager
+
+CONFIG = {"server_ip": "192.0.2.10", "client_ip": "192.0.2.11", "duration": 5}
+
+
+def test_slow_jobs_do_not_delay_polls():
+    polled = threading.Event()
+    release = threading.Event()
+    sched = scheduler.TestScheduler(lambda keys: polled.set(), tick=0.01, max_workers=1, job_workers=1)
+    # A start blocked on the API holds every job worker
+    sched.submit(release.wait, 5)
+    sched.submit(release.wait, 5)
+    sched.watch("t1", 0.01)
+    try:
+        assert polled.wait(2)
+    finally:
+        release.set()
+        sched.unwatch("t1")
+
+
+class FakeAPIClient:
+    """Starts succeed; cancel_on names the call during which the user cancels"""
+
+    def __init__(self, cancel_on):
+        self.cancel_on = cancel_on
+        self.manager = None
+        self.test_id = None
+        self.calls = []
+
+    def _cancel_if(self, call):
+        if call == self.cancel_on:
+            self.manager.cancel_test(self.test_id)
+
+    def start_server(self, server_ip, params):
+        self.calls.append("start_server")
+        self._cancel_if("start_server")
+        return {"test_id": "api-1"}
+
+    def start_client(self, test_id, server_ip, client_ip, params):
+        self.calls.append("start_client")
+        self._cancel_if("start_client")
+        return {"test_id": test_id}
+
+    def stop_test(self, test_id):
+        self.calls.append(f"stop_test {test_id}")
+        return {}
+
+
+@pytest.mark.parametrize("cancel_on,calls", [
+    ("start_server", ["start_server", "stop_test api-1"]),
+    ("start_client", ["start_server", "start_client", "stop_test api-1"]),
+])
+def test_cancel_during_start_stops_the_launched_test(monkeypatch, cancel_on, calls):
+    api = FakeAPIClient(cancel_on)
+    monkeypatch.setattr(test_manager, "get_api_client", lambda: api)
+    manager = test_manager.TestManager()
+    api.manager, api.test_id = manager, "web-1"
+    manager.active_tests["web-1"] = test_manager.TestState(test_id="web-1", config=dict(CONFIG), duration=5)
+
+    manager._execute_test_workflow("web-1")
+    assert manager.active_tests["web-1"].status == test_manager.TestStatus.CANCELLED
+    # cancel_test's cleanup runs before the launch returns, so the workflow stops what it launched
+    assert api.calls[:len(calls)] == calls
+    assert manager.scheduler.watched() == 0